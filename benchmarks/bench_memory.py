@@ -0,0 +1,74 @@
+# bench_memory.py
+"""
+EXTRACTION MEMORY
+
+Measures how much memory the extracted data of a synthetic board holds (see fake_pcbnew.py):
+the compact ComponentRecords extract_data returns, against the per-pad dict layout it used to
+return ({"general_properties": {...}, "pin_data": [{...}, ...], "filtered_pins_for_csv": [{...}, ...]}),
+which every record can still produce.
+
+Run from the repository root (no KiCad needed):
+
+    python benchmarks/bench_memory.py
+    python benchmarks/bench_memory.py --sizes 10000,100000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extract_pins_plugin import pin_export # noqa: E402
+from extract_pins_plugin.board_snapshot import BoardSnapshot # noqa: E402
+
+import fake_pcbnew # noqa: E402
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+
+def measure(build):
+    """
+    Returns (bytes still allocated by the result of build(), seconds it took).
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size, elapsed
+
+
+def legacy_layout(data):
+    return {ref: {key: record[key] for key in ("general_properties", "pin_data", "filtered_pins_for_csv")}
+            for ref, record in data.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory held by the extracted pin data of synthetic boards.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated board sizes in pads (default: 1000,10000,100000)")
+    args = parser.parse_args(argv)
+
+    print(f"{'Pads':>7}  {'Records':>10}  {'Dict layout':>12}  {'Saved':>6}  {'Extract':>8}")
+    for size in [int(s) for s in args.sizes.split(',') if s.strip()]:
+        snapshot = BoardSnapshot(fake_pcbnew.make_board(size).GetFootprints())
+        rows = list(snapshot.all_rows())
+        extraction_options = {"ignore_unconnected_pins_for_csv": True, "ignore_free_pins_for_csv": True}
+        record_bytes, elapsed = measure(lambda: pin_export.extract_data(snapshot, rows, **extraction_options))
+        data = pin_export.extract_data(snapshot, rows, **extraction_options)
+        dict_bytes, _elapsed = measure(lambda: legacy_layout(data))
+        print(f"{size:>7}  {record_bytes / 1e6:>8.2f}MB  {dict_bytes / 1e6:>10.2f}MB  "
+              f"{1 - record_bytes / dict_bytes:>6.0%}  {elapsed * 1000:>6.0f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
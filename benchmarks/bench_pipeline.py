@@ -0,0 +1,234 @@
+# bench_pipeline.py
+"""
+PIPELINE BENCHMARKS
+
+Times every stage of the export pipeline and every export button path on synthetic boards
+(see fake_pcbnew.py), from 100 to 100k pads, and writes the results as JSON so two versions
+of the plugin can be compared.
+
+Run from the repository root (no KiCad needed):
+
+    python benchmarks/bench_pipeline.py                       # all sizes, results in bench_results.json
+    python benchmarks/bench_pipeline.py --sizes 1000,10000 --repeat 5 --output new.json
+    python benchmarks/bench_pipeline.py --compare old.json    # also print the ratio against an older run
+
+The button paths mirror what the dialog does after its file dialogs (selection, de-duplication,
+sorting, streamed Markdown + CSV written to a temporary directory); wx itself is not involved.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extract_pins_plugin import export_sinks, filter_expression, pin_export, pinout_diff, sharded_export # noqa: E402
+from extract_pins_plugin.board_snapshot import BoardSnapshot, NetIndex, FieldIndex, CONNECTOR_TYPE_FIELD # noqa: E402
+from extract_pins_plugin.export_cache import ExportCache # noqa: E402
+from extract_pins_plugin.footprint_list import FootprintList # noqa: E402
+from extract_pins_plugin.kicad_pcb_reader import read_board # noqa: E402
+from extract_pins_plugin.prefix_index import build_catalogue_indexes # noqa: E402
+from extract_pins_plugin.spatial_index import SpatialIndex # noqa: E402
+
+import fake_pcbnew # noqa: E402
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+DEFAULT_REPEAT = 3
+
+# Filters the dialog would typically be used with
+VALUE_FILTER = "CONN*"
+NET_FILTER = "/CAN_*,GND"
+TYPE_FILTER = "harness,backplane"
+FILTER_EXPRESSION = "ref:J* AND (type:harness OR net:/CAN_*) AND NOT layer:B.Cu"
+SPATIAL_EXPRESSION = "edge:6 OR rect:100,10,150,30"
+
+
+def time_call(func, repeat):
+    """
+    Runs func() 'repeat' times and returns (timings in seconds, result of the last run).
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def export_rows(snapshot, rows, out_dir, name, cache=None):
+    """
+    The dialog's _process_and_export after the save dialogs (with empty Value / Net Name filters):
+    one row per reference, sort, then Markdown and CSV streamed to disk.
+    Returns the number of characters written.
+    """
+    rows = pin_export.unique_reference_rows(snapshot, rows)
+    rows = pin_export.sort_rows_by_reference(snapshot, rows)
+    columns = pin_export.DEFAULT_COLUMNS
+    md_path = os.path.join(out_dir, name + ".md")
+    csv_path = os.path.join(out_dir, name + ".csv")
+    if cache is not None:
+        written = pin_export.write_chunks(md_path, cache.iter_markdown(snapshot, rows, False, columns))
+        return written + pin_export.write_chunks(csv_path, cache.iter_csv(snapshot, rows, columns))
+    written = pin_export.write_chunks(md_path, pin_export.iter_markdown(pin_export.iter_extracted(snapshot, rows),
+                                                                        False, columns))
+    return written + pin_export.write_chunks(csv_path, pin_export.iter_csv(pin_export.iter_extracted(snapshot, rows),
+                                                                           columns))
+
+
+def bench_board(target_pads, repeat, out_dir):
+    """
+    Runs every stage and button path on one synthetic board. Returns a list of result dicts.
+    """
+    board = fake_pcbnew.make_board(target_pads)
+    footprints = board.GetFootprints()
+    pad_count = sum(len(fp.Pads()) for fp in footprints)
+    board_path = os.path.join(out_dir, f"synthetic_{target_pads}.kicad_pcb")
+    fake_pcbnew.write_kicad_pcb(board, board_path)
+
+    snapshot = BoardSnapshot(footprints)
+    all_rows = list(snapshot.all_rows())
+    data = pin_export.extract_data(snapshot, all_rows)
+    js_rows = pin_export.select_rows_by_reference(snapshot, "J*")
+    net_rows = pin_export.apply_text_filters(snapshot, all_rows, "", NET_FILTER)
+    half = len(footprints) // 2
+    pin_records = pinout_diff.pins_from_snapshot(snapshot, all_rows)
+    respin_records = pin_records[:-1] + [(ref, pad, net + "_2") for ref, pad, net in pin_records[::50]]
+    warm_cache = ExportCache()
+    export_rows(snapshot, all_rows, out_dir, "warm", warm_cache)
+    sorted_rows = pin_export.sort_rows_by_reference(snapshot, pin_export.unique_reference_rows(snapshot, all_rows))
+    shard_runs = iter(range(1 << 30))
+    sharded_export.write_sharded(snapshot, sorted_rows, os.path.join(out_dir, f"shards_{target_pads}"))
+
+    def sharded_first_run():
+        # A new, empty folder each time: every shard is written
+        return sharded_export.write_sharded(snapshot, sorted_rows,
+                                            os.path.join(out_dir, f"shards_{target_pads}_{next(shard_runs)}"))
+
+    stages = [
+        # --- Pipeline stages ---
+        ("read_kicad_pcb", lambda: read_board(board_path)),
+        ("snapshot", lambda: BoardSnapshot(footprints)),
+        ("net_index", lambda: NetIndex(snapshot)),
+        ("field_index", lambda: FieldIndex(snapshot)),
+        ("catalogues", lambda: build_catalogue_indexes(snapshot, CONNECTOR_TYPE_FIELD)),
+        ("select_js", lambda: pin_export.select_rows_by_reference(snapshot, "J*")),
+        ("select_type", lambda: pin_export.select_rows_by_field(snapshot, TYPE_FILTER)),
+        ("filter_value", lambda: pin_export.apply_text_filters(snapshot, all_rows, VALUE_FILTER, "")),
+        ("filter_net", lambda: pin_export.apply_text_filters(snapshot, all_rows, "", NET_FILTER)),
+        ("filter_expression", lambda: filter_expression.select_rows(snapshot, all_rows,
+                                                                    filter_expression.parse_filter(FILTER_EXPRESSION))),
+        ("spatial_index", lambda: SpatialIndex(snapshot)),
+        ("filter_spatial", lambda: filter_expression.select_rows(snapshot, all_rows,
+                                                                 filter_expression.parse_filter(SPATIAL_EXPRESSION),
+                                                                 board=board)),
+        ("extract", lambda: pin_export.extract_data(snapshot, all_rows)),
+        ("extract_net_pins", lambda: pin_export.extract_data(snapshot, net_rows, pin_net_filter=NET_FILTER)),
+        ("markdown", lambda: pin_export.generate_markdown(data)),
+        ("markdown_highlight", lambda: pin_export.generate_markdown(data, apply_highlight=True)),
+        ("csv", lambda: pin_export.generate_csv(data)),
+        ("write_jsonl", lambda: export_sinks.write_fused(snapshot, sorted_rows,
+                                                         export_sinks.create_sinks(["jsonl"], out_dir, "stage"))),
+        ("write_json", lambda: export_sinks.write_fused(snapshot, sorted_rows,
+                                                        export_sinks.create_sinks(["json"], out_dir, "stage"))),
+        ("write_markdown", lambda: pin_export.write_chunks(os.path.join(out_dir, "stage.md"),
+                                                           pin_export.iter_markdown(data.items()))),
+        ("write_markdown_gzip", lambda: pin_export.write_chunks(os.path.join(out_dir, "stage.md.gz"),
+                                                                pin_export.iter_markdown(data.items()))),
+        ("unique_nets", lambda: pin_export.collect_unique_nets(snapshot, all_rows)),
+        ("pinout_diff", lambda: pinout_diff.diff_pinouts(pin_records, respin_records)),
+        ("list_merge", lambda: FootprintList(footprints[:half]).merge(footprints[half:])),
+        # --- Button paths (end to end from the snapshot) ---
+        ("button_export_selected", lambda: export_rows(snapshot, all_rows, out_dir, "selected")),
+        ("button_export_js", lambda: export_rows(snapshot, pin_export.select_rows_by_reference(snapshot, "J*"),
+                                                 out_dir, "js")),
+        ("button_export_by_type", lambda: export_rows(snapshot, pin_export.select_rows_by_field(snapshot, TYPE_FILTER),
+                                                      out_dir, "type")),
+        ("button_unique_nets", lambda: pin_export.write_chunks(
+            os.path.join(out_dir, "unique_nets.csv"),
+            pin_export.iter_unique_nets_csv(sorted(pin_export.collect_unique_nets(snapshot, js_rows),
+                                                   key=pin_export.natural_sort_key)))),
+        ("button_export_selected_fused", lambda: export_sinks.write_fused(
+            snapshot, sorted_rows, export_sinks.create_sinks(["md", "csv", "unique_nets"], out_dir, "fused"))),
+        ("button_export_sharded_first", sharded_first_run),
+        ("button_export_sharded_unchanged", lambda: sharded_export.write_sharded(
+            snapshot, sorted_rows, os.path.join(out_dir, f"shards_{target_pads}"))),
+        ("button_export_selected_cold_cache", lambda: export_rows(snapshot, all_rows, out_dir, "cold", ExportCache())),
+        ("button_export_selected_warm_cache", lambda: export_rows(snapshot, all_rows, out_dir, "warm", warm_cache)),
+    ]
+
+    results = []
+    for stage, func in stages:
+        timings, _ = time_call(func, repeat)
+        results.append({
+            "pads": pad_count,
+            "target_pads": target_pads,
+            "footprints": len(footprints),
+            "stage": stage,
+            "best": min(timings),
+            "mean": statistics.mean(timings),
+            "runs": timings,
+        })
+        print(f"{target_pads:>7} pads  {stage:<36} best {min(timings) * 1000:>10.2f} ms")
+    return results
+
+
+def compare(results, baseline_path):
+    """
+    Prints the best time of every (size, stage) against the same entry of an older results file.
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r["target_pads"], r["stage"]): r["best"] for r in json.load(f)["results"]}
+    print(f"\nComparison with {baseline_path} (ratio < 1.00 is faster):")
+    for r in results:
+        old = baseline.get((r["target_pads"], r["stage"]))
+        if old:
+            print(f"{r['target_pads']:>7} pads  {r['stage']:<36} {old * 1000:>10.2f} ms -> "
+                  f"{r['best'] * 1000:>10.2f} ms  x{r['best'] / old:.2f}")
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Time the pin export pipeline on synthetic boards.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated board sizes in pads (default: 100,1000,10000,100000)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per stage, the best one is kept")
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--compare", help="Older results file to compare against")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="pin_export_bench_") as out_dir:
+        for size in sizes:
+            results.extend(bench_board(size, max(1, args.repeat), out_dir))
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "sizes": sizes,
+        },
+        "results": results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
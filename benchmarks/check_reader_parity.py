@@ -0,0 +1,66 @@
+# check_reader_parity.py
+"""
+READER PARITY CHECK
+
+Checks the S-expression reader (kicad_pcb_reader.py) against the objects a board was written
+from, without KiCad: each synthetic board (see fake_pcbnew.py) is saved as a .kicad_pcb, read
+back with read_board, and the extract_data results, board net names and footprint bounding
+boxes of both are compared (kicad_pcb_reader.compare_boards). With KiCad's Python, the same
+comparison against pcbnew.LoadBoard is 'python -m extract_pins_plugin.kicad_pcb_reader board.kicad_pcb --compare'.
+
+Run from the repository root; the exit code is 1 on any difference:
+
+    python benchmarks/check_reader_parity.py
+    python benchmarks/check_reader_parity.py --sizes 5000 --seeds 0,1,2
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extract_pins_plugin.kicad_pcb_reader import compare_boards, read_board # noqa: E402
+
+import fake_pcbnew # noqa: E402
+
+DEFAULT_SIZES = (100, 5000)
+DEFAULT_SEEDS = (0, 1)
+MAX_REPORTED = 20 # Differences printed per board
+
+
+def check_board(target_pads, seed, directory):
+    """
+    Writes, reads back and compares one synthetic board. Returns (footprints, differences).
+    """
+    board = fake_pcbnew.make_board(target_pads, seed)
+    path = os.path.join(directory, f"parity_{target_pads}_{seed}.kicad_pcb")
+    fake_pcbnew.write_kicad_pcb(board, path)
+    return len(board.GetFootprints()), compare_boards(board, read_board(path), compare_boxes=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the S-expression reader with the synthetic boards it reads.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated board sizes in pads (default: 100,5000)")
+    parser.add_argument("--seeds", default=",".join(str(s) for s in DEFAULT_SEEDS),
+                        help="Comma-separated random seeds, one board per size and seed (default: 0,1)")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    with tempfile.TemporaryDirectory(prefix="reader_parity_") as directory:
+        for size in [int(s) for s in args.sizes.split(',') if s.strip()]:
+            for seed in [int(s) for s in args.seeds.split(',') if s.strip()]:
+                footprints, differences = check_board(size, seed, directory)
+                print(f"{size:>7} pads  seed {seed}  {footprints:>6} footprints  "
+                      f"{'ok' if not differences else f'{len(differences)} difference(s)'}")
+                for difference in differences[:MAX_REPORTED]:
+                    print(f"MISMATCH: {difference}")
+                failed += bool(differences)
+    print("Parity check passed." if not failed else f"Parity check failed on {failed} board(s).")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+# fake_pcbnew.py
+"""
+FAKE PCBNEW
+
+Lightweight stand-ins for the pcbnew objects the plugin reads (BOARD, FOOTPRINT, PAD,
+NETINFO_ITEM, PCB_FIELD, PCB_SHAPE, VECTOR2I, BOX2I, EDA_ANGLE, KIID, LIB_ID), plus a generator for
+synthetic boards of any size, so the export pipeline can be timed without KiCad.
+
+The objects only implement the methods the plugin calls. They are plain Python and much
+cheaper than real SWIG proxies, so absolute numbers are lower than inside KiCad; the
+benchmarks are meant for comparing versions of the plugin against each other.
+"""
+
+import math
+import random
+
+
+class VECTOR2I:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class BOX2I:
+    def __init__(self, left, top, right, bottom):
+        self.left = left
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+
+    def GetLeft(self):
+        return self.left
+
+    def GetTop(self):
+        return self.top
+
+    def GetRight(self):
+        return self.right
+
+    def GetBottom(self):
+        return self.bottom
+
+
+class EDA_ANGLE:
+    def __init__(self, degrees):
+        self.degrees = degrees
+
+    def AsDegrees(self):
+        return self.degrees
+
+
+class KIID:
+    def __init__(self, text):
+        self.text = text
+
+    def AsString(self):
+        return self.text
+
+
+class LIB_ID:
+    def __init__(self, text):
+        self.text = text
+
+    def GetUniStringLibId(self):
+        return self.text
+
+    def __str__(self):
+        return self.text
+
+
+class NETINFO_ITEM:
+    def __init__(self, net_code, net_name):
+        self.net_code = net_code
+        self.net_name = net_name
+
+    def GetNetCode(self):
+        return self.net_code
+
+    def GetNetname(self):
+        return self.net_name
+
+
+class PCB_FIELD:
+    def __init__(self, name, text):
+        self.name = name
+        self.text = text
+
+    def GetName(self):
+        return self.name
+
+    def GetText(self):
+        return self.text
+
+
+class PAD:
+    def __init__(self, pad_name, net, position):
+        self.pad_name = pad_name
+        self.net = net
+        self.position = position
+
+    def GetPadName(self):
+        return self.pad_name
+
+    def GetNumber(self):
+        return self.pad_name
+
+    def GetNet(self):
+        return self.net
+
+    def GetPosition(self):
+        return self.position
+
+
+class FOOTPRINT:
+    def __init__(self, uuid, fpid, reference, value, description, layer, position, orientation, fields, pads):
+        self.m_Uuid = KIID(uuid)
+        self.fpid = fpid
+        self.description = description
+        self.layer = layer
+        self.position = position
+        self.orientation = orientation
+        self.fields = [PCB_FIELD("Reference", reference), PCB_FIELD("Value", value)] + fields
+        self.reference = reference
+        self.value = value
+        self.pads = pads
+        self.selected = False
+
+    def GetReference(self):
+        return self.reference
+
+    def GetValue(self):
+        return self.value
+
+    def GetFPID(self):
+        return LIB_ID(self.fpid)
+
+    def GetLibDescription(self):
+        return self.description
+
+    def GetLayerName(self):
+        return self.layer
+
+    def GetPosition(self):
+        return self.position
+
+    def GetOrientation(self):
+        return self.orientation
+
+    def GetBoundingBox(self, include_text=True, include_invisible_text=True):
+        # The square pads plus the footprint position (same box as the S-expression reader)
+        left = min([self.position.x] + [pad.position.x - PAD_HALF_SIZE for pad in self.pads])
+        top = min([self.position.y] + [pad.position.y - PAD_HALF_SIZE for pad in self.pads])
+        right = max([self.position.x] + [pad.position.x + PAD_HALF_SIZE for pad in self.pads])
+        bottom = max([self.position.y] + [pad.position.y + PAD_HALF_SIZE for pad in self.pads])
+        return BOX2I(left, top, right, bottom)
+
+    def GetFields(self):
+        return self.fields
+
+    def Pads(self):
+        return self.pads
+
+    def IsSelected(self):
+        return self.selected
+
+
+class PCB_SHAPE:
+    """
+    A board drawing; only rectangles (GetShape() == 1) are generated.
+    """
+
+    def __init__(self, shape, layer, start, end):
+        self.shape = shape
+        self.layer = layer
+        self.start = start
+        self.end = end
+
+    def GetShape(self):
+        return self.shape
+
+    def GetLayerName(self):
+        return self.layer
+
+    def GetStart(self):
+        return self.start
+
+    def GetEnd(self):
+        return self.end
+
+
+class BOARD:
+    def __init__(self, footprints, nets, drawings=()):
+        self.footprints = footprints
+        self.nets = nets # NETINFO_ITEMs, index == net code
+        self.drawings = list(drawings)
+
+    def GetFootprints(self):
+        return self.footprints
+
+    def GetDrawings(self):
+        return self.drawings
+
+    def GetNetCount(self):
+        return len(self.nets)
+
+
+# --- Synthetic boards ---
+
+PAD_HALF_SIZE = 100000 # Pads are 0.2 mm squares
+GRID_COLUMNS = 200
+GRID_PITCH = 5000000
+
+CONNECTOR_TYPES = ("harness", "backplane", "power", "board2board", "debug")
+BUS_NETS = ("CAN_H", "CAN_L", "I2C_SCL", "I2C_SDA", "SPI_MOSI", "SPI_MISO", "SPI_SCK", "USB_DP", "USB_DN")
+POWER_NETS = ("GND", "+3V3", "+5V", "VBAT")
+
+
+def make_board(target_pads, seed=0):
+    """
+    Builds a deterministic synthetic board with roughly 'target_pads' pads:
+    about 10% connectors (J, 4-64 pads, with 'connector-type' and often 'mating-part' fields),
+    20% ICs (U, 8-100 pads) and two-pad passives (R, C) for the rest, placed on a grid.
+    Nets mix shared power/bus nets, local 'Net-(...)' nets, 'unconnected-(...)' pins and
+    pads on net 0 (no net). The board outline is an Edge.Cuts rectangle around the grid.
+    """
+    rng = random.Random(seed)
+    nets = [NETINFO_ITEM(0, "")]
+    nets_by_name = {}
+
+    def net(name):
+        item = nets_by_name.get(name)
+        if item is None:
+            item = NETINFO_ITEM(len(nets), name)
+            nets.append(item)
+            nets_by_name[name] = item
+        return item
+
+    footprints = []
+    counters = {"J": 0, "U": 0, "R": 0, "C": 0}
+    pad_total = 0
+    while pad_total < target_pads:
+        kind = rng.random()
+        if kind < 0.1:
+            prefix, pad_count = "J", rng.choice((4, 6, 8, 10, 16, 20, 26, 34, 40, 64))
+        elif kind < 0.3:
+            prefix, pad_count = "U", rng.choice((8, 14, 16, 20, 28, 32, 48, 64, 100))
+        else:
+            prefix, pad_count = rng.choice("RC"), 2
+        pad_count = min(pad_count, max(2, target_pads - pad_total))
+        counters[prefix] += 1
+        reference = f"{prefix}{counters[prefix]}"
+        row = len(footprints)
+        x = (row % GRID_COLUMNS) * GRID_PITCH
+        y = (row // GRID_COLUMNS) * GRID_PITCH
+
+        pads = []
+        for i in range(1, pad_count + 1):
+            roll = rng.random()
+            if roll < 0.05:
+                pad_net = nets[0] # No net
+            elif roll < 0.08:
+                pad_net = net(f"unconnected-({reference}-Pad{i})")
+            elif roll < 0.3:
+                pad_net = net(rng.choice(POWER_NETS))
+            elif roll < 0.5:
+                pad_net = net(f"/{rng.choice(BUS_NETS)}_{rng.randrange(32)}")
+            else:
+                # Local net shared with a nearby footprint
+                pad_net = net(f"Net-({prefix}{rng.randrange(1, counters[prefix] + 1)}-Pad{rng.randrange(1, 9)})")
+            pads.append(PAD(str(i), pad_net, VECTOR2I(x + i * 254000, y)))
+        pad_total += pad_count
+
+        fields = []
+        if prefix == "J":
+            value = f"CONN_1x{pad_count:02d}"
+            fpid = f"Connector_Generic:{value}"
+            fields.append(PCB_FIELD("connector-type", rng.choice(CONNECTOR_TYPES)))
+            if rng.random() < 0.5:
+                fields.append(PCB_FIELD("mating-part", f"MP-{rng.randrange(1000):03d}"))
+        elif prefix == "U":
+            value = f"IC_{pad_count}P_{rng.randrange(20)}"
+            fpid = f"Package_SO:SOIC-{pad_count}"
+        else:
+            value = rng.choice(("10k", "4k7", "100n", "1u", "22p"))
+            fpid = "Resistor_SMD:R_0603" if prefix == "R" else "Capacitor_SMD:C_0603"
+        footprints.append(FOOTPRINT(
+            f"00000000-0000-0000-0000-{row:012d}", fpid, reference, value, f"Synthetic {prefix} part",
+            "B.Cu" if rng.random() < 0.2 else "F.Cu", VECTOR2I(x, y), EDA_ANGLE(rng.choice((0.0, 90.0, 180.0))),
+            fields, pads))
+
+    # Edge.Cuts rectangle one grid pitch around the footprints
+    rows_used = (len(footprints) + GRID_COLUMNS - 1) // GRID_COLUMNS
+    outline = PCB_SHAPE(1, "Edge.Cuts", VECTOR2I(-GRID_PITCH, -GRID_PITCH),
+                        VECTOR2I(GRID_COLUMNS * GRID_PITCH, rows_used * GRID_PITCH))
+    return BOARD(footprints, nets, [outline])
+
+
+def _quote(text):
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def write_kicad_pcb(board, path):
+    """
+    Writes a fake board as a minimal KiCad 8 style .kicad_pcb file (net table, board outline and
+    footprints with properties and pads), so the S-expression reader can be timed on the same data.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('(kicad_pcb (version 20240108) (generator "fake_pcbnew")\n')
+        for item in board.nets:
+            f.write(f'  (net {item.GetNetCode()} {_quote(item.GetNetname())})\n')
+        for shape in board.drawings:
+            start, end = shape.GetStart(), shape.GetEnd()
+            f.write(f'  (gr_rect (start {start.x / 1000000.0} {start.y / 1000000.0}) '
+                    f'(end {end.x / 1000000.0} {end.y / 1000000.0}) (layer {_quote(shape.GetLayerName())}))\n')
+        for fp in board.footprints:
+            pos = fp.GetPosition()
+            f.write(f'  (footprint {_quote(fp.fpid)} (layer {_quote(fp.GetLayerName())}) '
+                    f'(uuid {_quote(fp.m_Uuid.AsString())}) '
+                    f'(at {pos.x / 1000000.0} {pos.y / 1000000.0} {fp.GetOrientation().AsDegrees()}) '
+                    f'(descr {_quote(fp.GetLibDescription())})\n')
+            for field in fp.GetFields():
+                f.write(f'    (property {_quote(field.GetName())} {_quote(field.GetText())})\n')
+            # Pad (at ...) is relative to the footprint, in its rotated frame
+            angle = math.radians(fp.GetOrientation().AsDegrees())
+            cos_a, sin_a = math.cos(angle), math.sin(angle)
+            pad_size = 2 * PAD_HALF_SIZE / 1000000.0
+            for pad in fp.Pads():
+                pad_net = pad.GetNet()
+                offset_x, offset_y = pad.GetPosition().x - pos.x, pad.GetPosition().y - pos.y
+                dx = round((offset_x * cos_a - offset_y * sin_a) / 1000000.0, 6)
+                dy = round((offset_x * sin_a + offset_y * cos_a) / 1000000.0, 6)
+                f.write(f'    (pad {_quote(pad.GetPadName())} smd rect (at {dx} {dy} {fp.GetOrientation().AsDegrees()}) '
+                        f'(size {pad_size} {pad_size}) (net {pad_net.GetNetCode()} {_quote(pad_net.GetNetname())}))\n')
+            f.write('  )\n')
+        f.write(')\n')
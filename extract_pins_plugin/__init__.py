@@ -1,5 +1,10 @@
 # __init__.py inside your_plugin_folder/
 
-from .extract_pins_plugin import ExtractPinsPlugin
+try:
+    from .extract_pins_plugin import ExtractPinsPlugin
 
-ExtractPinsPlugin().register()
\ No newline at end of file
+    ExtractPinsPlugin().register()
+except ImportError:
+    # pcbnew/wx are not available, e.g. when the headless tools (batch_export, kicad_pcb_reader)
+    # run outside KiCad. The GUI plugin is simply not registered.
+    pass
@@ -0,0 +1,337 @@
+# batch_export.py
+"""
+BATCH EXPORT
+
+Headless (no GUI) pinout export over many .kicad_pcb files, meant for release pipelines.
+Each board is loaded in its own worker process, either with pcbnew.LoadBoard or with the
+pure-Python S-expression reader (kicad_pcb_reader.py, no KiCad needed), and runs through the
+same selection, filters, extraction and Markdown/CSV rendering code as the dialog
+(see pin_export.py). Outputs are written next to each board, e.g. 'main.kicad_pcb' gives
+'main_pinout.md' and 'main_pinout.csv'.
+
+Usage (with KiCad's Python, from the folder containing extract_pins_plugin):
+
+    python -m extract_pins_plugin.batch_export boards/ --mode type --type-filter "harness,backplane" --sort
+    python -m extract_pins_plugin.batch_export a.kicad_pcb b.kicad_pcb --mode js --workers 4
+    python -m extract_pins_plugin.batch_export main.kicad_pcb --mode all --sharded # main_pinout/J1.md, ...
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .board_snapshot import BoardSnapshot, CONNECTOR_TYPE_FIELD
+from . import export_sinks
+from . import filter_expression
+from . import instrumentation
+from . import net_crossref
+from . import output_writer
+from . import pin_export
+from . import sharded_export
+from . import sqlite_export
+
+EXPORT_MODES = ("js", "type", "all")
+READERS = ("auto", "pcbnew", "sexpr")
+BOARD_EXTENSION = ".kicad_pcb"
+
+
+def find_boards(paths):
+    """
+    Expands the given files/directories into a sorted list of .kicad_pcb files.
+    Directories are searched recursively.
+    """
+    boards = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _dirs, files in os.walk(path):
+                for name in files:
+                    if name.endswith(BOARD_EXTENSION):
+                        boards.add(os.path.join(root, name))
+        elif os.path.isfile(path):
+            boards.add(path)
+        else:
+            print(f"WARNING: Skipping '{path}', no such file or directory.")
+    return sorted(boards)
+
+
+def resolve_reader(reader):
+    """
+    Turns 'auto' into 'pcbnew' when KiCad's Python module is importable, 'sexpr' otherwise.
+    """
+    if reader != "auto":
+        return reader
+    try:
+        import pcbnew # noqa: F401
+        return "pcbnew"
+    except ImportError:
+        return "sexpr"
+
+
+def load_board_snapshot(board_path, reader="pcbnew"):
+    """
+    Loads a board with pcbnew (or the S-expression reader) and reads it into a BoardSnapshot.
+    Returns (board, snapshot); the board must be kept alive while the snapshot's footprints are used.
+    """
+    if reader == "sexpr":
+        from .kicad_pcb_reader import read_board
+        board = read_board(board_path)
+    else:
+        import pcbnew # Imported here so '--help' and the S-expression path work without KiCad's Python
+        board = pcbnew.LoadBoard(board_path)
+    return board, BoardSnapshot(board.GetFootprints())
+
+
+def select_rows(snapshot, options):
+    """
+    Picks the footprint rows for the requested export mode, like the dialog's export buttons.
+    """
+    mode = options["mode"]
+    if mode == "js":
+        return pin_export.select_rows_by_reference(snapshot, options["reference_filter"])
+    if mode == "type":
+        return pin_export.select_rows_by_field(snapshot, options["type_filter"], options["type_field"])
+    return list(snapshot.all_rows())
+
+
+def export_board(board_path, options):
+    """
+    Exports one board. Runs inside a worker process, so it only takes and returns plain data.
+
+    With options["trace"], a timing/counter trace is written next to the outputs
+    ('<board><suffix>_trace.json', Chrome trace format with options["chrome_trace"]).
+
+    Returns:
+        A dict with the board path, written outputs, component count, per-stage timings
+        in seconds (load, filter, export, total), the uncompressed size of the Markdown/CSV
+        outputs in bytes (with --sharded, of the shards actually rewritten), the sharded export's
+        summary if any and an error message (None on success).
+    """
+    result = {"board": board_path, "outputs": [], "components": 0, "timings": {}, "bytes": 0, "error": None}
+    timings = result["timings"]
+    base_name = os.path.splitext(board_path)[0] + options["suffix"]
+    tracer = instrumentation.start_trace(os.path.basename(board_path)) if options.get("trace") else instrumentation.NULL_TRACER
+    start = time.perf_counter()
+    try:
+        stage_start = time.perf_counter()
+        with tracer.stage("load"):
+            board, snapshot = load_board_snapshot(board_path, options["reader"])
+        timings["load"] = time.perf_counter() - stage_start
+
+        stage_start = time.perf_counter()
+        with tracer.stage("filter"):
+            rows = select_rows(snapshot, options)
+            plan = filter_expression.build_filter(options.get("filter", ""), options["value_filter"], options["net_filter"])
+            rows = filter_expression.select_rows(snapshot, rows, plan, options["type_field"], board=board)
+            rows = pin_export.unique_reference_rows(snapshot, rows)
+            if options["sort"]:
+                rows = pin_export.sort_rows_by_reference(snapshot, rows)
+        result["components"] = len(rows)
+        timings["filter"] = time.perf_counter() - stage_start
+
+        selected_columns = pin_export.with_extra_field_columns(options["columns"], options["extra_fields"])
+        extraction_options = {
+            "ignore_unconnected_pins_for_csv": options["ignore_unconnected"],
+            "ignore_free_pins_for_csv": options["ignore_free"],
+            "type_field": options["type_field"],
+            "extra_fields": options["extra_fields"],
+            "pin_net_filter": options["net_filter"] if options.get("net_filter_pins") else ""
+        }
+
+        # Extraction, rendering and writing are streamed together, one component at a time,
+        # and every chosen text output (md, csv, unique_nets) is fed from the same single pass
+        sink_names = [name for name in export_sinks.SINKS if name in options["formats"]]
+        sink_options = {"apply_highlight": options["highlight"], "ignore_unconnected_pins": options["ignore_unconnected"],
+                        "net_name_filter": options["net_filter"]}
+        if options.get("sharded"):
+            shard_formats = [name for name in sink_names if name in sharded_export.SHARD_FORMATS]
+            sink_names = [name for name in sink_names if name not in shard_formats]
+            if shard_formats:
+                stage_start = time.perf_counter()
+                with tracer.stage("sharded_export"):
+                    shard_stats = sharded_export.write_sharded(snapshot, rows, base_name, shard_formats, selected_columns,
+                                                               options=sink_options, **extraction_options)
+                    result["outputs"].append(os.path.join(base_name, sharded_export.INDEX_NAME))
+                    result["bytes"] += shard_stats.bytes_written
+                    result["shards"] = shard_stats.summary()
+                timings["export"] = time.perf_counter() - stage_start
+        if sink_names:
+            stage_start = time.perf_counter()
+            with tracer.stage("export"):
+                sinks = export_sinks.create_sinks(
+                    sink_names, os.path.dirname(base_name), os.path.basename(base_name), selected_columns,
+                    sink_options, options.get("compression"))
+                result["outputs"].extend(export_sinks.write_fused(snapshot, rows, sinks, **extraction_options))
+                result["bytes"] += sum(sink.stats.bytes_in for sink in sinks)
+            timings["export"] = timings.get("export", 0.0) + time.perf_counter() - stage_start
+        if "xref" in options["formats"]:
+            stage_start = time.perf_counter()
+            with tracer.stage("xref"):
+                xref = net_crossref.build_cross_reference(snapshot, rows, options["ignore_unconnected"])
+                for path, chunks in ((base_name + "_xref.md", net_crossref.iter_crossref_markdown(xref)),
+                                     (base_name + "_xref.csv", net_crossref.iter_crossref_csv(xref)),
+                                     (base_name + "_xref_matrix.csv", net_crossref.iter_matrix_csv(xref))):
+                    path = output_writer.compressed_path(path, options.get("compression"))
+                    pin_export.write_chunks(path, chunks)
+                    result["outputs"].append(path)
+            timings["xref"] = time.perf_counter() - stage_start
+        if "sqlite" in options["formats"]:
+            stage_start = time.perf_counter()
+            with tracer.stage("sqlite"):
+                sqlite_export.write_sqlite(base_name + ".sqlite", snapshot, rows, options["ignore_unconnected"],
+                                           options["ignore_free"], options["type_field"],
+                                           pin_net_filter=extraction_options["pin_net_filter"])
+            result["outputs"].append(base_name + ".sqlite")
+            timings["sqlite"] = time.perf_counter() - stage_start
+        del board
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    timings["total"] = time.perf_counter() - start
+    if tracer.enabled:
+        instrumentation.stop_trace()
+        trace_path = base_name + "_trace.json"
+        try:
+            tracer.write(trace_path, chrome=options.get("chrome_trace", False))
+            result["outputs"].append(trace_path)
+        except OSError as e:
+            print(f"ERROR: Could not write trace '{trace_path}': {e}")
+    return result
+
+
+def print_summary(results, wall_time, workers):
+    """
+    Prints one line per board with its stage timings, then the batch totals.
+    """
+    name_width = max([len(os.path.basename(r["board"])) for r in results] + [5])
+    print(f"{'Board':<{name_width}}  {'Comps':>6}  {'Load':>7}  {'Filter':>7}  {'Export':>7}  {'MB/s':>7}  {'Total':>7}")
+    for r in results:
+        t = r["timings"]
+        name = os.path.basename(r["board"])
+        if r["error"]:
+            print(f"{name:<{name_width}}  FAILED after {t.get('total', 0.0):.2f}s: {r['error']}")
+            continue
+        export_time = t.get('export', 0.0)
+        rate = r["bytes"] / 1e6 / export_time if export_time > 0 else 0.0 # Extraction and writing together
+        print(f"{name:<{name_width}}  {r['components']:>6}  {t['load']:>6.2f}s  {t['filter']:>6.2f}s  "
+              f"{export_time:>6.2f}s  {rate:>7.1f}  {t['total']:>6.2f}s")
+        if r.get("shards"):
+            print(f"{'':<{name_width}}  one file per component: {r['shards']}")
+
+    failed = sum(1 for r in results if r["error"])
+    cpu_time = sum(r["timings"].get("total", 0.0) for r in results)
+    print(f"Processed {len(results)} boards ({failed} failed) in {wall_time:.2f}s wall time "
+          f"with {workers} worker(s); {cpu_time:.2f}s summed per-board time.")
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m extract_pins_plugin.batch_export",
+        description="Export connector pinouts (Markdown/CSV) for many KiCad boards without the GUI.")
+    parser.add_argument("paths", nargs="+", help=f"{BOARD_EXTENSION} files or directories to search recursively")
+    parser.add_argument("--mode", choices=EXPORT_MODES, default="js",
+                        help="js: references matching --reference-filter (default 'J*'), "
+                             "type: footprints whose --type-field matches --type-filter, all: every footprint")
+    parser.add_argument("--reference-filter", default="J*", help="Reference wildcard list for --mode js")
+    parser.add_argument("--type-filter", default="", help="Comma-separated type wildcards for --mode type")
+    parser.add_argument("--type-field", default=CONNECTOR_TYPE_FIELD, help="Field used as connector type")
+    parser.add_argument("--value-filter", default="", help="Value wildcard filter")
+    parser.add_argument("--net-filter", default="", help="Comma-separated net wildcard filter (any pin)")
+    parser.add_argument("--net-filter-pins", action="store_true",
+                        help="Write only the pins on nets matching --net-filter, not every pin of the matching components")
+    parser.add_argument("--filter", default="",
+                        help="Filter expression, e.g. \"ref:J* AND (type:harness OR net:CAN*) AND NOT layer:B.Cu\" "
+                             "or \"edge:5 AND NOT rect:0,0,20,20\" (positions in mm; combine with --mode all to filter the whole board)")
+    parser.add_argument("--extra-fields", default="", help="Comma-separated custom fields to add as columns")
+    parser.add_argument("--columns", default=",".join(pin_export.DEFAULT_COLUMNS),
+                        help="Comma-separated output columns (default: all)")
+    parser.add_argument("--formats", default="md,csv",
+                        help="Comma-separated output formats: md, csv, jsonl (one JSON object per pin), json, unique_nets "
+                             "(written in one pass), xref (net cross-reference + shared-net matrix), "
+                             "sqlite (indexed components/pins/nets database)")
+    parser.add_argument("--compress", choices=output_writer.available_compressions(), default="none",
+                        help="Compress the Markdown/CSV/JSON outputs while writing them ('.gz' / '.zst' is appended)")
+    parser.add_argument("--sharded", action="store_true",
+                        help="Write Markdown/CSV/JSON as one file per component into '<board><suffix>/' with an index.md; "
+                             "re-runs only rewrite the files whose content changed")
+    parser.add_argument("--suffix", default="_pinout", help="Appended to the board name for the output files")
+    parser.add_argument("--sort", action="store_true", help="Sort components by reference")
+    parser.add_argument("--highlight", action="store_true", help="Colour same nets in the Markdown output")
+    parser.add_argument("--ignore-unconnected", action="store_true", help="Skip 'unconnected' pins in the CSV")
+    parser.add_argument("--ignore-free", action="store_true", help="Skip pins without a net in the CSV")
+    parser.add_argument("--reader", choices=READERS, default="auto",
+                        help="Board loader: pcbnew.LoadBoard or the built-in S-expression reader "
+                             "(default: pcbnew if available)")
+    parser.add_argument("--trace", action="store_true",
+                        help="Write a per-board timing/counter trace (<board><suffix>_trace.json)")
+    parser.add_argument("--chrome-trace", action="store_true",
+                        help="Write the trace in Chrome trace format (chrome://tracing, Perfetto); implies --trace")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: number of CPUs, 1 runs in-process)")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+
+    if args.mode == "type" and not args.type_filter.strip():
+        print("ERROR: --mode type needs a --type-filter (e.g. 'harness,backplane').")
+        return 2
+
+    try:
+        filter_expression.parse_filter(args.filter)
+    except filter_expression.FilterSyntaxError as e:
+        print(f"ERROR: Invalid --filter: {e}")
+        return 2
+
+    boards = find_boards(args.paths)
+    if not boards:
+        print("ERROR: No boards found.")
+        return 2
+
+    # Plain dict, so it pickles cheaply into the worker processes
+    options = {
+        "mode": args.mode,
+        "reference_filter": args.reference_filter,
+        "type_filter": args.type_filter,
+        "type_field": args.type_field.strip() or CONNECTOR_TYPE_FIELD,
+        "value_filter": args.value_filter,
+        "net_filter": args.net_filter,
+        "net_filter_pins": args.net_filter_pins,
+        "filter": args.filter,
+        "extra_fields": [f.strip() for f in args.extra_fields.split(',') if f.strip()],
+        "columns": [c.strip() for c in args.columns.split(',') if c.strip()],
+        "formats": {f.strip().lower() for f in args.formats.split(',') if f.strip()},
+        "suffix": args.suffix,
+        "compression": args.compress,
+        "sharded": args.sharded,
+        "sort": args.sort,
+        "highlight": args.highlight,
+        "ignore_unconnected": args.ignore_unconnected,
+        "ignore_free": args.ignore_free,
+        "reader": resolve_reader(args.reader),
+        "trace": args.trace or args.chrome_trace,
+        "chrome_trace": args.chrome_trace,
+    }
+    workers = max(1, min(args.workers, len(boards)))
+
+    start = time.perf_counter()
+    results = []
+    if workers == 1:
+        for board_path in boards:
+            results.append(export_board(board_path, options))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(export_board, board_path, options) for board_path in boards]
+            for future in as_completed(futures):
+                results.append(future.result())
+    wall_time = time.perf_counter() - start
+
+    results.sort(key=lambda r: r["board"])
+    print(f"Board reader: {options['reader']}")
+    print_summary(results, wall_time, workers)
+    return 1 if any(r["error"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
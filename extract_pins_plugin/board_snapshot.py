@@ -0,0 +1,593 @@
+# board_snapshot.py
+"""
+BOARD SNAPSHOT
+
+Reads every footprint, pad, net and field of a board exactly once and keeps the
+result in compact, array-backed columns. All strings (references, values, pad names,
+net names, field names/values...) are interned into a single string table, so the
+columns only hold small integer indexes.
+
+The dialog, the filters and every export path read from the snapshot instead of
+walking fp.Pads() / fp.GetFields() through SWIG over and over. The snapshot is
+only rebuilt when it is explicitly invalidated.
+
+This module does not import pcbnew or wx, it only calls methods on the objects it is given.
+"""
+
+from array import array
+from bisect import bisect_left
+
+from . import instrumentation
+from .spatial_index import SpatialIndex, footprint_bounding_box
+
+CONNECTOR_TYPE_FIELD = "connector-type"
+
+NO_STRING = -1 # Index stored in a string column when the value is missing (e.g. no 'connector-type' field)
+NO_NET = -1 # Net code stored for pads that have no net object at all ("free" pins)
+
+# pcbnew calls made while reading one footprint: m_Uuid + AsString, GetReference, GetValue,
+# GetFPID + GetUniStringLibId, GetLibDescription, GetLayerName, GetPosition,
+# GetOrientation + AsDegrees, GetBoundingBox + 4 edges, GetFields, Pads. Each field adds 2,
+# each pad 2 (+2 with a net).
+SWIG_CALLS_PER_FOOTPRINT = 18
+
+
+def footprint_key(footprint):
+    """
+    Returns a stable key for a footprint. SWIG hands out a new proxy object every time the
+    board is iterated, so proxies cannot be compared directly; the UUID is used instead.
+    Falls back to the reference designator on builds without m_Uuid (or footprints without a UUID).
+    """
+    try:
+        key = footprint.m_Uuid.AsString()
+    except AttributeError:
+        key = ""
+    return key or footprint.GetReference()
+
+
+def footprint_lib_id(footprint):
+    """
+    Returns the 'library:footprint' name of a footprint.
+    """
+    fpid = footprint.GetFPID()
+    try:
+        return fpid.GetUniStringLibId()
+    except AttributeError:
+        return str(fpid)
+
+
+class StringTable:
+    """
+    Interns strings into integer ids. Index 0 is always the empty string.
+    """
+
+    def __init__(self):
+        self.strings = [""]
+        self._ids = {"": 0}
+
+    def intern(self, text):
+        idx = self._ids.get(text)
+        if idx is None:
+            idx = len(self.strings)
+            self._ids[text] = idx
+            self.strings.append(text)
+        return idx
+
+    def lookup(self, text):
+        """
+        Returns the id of an already interned string, or NO_STRING if it was never seen.
+        """
+        return self._ids.get(text, NO_STRING)
+
+    def __getitem__(self, idx):
+        return self.strings[idx]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class NetIndex:
+    """
+    Inverted index from net name (and net code) to the footprint rows and pads on that net.
+    Only pads that have a net object are indexed, matching what the net filters have always considered.
+    """
+
+    def __init__(self, snapshot):
+        self.footprints_by_net_name = {} # net name -> set of footprint rows
+        self.pads_by_net_name = {} # net name -> list of flat pad indexes
+        self.net_name_by_code = {} # net code -> net name
+        self._pad_fp = snapshot.pad_fp
+        self._last_pin_selection = None # (matcher, result) of the last pads_by_footprint() call
+
+        strings = snapshot.strings
+        pad_fp = snapshot.pad_fp
+        pad_net_code = snapshot.pad_net_code
+        pad_net_name = snapshot.pad_net_name
+        for pad_idx in range(len(pad_fp)):
+            net_code = pad_net_code[pad_idx]
+            if net_code == NO_NET:
+                continue
+            net_name = strings[pad_net_name[pad_idx]]
+            rows = self.footprints_by_net_name.get(net_name)
+            if rows is None:
+                rows = self.footprints_by_net_name[net_name] = set()
+                self.pads_by_net_name[net_name] = []
+            rows.add(pad_fp[pad_idx])
+            self.pads_by_net_name[net_name].append(pad_idx)
+            self.net_name_by_code.setdefault(net_code, net_name)
+
+    def net_names(self):
+        return self.footprints_by_net_name.keys()
+
+    def matching_net_names(self, matcher):
+        """
+        Returns the indexed net names accepted by a matcher (any callable taking a net name).
+        """
+        return [name for name in self.footprints_by_net_name if matcher(name)]
+
+    def footprints_on_nets(self, net_names):
+        """
+        Returns the union of footprint rows with at least one pad on any of the given nets.
+        """
+        rows = set()
+        for name in net_names:
+            rows.update(self.footprints_by_net_name.get(name, ()))
+        return rows
+
+    def footprints_matching(self, matcher):
+        """
+        Returns the footprint rows with any pad on a net accepted by the matcher.
+        The cost scales with the number of distinct nets plus the matches, not with the pad count.
+        """
+        return self.footprints_on_nets(self.matching_net_names(matcher))
+
+    def footprints_on_net_code(self, net_code):
+        net_name = self.net_name_by_code.get(net_code)
+        return set(self.footprints_by_net_name[net_name]) if net_name is not None else set()
+
+    def pads_on_net(self, net_name):
+        return self.pads_by_net_name.get(net_name, [])
+
+    def pads_by_footprint(self, matcher):
+        """
+        Returns {footprint row: [flat pad indexes, in pad order]} for the pads on nets accepted by
+        the matcher; footprints without such a pad are missing. Only the matching pads are visited.
+        The last result is kept, so extracting footprint after footprint with the same (cached)
+        matcher resolves the nets once.
+        """
+        if self._last_pin_selection is not None and self._last_pin_selection[0] is matcher:
+            return self._last_pin_selection[1]
+        pad_fp = self._pad_fp
+        selection = {}
+        for name in self.matching_net_names(matcher):
+            for pad_idx in self.pads_by_net_name[name]:
+                pads = selection.get(pad_fp[pad_idx])
+                if pads is None:
+                    selection[pad_fp[pad_idx]] = [pad_idx]
+                else:
+                    pads.append(pad_idx)
+        for pads in selection.values():
+            pads.sort() # Pads of several nets were appended net by net
+        self._last_pin_selection = (matcher, selection)
+        return selection
+
+
+class FieldIndex:
+    """
+    Index over all footprint fields: field name -> value -> footprint rows, plus
+    field name -> row -> value for O(1) lookups when a field is used as an output column.
+    If a footprint has the same field twice, the first one wins (as with GetFields() scans).
+    """
+
+    def __init__(self, snapshot):
+        self.rows_by_value = {} # field name -> {value -> set of footprint rows}
+        self.value_by_row = {} # field name -> {footprint row -> value}
+
+        strings = snapshot.strings
+        field_start = snapshot.fp_field_start
+        for row in range(len(snapshot)):
+            for i in range(field_start[row], field_start[row + 1]):
+                name = strings[snapshot.field_name[i]]
+                by_row = self.value_by_row.setdefault(name, {})
+                if row in by_row:
+                    continue
+                value = strings[snapshot.field_value[i]]
+                by_row[row] = value
+                self.rows_by_value.setdefault(name, {}).setdefault(value, set()).add(row)
+
+    def field_names(self):
+        return sorted(self.value_by_row.keys())
+
+    def value(self, row, field_name):
+        """
+        Returns the text of a field of a footprint row, or None if the footprint has no such field.
+        """
+        by_row = self.value_by_row.get(field_name)
+        return by_row.get(row) if by_row is not None else None
+
+    def values(self, field_name):
+        return self.rows_by_value.get(field_name, {}).keys()
+
+    def rows_with_field(self, field_name):
+        return set(self.value_by_row.get(field_name, ()))
+
+    def rows_matching(self, field_name, matcher):
+        """
+        Returns the footprint rows whose (stripped) field value is accepted by the matcher.
+        Each distinct value is tested once, however many footprints carry it.
+        """
+        rows = set()
+        for value, value_rows in self.rows_by_value.get(field_name, {}).items():
+            if matcher(value.strip()):
+                rows.update(value_rows)
+        return rows
+
+
+class ColumnIndex:
+    """
+    Sorted, case-insensitive index over one string column of the footprints (reference, value...):
+    lowercased text -> footprint rows. Literal and prefix wildcards are answered with a bisect
+    per pattern; other patterns test each distinct text once.
+    """
+
+    def __init__(self, snapshot, column):
+        strings = snapshot.strings
+        rows_by_id = {}
+        for row, string_idx in enumerate(column):
+            rows = rows_by_id.get(string_idx)
+            if rows is None:
+                rows = rows_by_id[string_idx] = []
+            rows.append(row)
+        groups = {}
+        for string_idx, rows in rows_by_id.items():
+            groups.setdefault(strings[string_idx].lower(), []).extend(rows)
+        self.keys = sorted(groups)
+        self.rows = [groups[key] for key in self.keys]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _prefix_range(self, prefix):
+        start = bisect_left(self.keys, prefix)
+        end = start
+        while end < len(self.keys) and self.keys[end].startswith(prefix):
+            end += 1
+        return start, end
+
+    def _literal_range(self, literal):
+        start = bisect_left(self.keys, literal)
+        found = start < len(self.keys) and self.keys[start] == literal
+        return start, (start + 1 if found else start)
+
+    def _ranges(self, matcher):
+        return ([self._literal_range(literal) for literal in matcher.literals]
+                + [self._prefix_range(prefix) for prefix in matcher.prefixes])
+
+    def count_matching(self, matcher):
+        """
+        Returns the number of rows accepted by a WildcardMatcher, or None if it has patterns
+        that are neither literals nor prefixes (counting those costs as much as matching).
+        """
+        if matcher.regex is not None:
+            return None
+        return sum(len(self.rows[i]) for start, end in self._ranges(matcher) for i in range(start, end))
+
+    def rows_matching(self, matcher):
+        """
+        Returns the footprint rows whose text is accepted by a WildcardMatcher.
+        """
+        rows = set()
+        for start, end in self._ranges(matcher):
+            for i in range(start, end):
+                rows.update(self.rows[i])
+        if matcher.regex is not None:
+            for key, key_rows in zip(self.keys, self.rows):
+                if matcher(key):
+                    rows.update(key_rows)
+        return rows
+
+
+class BoardSnapshot:
+    """
+    Columnar, read-once copy of the data the plugin needs from a board.
+
+    Footprints are addressed by row (0..len-1), pads by a flat pad index. The pads and
+    fields of footprint 'row' live in the half-open ranges
+    fp_pad_start[row]:fp_pad_start[row + 1] and fp_field_start[row]:fp_field_start[row + 1].
+    """
+
+    def __init__(self, footprints):
+        """
+        Builds the snapshot with a single pass over the given footprints.
+
+        Args:
+            footprints: An iterable of pcbnew.FOOTPRINT objects (normally board.GetFootprints()).
+        """
+        self.strings = StringTable()
+        intern = self.strings.intern
+
+        self.footprints = [] # Original footprint objects, row-aligned (needed for highlighting, UUIDs...)
+        self.keys = [] # footprint_key() of every row
+        self._row_by_key = {}
+
+        # --- Footprint columns (one entry per footprint row) ---
+        self.fp_ref = array('i')
+        self.fp_value = array('i')
+        self.fp_fpid = array('i')
+        self.fp_description = array('i')
+        self.fp_layer = array('i')
+        self.fp_pos_x = array('q') # Nanometres
+        self.fp_pos_y = array('q')
+        self.fp_rotation = array('d') # Degrees
+        self.fp_box_left = array('q') # Bounding box without texts, nanometres
+        self.fp_box_top = array('q')
+        self.fp_box_right = array('q')
+        self.fp_box_bottom = array('q')
+        self.fp_connector_type = array('i') # NO_STRING if the footprint has no 'connector-type' field
+        self.fp_pad_start = array('i', [0])
+        self.fp_field_start = array('i', [0])
+
+        # --- Pad columns (one entry per pad) ---
+        self.pad_fp = array('i')
+        self.pad_name = array('i')
+        self.pad_net_code = array('i') # NO_NET if the pad has no net object
+        self.pad_net_name = array('i')
+
+        # --- Field columns (one entry per footprint field) ---
+        self.field_name = array('i')
+        self.field_value = array('i')
+
+        self._net_index = None # Built on first use, see net_index()
+        self._field_index = None # Built on first use, see field_index()
+        self._column_indexes = {} # Built on first use, see column_index()
+        self._spatial_index = None # Built on first use, see spatial_index()
+
+        for fp in footprints:
+            row = len(self.footprints)
+            self.footprints.append(fp)
+            key = footprint_key(fp)
+            self.keys.append(key)
+            self._row_by_key[key] = row
+
+            self.fp_ref.append(intern(fp.GetReference()))
+            self.fp_value.append(intern(fp.GetValue()))
+            self.fp_fpid.append(intern(footprint_lib_id(fp)))
+            self.fp_description.append(intern(fp.GetLibDescription() or ""))
+            self.fp_layer.append(intern(fp.GetLayerName()))
+            pos = fp.GetPosition()
+            self.fp_pos_x.append(int(pos.x))
+            self.fp_pos_y.append(int(pos.y))
+            self.fp_rotation.append(float(fp.GetOrientation().AsDegrees()))
+            left, top, right, bottom = footprint_bounding_box(fp)
+            self.fp_box_left.append(left)
+            self.fp_box_top.append(top)
+            self.fp_box_right.append(right)
+            self.fp_box_bottom.append(bottom)
+
+            connector_type_idx = NO_STRING
+            for field in fp.GetFields():
+                name_idx = intern(field.GetName())
+                value_idx = intern(field.GetText())
+                self.field_name.append(name_idx)
+                self.field_value.append(value_idx)
+                if connector_type_idx == NO_STRING and self.strings[name_idx] == CONNECTOR_TYPE_FIELD:
+                    connector_type_idx = value_idx
+            self.fp_connector_type.append(connector_type_idx)
+            self.fp_field_start.append(len(self.field_name))
+
+            for pad in fp.Pads():
+                self.pad_fp.append(row)
+                self.pad_name.append(intern(pad.GetPadName()))
+                net = pad.GetNet()
+                if net:
+                    self.pad_net_code.append(net.GetNetCode())
+                    self.pad_net_name.append(intern(net.GetNetname()))
+                else:
+                    self.pad_net_code.append(NO_NET)
+                    self.pad_net_name.append(0)
+            self.fp_pad_start.append(len(self.pad_fp))
+
+        tracer = instrumentation.active_tracer()
+        if tracer.enabled:
+            pads_with_net = len(self.pad_net_code) - self.pad_net_code.tolist().count(NO_NET)
+            tracer.count(instrumentation.SWIG_CALLS, SWIG_CALLS_PER_FOOTPRINT * len(self.footprints)
+                         + 2 * len(self.field_name) + 2 * len(self.pad_fp) + 2 * pads_with_net)
+            tracer.count(instrumentation.PADS_SCANNED, len(self.pad_fp))
+
+        print(f"DEBUG: BoardSnapshot built. {len(self.footprints)} footprints, {len(self.pad_fp)} pads, "
+              f"{len(self.strings)} interned strings.")
+
+    def __len__(self):
+        return len(self.footprints)
+
+    # --- Footprint <-> row mapping ---
+
+    def row_of(self, footprint):
+        """
+        Returns the row of a footprint object, or None if it is not part of the snapshot
+        (e.g. it was added to the board after the snapshot was taken).
+        """
+        return self._row_by_key.get(footprint_key(footprint))
+
+    def rows_for(self, footprints):
+        """
+        Maps a list of footprint objects to snapshot rows, preserving order and
+        silently skipping footprints that are not in the snapshot.
+        """
+        rows = []
+        for fp in footprints:
+            row = self.row_of(fp)
+            if row is not None:
+                rows.append(row)
+        instrumentation.active_tracer().count(instrumentation.SWIG_CALLS, 2 * len(footprints)) # m_Uuid + AsString
+        return rows
+
+    def all_rows(self):
+        return range(len(self.footprints))
+
+    def footprint(self, row):
+        return self.footprints[row]
+
+    def key(self, row):
+        """
+        Returns the stable key (UUID) of a footprint row, see footprint_key().
+        """
+        return self.keys[row]
+
+    def fields(self, row):
+        """
+        Returns the (name, text) pairs of all fields of a footprint, in board order.
+        """
+        strings = self.strings
+        return [(strings[self.field_name[i]], strings[self.field_value[i]])
+                for i in range(self.fp_field_start[row], self.fp_field_start[row + 1])]
+
+    # --- Footprint columns ---
+
+    def reference(self, row):
+        return self.strings[self.fp_ref[row]]
+
+    def value(self, row):
+        return self.strings[self.fp_value[row]]
+
+    def connector_type(self, row):
+        """
+        Returns the raw 'connector-type' text of a footprint, or None if it has no such field.
+        """
+        idx = self.fp_connector_type[row]
+        return None if idx == NO_STRING else self.strings[idx]
+
+    def field(self, row, field_name):
+        """
+        Returns the text of the named field of a footprint, or None if the field does not exist.
+        """
+        return self.field_index().value(row, field_name)
+
+    def general_properties(self, row, type_field=CONNECTOR_TYPE_FIELD, extra_fields=()):
+        """
+        Returns the formatted general properties of a footprint, in the same layout
+        extract_data has always produced.
+
+        Args:
+            row: The footprint row.
+            type_field: Field shown as "Connector Type" (normally 'connector-type').
+            extra_fields: Names of additional custom fields to include as columns.
+        """
+        description = self.strings[self.fp_description[row]]
+        if type_field == CONNECTOR_TYPE_FIELD:
+            connector_type_val = self.connector_type(row)
+        else:
+            connector_type_val = self.field(row, type_field)
+        properties = {
+            "Reference": self.reference(row),
+            "Value": self.value(row),
+            "Footprint Name": self.strings[self.fp_fpid[row]],
+            "Description": description if description and description != "No description" else "N/A",
+            "Layer": self.strings[self.fp_layer[row]],
+            "Position": f"({self.fp_pos_x[row] / 1000000.0:.2f}mm, {self.fp_pos_y[row] / 1000000.0:.2f}mm)",
+            "Rotation": f"{self.fp_rotation[row]:.1f}°",
+            "Connector Type": connector_type_val if connector_type_val is not None else ""
+        }
+        for field_name in extra_fields:
+            if field_name not in properties:
+                field_val = self.field(row, field_name)
+                properties[field_name] = field_val if field_val is not None else ""
+        return properties
+
+    # --- Pad columns ---
+
+    def pads(self, row):
+        """
+        Returns the range of flat pad indexes belonging to a footprint.
+        """
+        return range(self.fp_pad_start[row], self.fp_pad_start[row + 1])
+
+    def pad_count(self, row):
+        return self.fp_pad_start[row + 1] - self.fp_pad_start[row]
+
+    def pad_name_of(self, pad_idx):
+        return self.strings[self.pad_name[pad_idx]]
+
+    def has_net(self, pad_idx):
+        return self.pad_net_code[pad_idx] != NO_NET
+
+    def net_name_of(self, pad_idx):
+        return self.strings[self.pad_net_name[pad_idx]]
+
+    def net_index(self):
+        """
+        Returns the NetIndex of this snapshot, building it on first use.
+        """
+        if self._net_index is None:
+            self._net_index = NetIndex(self)
+            print(f"DEBUG: NetIndex built. {len(self._net_index.footprints_by_net_name)} distinct nets.")
+        return self._net_index
+
+    def field_index(self):
+        """
+        Returns the FieldIndex of this snapshot, building it on first use.
+        """
+        if self._field_index is None:
+            self._field_index = FieldIndex(self)
+            print(f"DEBUG: FieldIndex built. {len(self._field_index.value_by_row)} distinct field names.")
+        return self._field_index
+
+    def column_index(self, name):
+        """
+        Returns the ColumnIndex of a footprint string column ('reference', 'value', 'layer' or
+        'footprint'), building it on first use.
+        """
+        index = self._column_indexes.get(name)
+        if index is None:
+            index = self._column_indexes[name] = ColumnIndex(self, self.string_column(name))
+            print(f"DEBUG: ColumnIndex '{name}' built. {len(index)} distinct values.")
+        return index
+
+    def string_column(self, name):
+        """
+        Returns the column of string ids named 'reference', 'value', 'layer' or 'footprint'.
+        """
+        return {"reference": self.fp_ref, "value": self.fp_value, "layer": self.fp_layer, "footprint": self.fp_fpid}[name]
+
+    def spatial_index(self):
+        """
+        Returns the SpatialIndex (grid over the footprint bounding boxes), building it on first use.
+        """
+        if self._spatial_index is None:
+            self._spatial_index = SpatialIndex(self)
+            print(f"DEBUG: SpatialIndex built. {len(self._spatial_index)} grid cells of "
+                  f"{self._spatial_index.cell_size / 1000000.0:.2f}mm.")
+        return self._spatial_index
+
+    def has_index(self, name):
+        """
+        True if the index 'name' ('net', 'field', 'spatial' or a column_index() name) has already
+        been built, so using it costs no more than a lookup.
+        """
+        if name == "net":
+            return self._net_index is not None
+        if name == "field":
+            return self._field_index is not None
+        if name == "spatial":
+            return self._spatial_index is not None
+        return name in self._column_indexes
+
+    # --- Board-wide catalogues (used for the filter auto-suggest lists) ---
+
+    def all_values(self):
+        return sorted(set(self.strings[i] for i in self.fp_value) - {""})
+
+    def all_net_names(self):
+        return sorted(self.net_index().net_names())
+
+    def all_connector_types(self):
+        return self.all_field_values(CONNECTOR_TYPE_FIELD)
+
+    def all_field_values(self, field_name):
+        """
+        Returns the sorted, stripped, non-empty values of a field over the whole board.
+        """
+        return sorted(set(v.strip() for v in self.field_index().values(field_name) if v))
+
+    def all_field_names(self):
+        return self.field_index().field_names()
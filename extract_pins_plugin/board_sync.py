@@ -0,0 +1,158 @@
+# board_sync.py
+"""
+BOARD SYNC
+
+Keeps the dialog in step with the PCB editor without scanning every footprint:
+
+  - BoardChangeSet collects the footprints a board listener reported as added, removed or
+    changed, coalescing repeated events for the same footprint until the dialog applies them.
+  - create_board_listener() subclasses pcbnew.BOARD_LISTENER (KiCad 7+) and feeds a change set.
+    Events for pads are reported as a change of their footprint; other items are ignored.
+  - current_selection() asks pcbnew for the editor's selection (pcbnew.GetCurrentSelection, where
+    the KiCad build provides it), which costs the size of the selection instead of a walk over
+    board.GetFootprints() with IsSelected() on every footprint.
+
+pcbnew is imported inside the functions, so this module loads (and BoardChangeSet works)
+without KiCad. This module does not import wx.
+"""
+
+from .board_snapshot import footprint_key
+
+
+class BoardChangeSet:
+    """
+    Footprints changed on the board since the last take(), keyed by footprint_key.
+    An add followed by a remove cancels out, a remove followed by an add (undo) is a change.
+    """
+
+    def __init__(self):
+        self.added = {}
+        self.removed = {}
+        self.changed = {}
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def add(self, footprint):
+        key = footprint_key(footprint)
+        if self.removed.pop(key, None) is not None:
+            self.changed[key] = footprint
+        else:
+            self.added[key] = footprint
+
+    def remove(self, footprint):
+        key = footprint_key(footprint)
+        self.changed.pop(key, None)
+        if self.added.pop(key, None) is None:
+            self.removed[key] = footprint
+
+    def change(self, footprint):
+        key = footprint_key(footprint)
+        if key in self.added:
+            self.added[key] = footprint
+        elif key not in self.removed:
+            self.changed[key] = footprint
+
+    def take(self):
+        """
+        Returns (added, removed keys, changed) and empties the change set.
+        """
+        added, removed, changed = list(self.added.values()), list(self.removed), list(self.changed.values())
+        self.added, self.removed, self.changed = {}, {}, {}
+        return added, removed, changed
+
+
+def _as_footprint(item, follow_pads=True):
+    """
+    Returns the FOOTPRINT an event or selection item stands for (its parent footprint for pads
+    if 'follow_pads'), or None for anything else (tracks, zones, drawings...).
+    """
+    try:
+        item_class = item.GetClass()
+        if item_class == "FOOTPRINT":
+            return item.Cast()
+        if follow_pads and item_class == "PAD":
+            return item.GetParentFootprint()
+    except AttributeError:
+        pass
+    return None
+
+
+def create_board_listener(change_set, on_change):
+    """
+    Creates a pcbnew.BOARD_LISTENER that records footprint events into 'change_set' and calls
+    on_change() after each event that touched a footprint. Register it with board.AddListener()
+    and unregister it with board.RemoveListener() before it goes away.
+
+    Returns:
+        The listener, or None if this KiCad build has no BOARD_LISTENER.
+    """
+    try:
+        import pcbnew
+    except ImportError:
+        return None
+    base = getattr(pcbnew, "BOARD_LISTENER", None)
+    if base is None:
+        return None
+
+    class FootprintListener(base):
+        def _record(self, record, items):
+            touched = False
+            for item in items:
+                footprint = _as_footprint(item)
+                if footprint is not None:
+                    record(footprint)
+                    touched = True
+            if touched:
+                on_change()
+
+        def OnBoardItemAdded(self, board, item):
+            self._record(change_set.add, (item,))
+
+        def OnBoardItemsAdded(self, board, items):
+            self._record(change_set.add, items)
+
+        def OnBoardItemRemoved(self, board, item):
+            self._record(change_set.remove, (item,))
+
+        def OnBoardItemsRemoved(self, board, items):
+            self._record(change_set.remove, items)
+
+        def OnBoardItemChanged(self, board, item):
+            self._record(change_set.change, (item,))
+
+        def OnBoardItemsChanged(self, board, items):
+            self._record(change_set.change, items)
+
+    return FootprintListener()
+
+
+def current_selection():
+    """
+    Returns the footprints selected in the PCB editor, read from pcbnew.GetCurrentSelection(),
+    or None if this KiCad build does not provide it.
+    """
+    try:
+        import pcbnew
+    except ImportError:
+        return None
+    get_selection = getattr(pcbnew, "GetCurrentSelection", None)
+    if get_selection is None:
+        return None
+    footprints = []
+    for item in get_selection():
+        footprint = _as_footprint(item, follow_pads=False)
+        if footprint is not None:
+            footprints.append(footprint)
+    return footprints
+
+
+def selected_footprints(board):
+    """
+    Returns the selected footprints, from the editor's selection where available and by
+    checking IsSelected() on every footprint of the board otherwise.
+    """
+    footprints = current_selection()
+    if footprints is None:
+        footprints = [f for f in board.GetFootprints() if f.IsSelected()]
+    return footprints
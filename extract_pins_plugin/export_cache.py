@@ -0,0 +1,198 @@
+# export_cache.py
+"""
+EXPORT CACHE
+
+Keeps the extracted record and the rendered Markdown/CSV fragments of every exported footprint
+between exports, so exporting again after tweaking one connector only re-extracts and re-renders
+the footprints that actually changed.
+
+Entries are keyed by the footprint UUID and validated with a fingerprint of everything that
+ends up in the output: reference, value, footprint name, description, layer, position,
+orientation, all field values and the pad -> net list. The cache survives a board rescan
+(BoardSnapshot rows and string ids change, UUIDs and fingerprints do not).
+
+Highlighted Markdown is never taken from the cache: net colours are handed out in order
+of first appearance over the whole document, so a section depends on the ones before it.
+The records are still reused in that case.
+"""
+
+from . import instrumentation
+from . import pin_export
+from .board_snapshot import CONNECTOR_TYPE_FIELD
+
+
+def footprint_fingerprint(snapshot, row):
+    """
+    Returns a hashable fingerprint of one footprint row. Two rows with the same fingerprint
+    produce the same extracted record, whatever snapshot they come from.
+    """
+    strings = snapshot.strings
+    pads = snapshot.pads(row)
+    return (
+        strings[snapshot.fp_ref[row]],
+        strings[snapshot.fp_value[row]],
+        strings[snapshot.fp_fpid[row]],
+        strings[snapshot.fp_description[row]],
+        strings[snapshot.fp_layer[row]],
+        snapshot.fp_pos_x[row],
+        snapshot.fp_pos_y[row],
+        snapshot.fp_rotation[row],
+        tuple(snapshot.fields(row)),
+        tuple(strings[i] for i in snapshot.pad_name[pads.start:pads.stop]),
+        tuple(snapshot.pad_net_code[pads.start:pads.stop]), # Tells free pins (NO_NET) from net ""
+        tuple(strings[i] for i in snapshot.pad_net_name[pads.start:pads.stop]),
+    )
+
+
+class _CacheEntry:
+    __slots__ = ("fingerprint", "options", "record", "fragments")
+
+    def __init__(self, fingerprint, options, record):
+        self.fingerprint = fingerprint
+        self.options = options
+        self.record = record
+        self.fragments = {} # (format, render options) -> rendered text
+
+
+class ExportCache:
+    """
+    Per-footprint cache of extracted records and rendered output fragments.
+    Use reset_stats() before an export and summary() after it to see how much was reused.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0 # Footprints whose record was reused
+        self.misses = 0 # Footprints that were (re-)extracted
+        self.fragment_hits = 0 # Markdown/CSV sections reused
+        self.fragment_misses = 0 # Markdown/CSV sections rendered
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+    def prune(self, snapshot):
+        """
+        Drops the entries of footprints that are no longer on the board (call after a rescan).
+        """
+        live_keys = set(snapshot.keys)
+        for key in [key for key in self._entries if key not in live_keys]:
+            del self._entries[key]
+
+    def summary(self):
+        return (f"{self.hits} footprints reused, {self.misses} re-extracted; "
+                f"{self.fragment_hits} sections reused, {self.fragment_misses} rendered")
+
+    def iter_entries(self, snapshot, rows_to_process, ignore_unconnected_pins_for_csv, ignore_free_pins_for_csv,
+                     type_field, extra_fields, progress_callback, pin_net_filter=""):
+        """
+        Yields (reference, entry) for the rows, re-extracting only footprints whose fingerprint
+        (or the extraction options) changed since they were last cached. 'entry.record' is the
+        extracted ComponentRecord; pass the entry to fragment() to reuse rendered sections.
+        """
+        options = (ignore_unconnected_pins_for_csv, ignore_free_pins_for_csv, type_field, tuple(extra_fields),
+                   pin_net_filter)
+        tracer = instrumentation.active_tracer()
+        total_footprints = len(rows_to_process)
+        for i, row in enumerate(rows_to_process):
+            if progress_callback is not None:
+                progress_callback(i, total_footprints)
+            key = snapshot.key(row)
+            fingerprint = footprint_fingerprint(snapshot, row)
+            entry = self._entries.get(key)
+            if entry is not None and entry.fingerprint == fingerprint and entry.options == options:
+                self.hits += 1
+                tracer.count("cache_hits")
+            else:
+                self.misses += 1
+                tracer.count("cache_misses")
+                # The pin selection of pin_net_filter is resolved once per snapshot (see NetIndex.pads_by_footprint)
+                _ref, record = next(pin_export.iter_extracted(snapshot, [row], ignore_unconnected_pins_for_csv,
+                                                              ignore_free_pins_for_csv, type_field, extra_fields,
+                                                              pin_net_filter=pin_net_filter))
+                entry = _CacheEntry(fingerprint, options, record)
+                self._entries[key] = entry
+            yield snapshot.reference(row), entry
+
+    def fragment(self, entry, fragment_key, render):
+        """
+        Returns the section cached under 'fragment_key' for an entry, calling render() to
+        produce (and cache) it on a miss.
+        """
+        fragment = entry.fragments.get(fragment_key)
+        if fragment is None:
+            self.fragment_misses += 1
+            fragment = render()
+            entry.fragments[fragment_key] = fragment
+        else:
+            self.fragment_hits += 1
+        return fragment
+
+    def iter_extracted(self, snapshot, rows_to_process, ignore_unconnected_pins_for_csv=False,
+                       ignore_free_pins_for_csv=False, type_field=CONNECTOR_TYPE_FIELD, extra_fields=(),
+                       progress_callback=None, pin_net_filter=""):
+        """
+        Cached drop-in for pin_export.iter_extracted. The yielded records are shared with
+        the cache and must not be modified.
+        """
+        for ref, entry in self.iter_entries(snapshot, rows_to_process, ignore_unconnected_pins_for_csv,
+                                            ignore_free_pins_for_csv, type_field, extra_fields, progress_callback,
+                                            pin_net_filter):
+            yield ref, entry.record
+
+    def iter_markdown(self, snapshot, rows_to_process, apply_highlight=False, selected_columns=None,
+                      progress_callback=None, **extraction_options):
+        """
+        Cached equivalent of pin_export.iter_markdown(pin_export.iter_extracted(...)).
+        'extraction_options' are the keyword arguments of iter_extracted.
+        """
+        if apply_highlight:
+            yield from pin_export.iter_markdown(
+                self.iter_extracted(snapshot, rows_to_process, progress_callback=progress_callback,
+                                    **extraction_options),
+                True, selected_columns)
+            return
+
+        if selected_columns is None:
+            selected_columns = pin_export.DEFAULT_COLUMNS
+        fragment_key = ("md", tuple(selected_columns))
+
+        yield pin_export.MARKDOWN_TITLE
+        for ref, entry in self.iter_entries(snapshot, rows_to_process, progress_callback=progress_callback,
+                                            **self._extraction_defaults(extraction_options)):
+            yield self.fragment(entry, fragment_key, lambda: pin_export.render_markdown_component(
+                ref, entry.record, selected_columns))
+
+    def iter_csv(self, snapshot, rows_to_process, selected_columns=None, progress_callback=None,
+                 **extraction_options):
+        """
+        Cached equivalent of pin_export.iter_csv(pin_export.iter_extracted(...)).
+        """
+        if selected_columns is None:
+            selected_columns = pin_export.DEFAULT_COLUMNS
+        fragment_key = ("csv", tuple(selected_columns))
+        format_row = pin_export.csv_row_formatter()
+
+        for ref, entry in self.iter_entries(snapshot, rows_to_process, progress_callback=progress_callback,
+                                            **self._extraction_defaults(extraction_options)):
+            chunk = self.fragment(entry, fragment_key, lambda: pin_export.render_csv_component(
+                ref, entry.record, selected_columns, format_row))
+            if chunk:
+                yield chunk
+
+    @staticmethod
+    def _extraction_defaults(extraction_options):
+        options = {
+            "ignore_unconnected_pins_for_csv": False,
+            "ignore_free_pins_for_csv": False,
+            "type_field": CONNECTOR_TYPE_FIELD,
+            "extra_fields": (),
+            "pin_net_filter": ""
+        }
+        options.update(extraction_options)
+        return options
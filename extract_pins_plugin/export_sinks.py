@@ -0,0 +1,388 @@
+# export_sinks.py
+"""
+EXPORT SINKS
+
+Streaming output writers. The filtered footprints are extracted once, and every record is
+handed to all chosen output sinks (Markdown, CSV, JSON Lines, ...) in the same pass, instead
+of one extraction walk per output file and instead of materializing the whole export before
+rendering it. All outputs go into one directory as '<base name><suffix>'.
+
+A sink receives the export incrementally through hooks, each returning the text to append to
+its file ("" for none):
+
+    begin()                         once, before the first component
+    component(ref, record)          start of a component (a pin_export.ComponentRecord)
+    pin(ref, record, index)         one pin, for every index of pin_indexes(record)
+    end_component(ref, record)      end of the component
+    end()                           once, after the last component
+
+write_fused() owns the files, the traversal and the export cache. Sinks register themselves
+in SINKS, and the dialog builds its output checkboxes from that registry. To add an output,
+subclass ExportSink and decorate it with @register_sink:
+
+    @register_sink
+    class MySink(ExportSink):
+        name = "mine"
+        label = "My Format"
+        suffix = "_mine.txt"
+
+        def component(self, ref, record):
+            return f"{ref}: {record.pin_count()} pins\\n"
+
+        def pin(self, ref, record, index):
+            return f"  {record.pad_names[index]} {record.net_names[index]}\\n"
+
+This module does not import wx or pcbnew.
+"""
+
+import json
+import os
+import time
+
+from . import instrumentation
+from . import output_writer
+from . import pin_export
+from .board_snapshot import CONNECTOR_TYPE_FIELD
+from .wildcard_matcher import compile_wildcards
+
+SINKS = {} # name -> ExportSink subclass, in registration order
+
+
+def register_sink(sink_class):
+    SINKS[sink_class.name] = sink_class
+    return sink_class
+
+
+class ExportSink:
+    """
+    Base class of the fused export outputs (see the module docstring for the hooks).
+
+    Attributes:
+        name: Registry key (e.g. 'md').
+        label: Name shown to the user.
+        suffix: Appended to the base name to form the file name.
+        default: Whether the output is chosen by default.
+        fragment_key: Key under which render() results may be kept in the export cache
+                      (None if a component's text depends on the components before it).
+    """
+    name = ""
+    label = ""
+    suffix = ""
+    default = False
+
+    def __init__(self, path, selected_columns=None, options=None):
+        """
+        Args:
+            options: Output options shared by all sinks: 'apply_highlight' (Markdown),
+                     'ignore_unconnected_pins' and 'net_name_filter' (unique nets).
+        """
+        self.path = path
+        self.selected_columns = selected_columns if selected_columns is not None else pin_export.DEFAULT_COLUMNS
+        self.options = options or {}
+        self.fragment_key = None
+        self.stats = None # output_writer.WriteStats once written
+
+    def begin(self):
+        return ""
+
+    def component(self, ref, record):
+        return ""
+
+    def pin_indexes(self, record):
+        """
+        Returns the indexes of the pins passed to pin() (default: none).
+        """
+        return ()
+
+    def pin(self, ref, record, index):
+        return ""
+
+    def end_component(self, ref, record):
+        return ""
+
+    def end(self):
+        return ""
+
+    def render(self, ref, record):
+        """
+        Returns the text of one component: component(), pin() for each of pin_indexes() and
+        end_component() joined. Sinks may override it with a faster equivalent.
+        """
+        pin = self.pin
+        parts = [self.component(ref, record)]
+        parts.extend([pin(ref, record, index) for index in self.pin_indexes(record)])
+        parts.append(self.end_component(ref, record))
+        return "".join(parts)
+
+
+@register_sink
+class MarkdownSink(ExportSink):
+    """
+    One section per component, every pin listed (see pin_export.render_markdown_head).
+    """
+    name = "md"
+    label = "Markdown"
+    suffix = ".md"
+    default = True
+
+    def __init__(self, path, selected_columns=None, options=None):
+        super(MarkdownSink, self).__init__(path, selected_columns, options)
+        self.net_color = None
+        if self.options.get("apply_highlight"):
+            self.net_color = pin_export.markdown_net_colorizer()
+        else:
+            self.fragment_key = ("md", tuple(self.selected_columns)) # Same sections as ExportCache.iter_markdown
+        self.pin_columns = []
+
+    def begin(self):
+        return pin_export.MARKDOWN_TITLE
+
+    def component(self, ref, record):
+        head, self.pin_columns = pin_export.render_markdown_head(ref, record, self.selected_columns)
+        return head
+
+    def pin_indexes(self, record):
+        return range(record.pin_count()) if self.pin_columns else ()
+
+    def pin(self, ref, record, index):
+        return pin_export.render_markdown_pin_row(record, index, self.pin_columns, self.net_color)
+
+    def end_component(self, ref, record):
+        return pin_export.MARKDOWN_PIN_TABLE_END if self.pin_columns else ""
+
+    def render(self, ref, record):
+        return pin_export.render_markdown_component(ref, record, self.selected_columns, self.net_color)
+
+
+@register_sink
+class CsvSink(ExportSink):
+    """
+    Key/value rows per component, then one row per (CSV-filtered) pin (see pin_export.render_csv_head).
+    """
+    name = "csv"
+    label = "CSV"
+    suffix = ".csv"
+    default = True
+
+    def __init__(self, path, selected_columns=None, options=None):
+        super(CsvSink, self).__init__(path, selected_columns, options)
+        self.format_row = pin_export.csv_row_formatter()
+        self.fragment_key = ("csv", tuple(self.selected_columns)) # Same sections as ExportCache.iter_csv
+        self.csv_pins = ()
+
+    def component(self, ref, record):
+        head, self.csv_pins = pin_export.render_csv_head(ref, record, self.selected_columns, self.format_row)
+        return head
+
+    def pin_indexes(self, record):
+        return self.csv_pins
+
+    def pin(self, ref, record, index):
+        return pin_export.render_csv_pin_row(record, index, self.format_row)
+
+    def render(self, ref, record):
+        return pin_export.render_csv_component(ref, record, self.selected_columns, self.format_row)
+
+
+class _JsonSink(ExportSink):
+    """
+    Shared part of the JSON outputs: the selected general properties with JSON keys and raw
+    values (see pin_export.json_properties), and pin objects with 'pad_name' / 'net_name'
+    (null for pins without a net) as selected. Like the CSV and SQLite outputs, the pins are
+    the CSV-filtered ones.
+    """
+
+    def __init__(self, path, selected_columns=None, options=None):
+        super(_JsonSink, self).__init__(path, selected_columns, options)
+        self.encode = json.JSONEncoder(ensure_ascii=False).encode
+        self.pin_keys = [(key, column) for key, column in (("pad_name", "Pad Name/Number"), ("net_name", "Net Name"))
+                         if column in self.selected_columns]
+
+    def pin_indexes(self, record):
+        return record.csv_pin_indexes() if self.pin_keys else ()
+
+    def properties(self, record):
+        return self.encode(pin_export.json_properties(record, self.selected_columns))
+
+    def pin_members(self, record, index):
+        encode = self.encode
+        members = []
+        for key, column in self.pin_keys:
+            if column == "Pad Name/Number":
+                members.append(f'"{key}": {encode(record.pad_names[index])}')
+            else:
+                net_name = record.net_names[index]
+                members.append(f'"{key}": {encode(net_name) if net_name else "null"}')
+        return ", ".join(members)
+
+
+@register_sink
+class JsonLinesSink(_JsonSink):
+    """
+    One JSON object per line and pin: the component's properties plus the pin, for streaming
+    ingestion (e.g. {"reference": "J1", "value": "CONN_2", "pad_name": "1", "net_name": "GND"}).
+    A component without pin lines (no pin columns selected, or no pins left after the CSV pin
+    filters) gets one line with only its properties, so every exported component appears.
+    """
+    name = "jsonl"
+    label = "JSON Lines"
+    suffix = ".jsonl"
+
+    def __init__(self, path, selected_columns=None, options=None):
+        super(JsonLinesSink, self).__init__(path, selected_columns, options)
+        self.fragment_key = ("jsonl", tuple(self.selected_columns))
+        self.properties_text = "{}"
+        self.line_start = "{"
+
+    def component(self, ref, record):
+        # The properties are encoded once and start every pin line of the component
+        self.properties_text = self.properties(record)
+        self.line_start = self.properties_text[:-1] + ", "
+        return ""
+
+    def pin(self, ref, record, index):
+        return self.line_start + self.pin_members(record, index) + "}\n"
+
+    def end_component(self, ref, record):
+        if self.pin_indexes(record):
+            return ""
+        return self.properties_text + "\n"
+
+
+@register_sink
+class JsonSink(_JsonSink):
+    """
+    One JSON document: {"components": [{<properties>, "pins": [{<pin>}, ...]}, ...]},
+    one component per line. "pins" is always there (empty without pin columns or pins).
+    """
+    name = "json"
+    label = "JSON"
+    suffix = ".json"
+
+    def __init__(self, path, selected_columns=None, options=None):
+        super(JsonSink, self).__init__(path, selected_columns, options)
+        self.components_written = 0 # Separators depend on the components before: not cacheable
+        self.pins_written = 0
+
+    def begin(self):
+        return '{"components": [\n'
+
+    def component(self, ref, record):
+        separator = ",\n" if self.components_written else ""
+        self.components_written += 1
+        self.pins_written = 0
+        return separator + self.properties(record)[:-1] + ', "pins": ['
+
+    def pin(self, ref, record, index):
+        separator = ", " if self.pins_written else ""
+        self.pins_written += 1
+        return separator + "{" + self.pin_members(record, index) + "}"
+
+    def end_component(self, ref, record):
+        return "]}"
+
+    def end(self):
+        return "\n]}\n" if self.components_written else "]}\n"
+
+
+@register_sink
+class UniqueNetsSink(ExportSink):
+    """
+    Collects the net names of all exported pins and writes them, sorted, at the end
+    (same CSV as 'Extract Unique Connector Nets'). Pins without a net contribute no name.
+    """
+    name = "unique_nets"
+    label = "Unique Nets"
+    suffix = "_unique_nets.csv"
+
+    def __init__(self, path, selected_columns=None, options=None):
+        super(UniqueNetsSink, self).__init__(path, selected_columns, options)
+        self.net_names = set()
+
+    def component(self, ref, record):
+        self.net_names.update(record.net_names)
+        return ""
+
+    def end(self):
+        net_names = self.net_names
+        net_names.discard("")
+        if self.options.get("ignore_unconnected_pins"):
+            net_names = set(n for n in net_names if n.lower() != "unconnected")
+        net_matcher = compile_wildcards(self.options.get("net_name_filter", ""))
+        if net_matcher:
+            net_names = net_matcher.filter(net_names)
+        return "".join(pin_export.iter_unique_nets_csv(sorted(net_names, key=pin_export.natural_sort_key)))
+
+
+def create_sinks(names, directory, base_name, selected_columns=None, options=None, compression=None):
+    """
+    Instantiates the registered sinks 'names' writing to '<directory>/<base_name><suffix>',
+    plus '.gz' / '.zst' for a 'gzip' / 'zstd' compression.
+    """
+    return [SINKS[name](output_writer.compressed_path(os.path.join(directory, base_name + SINKS[name].suffix),
+                                                      compression), selected_columns, options)
+            for name in names]
+
+
+def write_fused(snapshot, rows, sinks, cache=None, progress_callback=None, **extraction_options):
+    """
+    Extracts every row once and feeds each record to all sinks, writing their files as it goes.
+    With an ExportCache, unchanged footprints are not re-extracted and their cacheable sections
+    are reused. The files are written atomically (see output_writer.py): every file is
+    completed and flushed to disk before the first target is replaced, so an error while
+    writing (including cancellation) replaces none of them. Only a failing rename itself can
+    leave the targets replaced in part.
+    Each sink's WriteStats (sizes, MB/s) is left in 'sink.stats'.
+
+    Args:
+        extraction_options: The keyword arguments of pin_export.iter_extracted.
+
+    Returns:
+        The paths written, in sink order.
+    """
+    tracer = instrumentation.active_tracer()
+    options = {
+        "ignore_unconnected_pins_for_csv": False,
+        "ignore_free_pins_for_csv": False,
+        "type_field": CONNECTOR_TYPE_FIELD,
+        "extra_fields": (),
+        "pin_net_filter": ""
+    }
+    options.update(extraction_options)
+    if cache is not None:
+        components = ((ref, entry.record, entry) for ref, entry in cache.iter_entries(
+            snapshot, rows, progress_callback=progress_callback, **options))
+    else:
+        components = ((ref, record, None) for ref, record in pin_export.iter_extracted(
+            snapshot, rows, progress_callback=progress_callback, **options))
+
+    files = []
+    try:
+        for sink in sinks:
+            files.append(output_writer.open_atomic(sink.path))
+            files[-1].write(sink.begin())
+        outputs = list(zip(sinks, files))
+
+        for ref, record, entry in components:
+            for sink, f in outputs:
+                start = time.perf_counter() if tracer.enabled else 0.0
+                if entry is not None and sink.fragment_key is not None:
+                    chunk = cache.fragment(entry, sink.fragment_key, lambda: sink.render(ref, record))
+                else:
+                    chunk = sink.render(ref, record)
+                if chunk:
+                    f.write(chunk)
+                if tracer.enabled:
+                    tracer.add_time("render_" + sink.name, time.perf_counter() - start)
+
+        for sink, f in outputs:
+            f.write(sink.end())
+        for f in files:
+            f.finish()
+        for sink, f in outputs:
+            sink.stats = f.publish()
+    except BaseException:
+        for f in files:
+            f.abort() # No-op for the files already moved into place
+        raise
+    return [sink.path for sink in sinks]
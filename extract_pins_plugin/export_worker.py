@@ -0,0 +1,125 @@
+# export_worker.py
+"""
+EXPORT WORKER
+
+Runs the pure-data export stages (extraction from the board snapshot, rendering and file
+writing) on a background thread, so the dialog stays responsive and the export can be cancelled.
+
+Reading the board through pcbnew stays on the GUI thread (BoardSnapshot is built before the
+worker starts); the worker only touches the snapshot. Progress is reported through a
+time-throttled callback, and every callback into the GUI goes through a 'dispatch' function
+(wx.CallAfter in the dialog), so this module does not import wx.
+"""
+
+import threading
+import time
+import traceback
+
+PROGRESS_INTERVAL = 0.05 # Seconds between two progress updates sent to the GUI
+
+
+class ExportCancelled(Exception):
+    """
+    Raised inside the worker when the user cancelled the export.
+    """
+
+
+class CancelToken:
+    """
+    Thread-safe cancellation flag shared by the GUI and the worker.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    def is_cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        """
+        Raises ExportCancelled if cancellation was requested.
+        """
+        if self._event.is_set():
+            raise ExportCancelled()
+
+
+class ProgressReporter:
+    """
+    Turns the per-footprint progress_callback(done, total) calls of pin_export into
+    overall percentages and forwards them at most once per 'min_interval' seconds.
+    Every call also checks the cancel token, which is how a running pipeline is stopped.
+    """
+
+    def __init__(self, report, cancel_token=None, min_interval=PROGRESS_INTERVAL):
+        """
+        Args:
+            report: Callable(percent, message) receiving the throttled updates.
+            cancel_token: Optional CancelToken checked on every progress call.
+            min_interval: Minimum number of seconds between two forwarded updates.
+        """
+        self.report = report
+        self.cancel_token = cancel_token
+        self.min_interval = min_interval
+        self._last_report = 0.0
+
+    def update(self, percent, message=None, force=False):
+        if self.cancel_token is not None:
+            self.cancel_token.check()
+        now = time.monotonic()
+        if force or now - self._last_report >= self.min_interval:
+            self._last_report = now
+            self.report(percent, message)
+
+    def stage(self, start, span, message=None):
+        """
+        Returns a progress_callback(done, total) that maps a stage onto [start, start + span] percent.
+        The stage message is sent immediately.
+        """
+        self.update(start, message, force=True)
+
+        def stage_progress(done, total):
+            self.update(start + int((done / total) * span) if total > 0 else start)
+        return stage_progress
+
+
+class ExportWorker(threading.Thread):
+    """
+    Runs job(progress) on a daemon thread. When the job ends, on_done(status, result, error) is
+    dispatched to the GUI with status "done", "cancelled" or "error".
+    """
+
+    def __init__(self, job, on_progress, on_done, dispatch, min_interval=PROGRESS_INTERVAL):
+        """
+        Args:
+            job: Callable(progress) doing the work; 'progress' is a ProgressReporter.
+            on_progress: GUI callback(percent, message).
+            on_done: GUI callback(status, result, error).
+            dispatch: Callable(func, *args) running func on the GUI thread (wx.CallAfter).
+        """
+        super(ExportWorker, self).__init__(daemon=True)
+        self.job = job
+        self.on_done = on_done
+        self.dispatch = dispatch
+        self.cancel_token = CancelToken()
+        self.progress = ProgressReporter(lambda percent, message: dispatch(on_progress, percent, message),
+                                         self.cancel_token, min_interval)
+
+    def cancel(self):
+        self.cancel_token.cancel()
+
+    def run(self):
+        result = None
+        error = None
+        try:
+            result = self.job(self.progress)
+            status = "done"
+        except ExportCancelled:
+            status = "cancelled"
+        except Exception as e:
+            traceback.print_exc()
+            status = "error"
+            error = e
+        self.dispatch(self.on_done, status, result, error)
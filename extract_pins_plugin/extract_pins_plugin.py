@@ -22,6 +22,7 @@ import os
 
 # Import the custom dialog class from 'plugin_dialog.py'
 from .plugin_dialog import PluginDialog 
+from . import board_sync
 
 class ExtractPinsPlugin(pcbnew.ActionPlugin):
     """
@@ -47,9 +48,9 @@ class ExtractPinsPlugin(pcbnew.ActionPlugin):
         """
         board = pcbnew.GetBoard() # Get a reference to the currently active PCB board
 
-        # Retrieve all footprints on the board and filter for those that are currently selected.
-        # This is the robust way to get user-selected footprints in KiCad 9's pcbnew API.
-        selected_footprints = [f for f in board.GetFootprints() if f.IsSelected()]
+        # Read the editor's selection where pcbnew provides it; otherwise filter all footprints
+        # on the board for those that are currently selected (see board_sync.py).
+        selected_footprints = board_sync.selected_footprints(board)
 
         if not selected_footprints:
             # If no footprints are selected, inform the user and exit.
@@ -0,0 +1,705 @@
+# filter_expression.py
+"""
+FILTER EXPRESSION
+
+A small boolean filter language over the footprints of a board snapshot, e.g.
+
+    ref:J* AND (type:harness OR net:CAN*) AND NOT layer:B.Cu
+
+Terms are 'key:pattern' with the same wildcards as the filter boxes ('*' only, case-insensitive,
+comma-separated alternatives: 'ref:J1,J2,P*'). Patterns with spaces are quoted: value:"10k 1%".
+
+    ref:       reference designator (a term without a key is a reference pattern too)
+    value:     value
+    layer:     layer name (F.Cu, B.Cu)
+    footprint: library footprint name ('footprint:Connector_USB:*')
+    type:      the type field (normally 'connector-type'); footprints without it never match
+    field:     any footprint field, 'field:MPN=TE-*' or field:"Part Number=12*"
+    net:       any pad of the footprint is on a matching net
+    rect:      footprint position inside a rectangle, 'rect:x1,y1,x2,y2' in mm
+    region:    footprint position inside a closed outline drawn on a layer, 'region:User.1'
+    edge:      footprint (bounding box) within a distance of the board edge, 'edge:5' in mm
+
+Terms combine with AND, OR, NOT and parentheses (AND binds tighter than OR; two terms next
+to each other mean AND).
+
+The expression parses into a plan of nodes that is evaluated on a shrinking set of candidate
+rows. Cheap, index-backed terms (reference/value/layer prefix lookups, spatial grid lookups,
+field values) run first
+and net terms, which may have to walk pads, run last. An AND stops as soon as no candidate is
+left, an OR only tests the candidates no earlier alternative matched, and each term either asks
+its index or tests the remaining candidates one by one, whichever is cheaper. A complex filter
+on a big board therefore costs about as much as its most selective term.
+
+This module does not import wx or pcbnew.
+"""
+
+import re
+from functools import lru_cache
+
+from . import instrumentation
+from . import spatial_index
+from .board_snapshot import CONNECTOR_TYPE_FIELD, NO_NET
+from .wildcard_matcher import compile_wildcards
+
+# Cost classes: terms of a lower class run first within an AND / OR
+RANK_LOOKUP = 0 # Literal or prefix patterns on a column index (bisect), spatial grid lookups
+RANK_SCAN = 1 # Tests every distinct value of a column or field
+RANK_NET = 2 # Nets: the net index, or the pads of the candidates
+
+# Share of the rows a term is assumed to match when it cannot be counted up front
+DEFAULT_SELECTIVITY = {RANK_LOOKUP: 0.1, RANK_SCAN: 0.25, RANK_NET: 0.5}
+
+TERM_KEYS = {
+    "ref": "reference", "reference": "reference",
+    "value": "value", "val": "value",
+    "layer": "layer",
+    "footprint": "footprint", "fp": "footprint",
+    "type": "type",
+    "field": "field",
+    "net": "net",
+    "rect": "rect",
+    "region": "region",
+    "edge": "edge",
+}
+
+_TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|((?:[^\s()"]|"(?:[^"\\]|\\.)*")+))')
+_KEY_RE = re.compile(r'([A-Za-z_-]+):(.*)\Z', re.DOTALL)
+_QUOTED_RE = re.compile(r'"((?:[^"\\]|\\.)*)"')
+_KEYWORDS = ("AND", "OR", "NOT")
+
+
+class FilterError(ValueError):
+    """
+    Raised when a filter cannot be evaluated (e.g. 'edge:' on a board without an Edge.Cuts outline).
+    """
+
+
+class FilterSyntaxError(FilterError):
+    """
+    Raised for filter expressions that cannot be parsed. 'position' is the offset in the text.
+    """
+
+    def __init__(self, message, position):
+        super(FilterSyntaxError, self).__init__(f"{message} (at position {position + 1})")
+        self.position = position
+
+
+class FilterContext:
+    """
+    What a plan is evaluated against: the snapshot, the field used for 'type:' terms and
+    the board whose drawings 'region:' and 'edge:' terms use.
+    """
+
+    def __init__(self, snapshot, type_field=CONNECTOR_TYPE_FIELD, build_indexes=False, board=None):
+        """
+        Args:
+            build_indexes: Build missing column indexes to count term selectivities, worthwhile
+                           when a large part of the board is filtered.
+        """
+        self.snapshot = snapshot
+        self.type_field = type_field
+        self.total = len(snapshot)
+        self.build_indexes = build_indexes
+        self.board = board
+        self._shapes = None
+
+    def shapes(self):
+        """
+        Returns the BoardShapes of the board, read on first use.
+        """
+        if self._shapes is None:
+            if self.board is None:
+                raise FilterError("'region:' and 'edge:' filters need the board drawings.")
+            self._shapes = spatial_index.BoardShapes(self.board)
+        return self._shapes
+
+
+# --- Plan nodes ---
+# Every node answers evaluate(context, candidates) with the subset of 'candidates' (a set of
+# rows, never modified) it accepts. rank and selectivity() order the children of AND / OR.
+
+class Term:
+    """
+    Base class of the leaf terms.
+    """
+    key = ""
+
+    def __init__(self, pattern, matcher):
+        self.pattern = pattern
+        self.matcher = matcher
+
+    def __repr__(self):
+        return f"{self.key}:{self.pattern}"
+
+    def rank(self, context):
+        return RANK_SCAN
+
+    def selectivity(self, context):
+        return DEFAULT_SELECTIVITY[self.rank(context)]
+
+    def index_cost(self, context):
+        """
+        Rough cost of index_rows() (including building the index if needed).
+        """
+        return context.total
+
+    def row_cost(self, context, candidates):
+        """
+        Rough cost of testing every candidate with test_rows().
+        """
+        return len(candidates)
+
+    def index_rows(self, context):
+        raise NotImplementedError
+
+    def test_rows(self, context, candidates):
+        """
+        Returns the candidates the term accepts, testing them one by one without the index.
+        """
+        raise NotImplementedError
+
+    def evaluate(self, context, candidates):
+        if len(candidates) == context.total or self.index_cost(context) <= self.row_cost(context, candidates):
+            return candidates & self.index_rows(context)
+        return self.test_rows(context, candidates)
+
+
+class ColumnTerm(Term):
+    """
+    Matches a footprint string column (reference, value, layer, footprint) through its ColumnIndex.
+    """
+
+    def __init__(self, key, pattern, matcher):
+        super(ColumnTerm, self).__init__(pattern, matcher)
+        self.key = key
+
+    def rank(self, context):
+        return RANK_LOOKUP if self.matcher.regex is None else RANK_SCAN
+
+    def selectivity(self, context):
+        if (context.build_indexes or context.snapshot.has_index(self.key)) and context.total:
+            count = context.snapshot.column_index(self.key).count_matching(self.matcher)
+            if count is not None:
+                return count / context.total
+        return super(ColumnTerm, self).selectivity(context)
+
+    def index_cost(self, context):
+        snapshot = context.snapshot
+        cost = 0 if snapshot.has_index(self.key) else context.total # Building it
+        if self.matcher.regex is not None:
+            return cost + (len(snapshot.column_index(self.key)) if snapshot.has_index(self.key) else context.total)
+        return cost + len(self.matcher.literals) + len(self.matcher.prefixes)
+
+    def index_rows(self, context):
+        return context.snapshot.column_index(self.key).rows_matching(self.matcher)
+
+    def test_rows(self, context, candidates):
+        strings = context.snapshot.strings
+        column = context.snapshot.string_column(self.key)
+        matcher = self.matcher
+        return {row for row in candidates if matcher(strings[column[row]])}
+
+
+class FieldTerm(Term):
+    """
+    Matches the (stripped) value of a footprint field; footprints without the field never match.
+    """
+    key = "field"
+
+    def __init__(self, field_name, pattern, matcher):
+        super(FieldTerm, self).__init__(pattern, matcher)
+        self.field_name = field_name
+
+    def __repr__(self):
+        return f"field:{self.field_name}={self.pattern}"
+
+    def _field_name(self, context):
+        return self.field_name
+
+    def index_cost(self, context):
+        snapshot = context.snapshot
+        if not snapshot.has_index("field"):
+            return len(snapshot.field_name) # Building the field index
+        return len(snapshot.field_index().values(self._field_name(context)))
+
+    def index_rows(self, context):
+        return context.snapshot.field_index().rows_matching(self._field_name(context), self.matcher)
+
+    def test_rows(self, context, candidates):
+        field_index = context.snapshot.field_index()
+        field_name = self._field_name(context)
+        matcher = self.matcher
+        accepted = set()
+        for row in candidates:
+            value = field_index.value(row, field_name)
+            if value is not None and matcher(value.strip()):
+                accepted.add(row)
+        return accepted
+
+
+class TypeTerm(FieldTerm):
+    """
+    FieldTerm on the type field of the context (the dialog's 'Type Field').
+    """
+    key = "type"
+
+    def __init__(self, pattern, matcher):
+        super(TypeTerm, self).__init__(None, pattern, matcher)
+
+    def __repr__(self):
+        return f"type:{self.pattern}"
+
+    def _field_name(self, context):
+        return context.type_field
+
+
+class NetTerm(Term):
+    """
+    Matches footprints with any pad on a matching net (pads without a net never match).
+    """
+    key = "net"
+
+    def rank(self, context):
+        return RANK_NET
+
+    def index_cost(self, context):
+        snapshot = context.snapshot
+        if not snapshot.has_index("net"):
+            return len(snapshot.pad_fp) # Building the net index walks every pad
+        return len(snapshot.net_index().footprints_by_net_name)
+
+    def row_cost(self, context, candidates):
+        pad_count = context.snapshot.pad_count
+        return sum(pad_count(row) for row in candidates)
+
+    def index_rows(self, context):
+        return context.snapshot.net_index().footprints_matching(self.matcher)
+
+    def test_rows(self, context, candidates):
+        snapshot = context.snapshot
+        strings = snapshot.strings
+        pad_start = snapshot.fp_pad_start
+        pad_net_code = snapshot.pad_net_code
+        pad_net_name = snapshot.pad_net_name
+        matcher = self.matcher
+        accepted = set()
+        pads_scanned = 0
+        for row in candidates:
+            for pad_idx in range(pad_start[row], pad_start[row + 1]):
+                pads_scanned += 1
+                if pad_net_code[pad_idx] != NO_NET and matcher(strings[pad_net_name[pad_idx]]):
+                    accepted.add(row)
+                    break
+        instrumentation.active_tracer().count(instrumentation.PADS_SCANNED, pads_scanned)
+        return accepted
+
+
+class SpatialTerm(Term):
+    """
+    Base class of the terms answered by the snapshot's SpatialIndex (coordinates in nm).
+    """
+
+    def __init__(self, pattern):
+        super(SpatialTerm, self).__init__(pattern, None)
+
+    def rank(self, context):
+        return RANK_LOOKUP
+
+    def lookup_cost(self, context, grid):
+        """
+        Grid cells index_rows() visits.
+        """
+        return len(grid)
+
+    def index_cost(self, context):
+        snapshot = context.snapshot
+        if not snapshot.has_index("spatial"):
+            return context.total * 2 # Building the grid
+        return self.lookup_cost(context, snapshot.spatial_index())
+
+
+class RectTerm(SpatialTerm):
+    """
+    Footprints whose position lies inside a rectangle.
+    """
+    key = "rect"
+
+    def __init__(self, pattern, left, top, right, bottom):
+        super(RectTerm, self).__init__(pattern)
+        self.bounds = (left, top, right, bottom)
+
+    def lookup_cost(self, context, grid):
+        return grid.cell_count(*self.bounds)
+
+    def index_rows(self, context):
+        return context.snapshot.spatial_index().rows_in_rect(*self.bounds)
+
+    def test_rows(self, context, candidates):
+        left, top, right, bottom = self.bounds
+        pos_x, pos_y = context.snapshot.fp_pos_x, context.snapshot.fp_pos_y
+        return {row for row in candidates if left <= pos_x[row] <= right and top <= pos_y[row] <= bottom}
+
+
+class RegionTerm(SpatialTerm):
+    """
+    Footprints whose position lies inside a closed outline drawn on a board layer.
+    """
+    key = "region"
+
+    def _regions(self, context):
+        regions = context.shapes().regions(self.pattern)
+        if not regions:
+            raise FilterError(f"No closed outline found on layer '{self.pattern}'.")
+        return regions
+
+    def lookup_cost(self, context, grid):
+        cost = 0
+        for points in self._regions(context):
+            xs = [p[0] for p in points]
+            ys = [p[1] for p in points]
+            cost += grid.cell_count(min(xs), min(ys), max(xs), max(ys))
+        return cost
+
+    def row_cost(self, context, candidates):
+        return len(candidates) * sum(len(points) for points in self._regions(context))
+
+    def index_rows(self, context):
+        return context.snapshot.spatial_index().rows_in_polygons(self._regions(context))
+
+    def test_rows(self, context, candidates):
+        regions = self._regions(context)
+        pos_x, pos_y = context.snapshot.fp_pos_x, context.snapshot.fp_pos_y
+        return {row for row in candidates
+                if any(spatial_index.point_in_polygon(pos_x[row], pos_y[row], points) for points in regions)}
+
+
+class EdgeTerm(SpatialTerm):
+    """
+    Footprints whose bounding box comes within a distance of the board edge (Edge.Cuts).
+    """
+    key = "edge"
+
+    def __init__(self, pattern, distance):
+        super(EdgeTerm, self).__init__(pattern)
+        self.distance = distance
+
+    def _segments(self, context):
+        segments = context.shapes().segments(spatial_index.EDGE_LAYER)
+        if not segments:
+            raise FilterError(f"The board has no {spatial_index.EDGE_LAYER} outline.")
+        return segments
+
+    def lookup_cost(self, context, grid):
+        band = 2 * self.distance // grid.cell_size + 2
+        return sum((abs(x2 - x1) + abs(y2 - y1)) // grid.cell_size * band + band
+                   for x1, y1, x2, y2 in self._segments(context))
+
+    def row_cost(self, context, candidates):
+        return len(candidates) * len(self._segments(context))
+
+    def index_rows(self, context):
+        return context.snapshot.spatial_index().rows_near_segments(self._segments(context), self.distance)
+
+    def test_rows(self, context, candidates):
+        segments = self._segments(context)
+        snapshot = context.snapshot
+        return {row for row in candidates
+                if spatial_index.box_near_segments(snapshot.fp_box_left[row], snapshot.fp_box_top[row],
+                                                   snapshot.fp_box_right[row], snapshot.fp_box_bottom[row],
+                                                   segments, self.distance)}
+
+
+class Not:
+    def __init__(self, operand):
+        self.operand = operand
+
+    def __repr__(self):
+        return f"NOT {self.operand!r}"
+
+    def rank(self, context):
+        return self.operand.rank(context)
+
+    def selectivity(self, context):
+        return 1.0 - self.operand.selectivity(context)
+
+    def evaluate(self, context, candidates):
+        return candidates - self.operand.evaluate(context, candidates)
+
+
+class And:
+    def __init__(self, operands):
+        self.operands = operands
+
+    def __repr__(self):
+        return "(" + " AND ".join(repr(operand) for operand in self.operands) + ")"
+
+    def rank(self, context):
+        return max(operand.rank(context) for operand in self.operands)
+
+    def selectivity(self, context):
+        result = 1.0
+        for operand in self.operands:
+            result *= operand.selectivity(context)
+        return result
+
+    def ordered(self, context):
+        """
+        The operands in evaluation order: cheapest cost class first, most selective first within it.
+        """
+        return sorted(self.operands, key=lambda operand: (operand.rank(context), operand.selectivity(context)))
+
+    def evaluate(self, context, candidates):
+        for operand in self.ordered(context):
+            if not candidates:
+                break
+            candidates = operand.evaluate(context, candidates)
+        return candidates
+
+
+class Or:
+    def __init__(self, operands):
+        self.operands = operands
+
+    def __repr__(self):
+        return "(" + " OR ".join(repr(operand) for operand in self.operands) + ")"
+
+    def rank(self, context):
+        return max(operand.rank(context) for operand in self.operands)
+
+    def selectivity(self, context):
+        rest = 1.0
+        for operand in self.operands:
+            rest *= 1.0 - operand.selectivity(context)
+        return 1.0 - rest
+
+    def ordered(self, context):
+        """
+        The operands in evaluation order: cheapest cost class first, least selective first within
+        it, so the later (costlier) alternatives see as few candidates as possible.
+        """
+        return sorted(self.operands, key=lambda operand: (operand.rank(context), -operand.selectivity(context)))
+
+    def evaluate(self, context, candidates):
+        matched = set()
+        remaining = candidates
+        for operand in self.ordered(context):
+            if not remaining:
+                break
+            accepted = operand.evaluate(context, remaining)
+            if accepted:
+                matched |= accepted
+                remaining = remaining - accepted
+        return matched
+
+
+# --- Parser ---
+
+def _unquote(text):
+    return _QUOTED_RE.sub(lambda m: re.sub(r'\\(.)', r'\1', m.group(1)), text)
+
+
+def _tokenize(text):
+    """
+    Returns (kind, text, position) tokens: kind is '(', ')', a keyword (AND, OR, NOT) or 'term'.
+    """
+    tokens = []
+    position = 0
+    while True:
+        match = _TOKEN_RE.match(text, position)
+        if match is None:
+            if text[position:].strip():
+                raise FilterSyntaxError("Unterminated quote", text.index('"', position))
+            return tokens
+        start = match.start(match.lastindex)
+        if match.group(1):
+            tokens.append(("(", "(", start))
+        elif match.group(2):
+            tokens.append((")", ")", start))
+        else:
+            word = match.group(3)
+            kind = word.upper() if word.upper() in _KEYWORDS else "term"
+            tokens.append((kind, word, start))
+        position = match.end()
+
+
+def make_term(word, position=0):
+    """
+    Builds the Term of one 'key:pattern' word (quotes not yet removed).
+    """
+    match = _KEY_RE.match(word)
+    if match is None:
+        key, pattern = "reference", _unquote(word)
+    else:
+        key = TERM_KEYS.get(match.group(1).lower())
+        if key is None:
+            raise FilterSyntaxError(f"Unknown filter key '{match.group(1)}' "
+                                    f"(use {', '.join(sorted(set(TERM_KEYS.values())))})", position)
+        pattern = _unquote(match.group(2)).strip()
+
+    if key in ("rect", "region", "edge"):
+        return _make_spatial_term(key, pattern, word, position)
+    if key == "field":
+        field_name, separator, pattern = pattern.partition("=")
+        field_name, pattern = field_name.strip(), pattern.strip()
+        if not separator or not field_name:
+            raise FilterSyntaxError("A field term needs a field name, e.g. field:MPN=TE-*", position)
+    matcher = compile_wildcards(pattern)
+    if not matcher:
+        raise FilterSyntaxError(f"Missing pattern after '{word}'", position)
+
+    if key == "field":
+        return FieldTerm(field_name, pattern, matcher)
+    if key == "type":
+        return TypeTerm(pattern, matcher)
+    if key == "net":
+        return NetTerm(pattern, matcher)
+    return ColumnTerm(key, pattern, matcher)
+
+
+def _millimetres(text, word, position):
+    text = text.strip()
+    if text.lower().endswith("mm"):
+        text = text[:-2]
+    try:
+        return round(float(text) * spatial_index.NM_PER_MM)
+    except ValueError:
+        raise FilterSyntaxError(f"'{word}' needs numbers in mm", position) from None
+
+
+def _make_spatial_term(key, pattern, word, position):
+    if not pattern:
+        raise FilterSyntaxError(f"Missing value after '{word}'", position)
+    if key == "region":
+        return RegionTerm(pattern)
+    if key == "edge":
+        distance = _millimetres(pattern, word, position)
+        if distance < 0:
+            raise FilterSyntaxError("The edge distance cannot be negative", position)
+        return EdgeTerm(pattern, distance)
+    values = pattern.split(",")
+    if len(values) != 4:
+        raise FilterSyntaxError("A rectangle needs four numbers, e.g. rect:0,0,50,20", position)
+    x1, y1, x2, y2 = [_millimetres(value, word, position) for value in values]
+    return RectTerm(pattern, min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+
+
+class _Parser:
+    def __init__(self, text):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+
+    def _peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def _position(self):
+        return self.tokens[self.pos][2] if self.pos < len(self.tokens) else len(self.text)
+
+    def parse(self):
+        node = self._parse_or()
+        if self.pos < len(self.tokens):
+            raise FilterSyntaxError(f"Unexpected '{self.tokens[self.pos][1]}'", self._position())
+        return node
+
+    def _parse_or(self):
+        operands = [self._parse_and()]
+        while self._peek() == "OR":
+            self.pos += 1
+            operands.append(self._parse_and())
+        return operands[0] if len(operands) == 1 else Or(_flatten(Or, operands))
+
+    def _parse_and(self):
+        operands = [self._parse_not()]
+        while self._peek() not in (None, ")", "OR"):
+            if self._peek() == "AND":
+                self.pos += 1
+            operands.append(self._parse_not())
+        return operands[0] if len(operands) == 1 else And(_flatten(And, operands))
+
+    def _parse_not(self):
+        if self._peek() == "NOT":
+            self.pos += 1
+            return Not(self._parse_not())
+        return self._parse_atom()
+
+    def _parse_atom(self):
+        kind = self._peek()
+        if kind == "(":
+            self.pos += 1
+            node = self._parse_or()
+            if self._peek() != ")":
+                raise FilterSyntaxError("Missing ')'", self._position())
+            self.pos += 1
+            return node
+        if kind == "term":
+            _kind, word, position = self.tokens[self.pos]
+            self.pos += 1
+            return make_term(word, position)
+        if kind is None:
+            raise FilterSyntaxError("Expression ends early", self._position())
+        raise FilterSyntaxError(f"Expected a filter term, found '{self.tokens[self.pos][1]}'", self._position())
+
+
+def _flatten(node_class, operands):
+    flat = []
+    for operand in operands:
+        flat.extend(operand.operands if isinstance(operand, node_class) else [operand])
+    return flat
+
+
+@lru_cache(maxsize=64)
+def parse_filter(text):
+    """
+    Parses a filter expression into its plan (cached per text, like compile_wildcards).
+
+    Returns:
+        The root node, or None for an empty expression (no filter).
+
+    Raises:
+        FilterSyntaxError: If the expression is malformed.
+    """
+    if not text.strip():
+        return None
+    return _Parser(text).parse()
+
+
+def build_filter(expression="", value_filter_text="", net_name_filter_text=""):
+    """
+    Combines a filter expression with the dialog's Value and Net Name filter boxes into one plan,
+    so all of them are ordered and short-circuited together. The boxes keep their own rules:
+    the Value filter is a single pattern, the Net Name filter a comma-separated list.
+
+    Returns:
+        The root node, or None if there is nothing to filter.
+    """
+    operands = []
+    root = parse_filter(expression)
+    if root is not None:
+        operands.append(root)
+    value_filter_text = value_filter_text.strip()
+    if value_filter_text:
+        operands.append(ColumnTerm("value", value_filter_text, compile_wildcards(value_filter_text, comma_separated=False)))
+    net_matcher = compile_wildcards(net_name_filter_text.strip())
+    if net_matcher:
+        operands.append(NetTerm(net_name_filter_text.strip(), net_matcher))
+    if not operands:
+        return None
+    return operands[0] if len(operands) == 1 else And(_flatten(And, operands))
+
+
+def select_rows(snapshot, rows, plan, type_field=CONNECTOR_TYPE_FIELD, board=None):
+    """
+    Returns the rows accepted by a plan (from parse_filter / build_filter), in their given order.
+    A plan of None keeps every row. 'board' provides the drawings for 'region:' and 'edge:' terms.
+
+    Raises:
+        FilterError: If a term cannot be evaluated on this board.
+    """
+    if plan is None:
+        return list(rows)
+    rows = list(rows)
+    context = FilterContext(snapshot, type_field, build_indexes=len(rows) * 4 >= len(snapshot), board=board)
+    accepted = plan.evaluate(context, set(rows))
+    print(f"DEBUG: Applied filter {plan!r}. Found {len(accepted)} FPs.")
+    return [row for row in rows if row in accepted]
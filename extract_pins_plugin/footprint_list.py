@@ -0,0 +1,146 @@
+# footprint_list.py
+"""
+FOOTPRINT LIST
+
+In-memory model behind the dialog's "Selected Components" list. The list control is
+virtual (wx.LC_VIRTUAL) and only asks this model for the rows it actually draws, so
+refreshing, removing and merging never rebuild thousands of list items.
+
+References, footprint keys (UUIDs) and natural sort keys are read once per footprint and
+kept row-aligned, so redraws and merges do not call into SWIG again. The keys let board
+events (see board_sync.py) update or drop listed footprints without a rescan.
+This module does not import wx.
+"""
+
+from heapq import merge
+
+from .board_snapshot import footprint_key
+from .pin_export import natural_sort_key
+
+
+class FootprintList:
+    """
+    Ordered list of footprints with cached references. Multi-select merges keep the list
+    in natural reference order (J1, J2, J10) and replace footprints with the same reference.
+    """
+
+    def __init__(self, footprints=()):
+        self.set(footprints)
+
+    def __len__(self):
+        return len(self.footprints)
+
+    def __getitem__(self, index):
+        return self.footprints[index]
+
+    def reference(self, index):
+        return self.references[index]
+
+    def set(self, footprints):
+        """
+        Replaces the whole list, keeping the given order (e.g. board order of a fresh selection).
+        """
+        self.footprints = list(footprints)
+        self.references = [fp.GetReference() for fp in self.footprints]
+        self.keys = [footprint_key(fp) for fp in self.footprints]
+        self._sort_keys = None # Only needed once the list is merged into
+        self._sorted = False
+
+    def _ensure_sorted(self):
+        """
+        Puts the list into natural reference order, keeping the last footprint of duplicate references.
+        """
+        if self._sorted:
+            return
+        last_by_ref = {}
+        for ref, key, fp in zip(self.references, self.keys, self.footprints):
+            last_by_ref[ref] = (key, fp)
+        entries = sorted(((natural_sort_key(ref), ref, key, fp) for ref, (key, fp) in last_by_ref.items()),
+                         key=lambda entry: entry[0])
+        self._set_entries(entries)
+        self._sorted = True
+
+    def _set_entries(self, entries):
+        self._sort_keys = [entry[0] for entry in entries]
+        self.references = [entry[1] for entry in entries]
+        self.keys = [entry[2] for entry in entries]
+        self.footprints = [entry[3] for entry in entries]
+
+    def merge(self, footprints):
+        """
+        Merges footprints into the list, which ends up sorted by reference. A footprint whose
+        reference is already listed replaces the listed one in place; the others are sorted
+        among themselves and merged in with a single linear pass.
+
+        Returns:
+            The number of footprints that were not listed before.
+        """
+        self._ensure_sorted()
+        index_by_ref = {ref: i for i, ref in enumerate(self.references)}
+
+        new_by_ref = {}
+        for fp in footprints:
+            ref = fp.GetReference()
+            idx = index_by_ref.get(ref)
+            if idx is not None:
+                self.footprints[idx] = fp
+                self.keys[idx] = footprint_key(fp)
+            else:
+                new_by_ref[ref] = fp
+        if not new_by_ref:
+            return 0
+
+        new_entries = sorted(((natural_sort_key(ref), ref, footprint_key(fp), fp) for ref, fp in new_by_ref.items()),
+                             key=lambda entry: entry[0])
+        self._set_entries(list(merge(zip(self._sort_keys, self.references, self.keys, self.footprints), new_entries,
+                                     key=lambda entry: entry[0])))
+        return len(new_entries)
+
+    def remove(self, indices):
+        """
+        Removes the footprints at the given list indices. Returns the number removed.
+        """
+        remove = set(indices)
+        if not remove:
+            return 0
+        keep = [i for i in range(len(self.footprints)) if i not in remove]
+        self.footprints = [self.footprints[i] for i in keep]
+        self.references = [self.references[i] for i in keep]
+        self.keys = [self.keys[i] for i in keep]
+        if self._sort_keys is not None:
+            self._sort_keys = [self._sort_keys[i] for i in keep]
+        return len(remove)
+
+    def discard(self, keys):
+        """
+        Removes the listed footprints whose footprint_key is in 'keys' (e.g. deleted from the board).
+        Returns the number removed.
+        """
+        keys = set(keys)
+        return self.remove([i for i, key in enumerate(self.keys) if key in keys])
+
+    def update(self, footprints):
+        """
+        Takes over changed footprints that are listed (matched by footprint_key) and re-reads their
+        references; a merged list moves renamed footprints to their new place. Footprints that are
+        not listed are ignored. Returns the number of listed footprints updated.
+        """
+        index_by_key = {key: i for i, key in enumerate(self.keys)}
+        renamed = []
+        updated = 0
+        for fp in footprints:
+            idx = index_by_key.get(footprint_key(fp))
+            if idx is None:
+                continue
+            updated += 1
+            self.footprints[idx] = fp
+            ref = fp.GetReference()
+            if ref != self.references[idx]:
+                if self._sorted:
+                    renamed.append((idx, fp))
+                else:
+                    self.references[idx] = ref
+        if renamed:
+            self.remove([idx for idx, _fp in renamed])
+            self.merge([fp for _idx, fp in renamed])
+        return updated
@@ -0,0 +1,588 @@
+# kicad_pcb_reader.py
+"""
+KICAD_PCB READER
+
+Pure-Python, streaming reader for .kicad_pcb files (KiCad 6 and newer S-expression format),
+used as an alternative to pcbnew.LoadBoard where KiCad is not installed or too slow to start.
+
+Only the nodes the plugin uses are built into objects: the board net table, the board drawings
+(lines, rectangles, circles, arcs and polygons, for the spatial filters) and, per footprint, its
+properties, pads and pad nets. Tracks, vias, zones, texts and footprint graphics are skipped token
+by token without allocating anything for them, so a footprint's bounding box is the box around its
+pads.
+
+The footprint/pad/net objects returned here offer the same methods the plugin calls on pcbnew
+objects (GetReference, Pads, GetNet, GetFields...), so they feed straight into BoardSnapshot and
+the rest of the export code.
+
+Run as a module to time a read, or to check it against pcbnew on a machine with KiCad:
+
+    python -m extract_pins_plugin.kicad_pcb_reader board.kicad_pcb [--compare]
+"""
+
+import argparse
+import math
+import re
+import sys
+import time
+
+CHUNK_SIZE = 1 << 20
+
+# Token stream markers for '(' and ')'. Everything else is yielded as a str.
+OPEN = object()
+CLOSE = object()
+
+_TOKEN_RE = re.compile(r'[()]|"(?:[^"\\]|\\.)*"|[^\s()"]+|"')
+_ESCAPE_RE = re.compile(r'\\(.)', re.DOTALL)
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r'}
+
+# Top-level board nodes that are built; everything else is skipped
+FOOTPRINT_HEADS = ("footprint", "module") # 'module' is the pre-KiCad 6 name
+# Board drawings -> PCB_SHAPE.GetShape() value (see spatial_index.py); gr_curve (Bezier) is skipped
+SHAPE_HEADS = {"gr_line": 0, "gr_rect": 1, "gr_arc": 2, "gr_circle": 3, "gr_poly": 4}
+SKIPPED_SHAPE_HEADS = frozenset(("stroke", "fill", "uuid", "tstamp", "locked"))
+# Footprint sub-nodes never needed for pin extraction (graphics, 3D models, text formatting...)
+SKIPPED_FOOTPRINT_HEADS = frozenset((
+    "fp_line", "fp_arc", "fp_circle", "fp_rect", "fp_poly", "fp_curve", "fp_text_box",
+    "model", "zone", "group", "dimension", "effects", "stroke", "primitives", "teardrops",
+    "embedded_fonts", "embedded_files", "render_cache", "net_tie_pad_groups", "private_layers",
+))
+
+
+def _unescape(text):
+    return _ESCAPE_RE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(1)), text)
+
+
+def tokenize(stream, chunk_size=CHUNK_SIZE):
+    """
+    Yields the tokens of an S-expression text stream chunk by chunk: OPEN, CLOSE,
+    or the str value of an atom / quoted string (quotes removed, escapes resolved).
+    """
+    buffer = ""
+    eof = False
+    while not eof:
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+        carry_from = len(buffer)
+        for m in _TOKEN_RE.finditer(buffer):
+            token = m.group()
+            # A token touching the end of the buffer may continue in the next chunk
+            if not eof and (m.end() == len(buffer) or token == '"'):
+                carry_from = m.start()
+                break
+            if token == "(":
+                yield OPEN
+            elif token == ")":
+                yield CLOSE
+            elif token[0] == '"':
+                if token == '"':
+                    raise ValueError("Unterminated string in S-expression.")
+                token = token[1:-1]
+                yield _unescape(token) if "\\" in token else token
+            else:
+                yield token
+        buffer = buffer[carry_from:]
+
+
+def skip_node(tokens):
+    """
+    Consumes the rest of a node whose '(' was already read, without building anything.
+    """
+    depth = 1
+    for token in tokens:
+        if token is OPEN:
+            depth += 1
+        elif token is CLOSE:
+            depth -= 1
+            if depth == 0:
+                return
+    raise ValueError("Unexpected end of file inside an S-expression node.")
+
+
+def read_node(tokens, head, skip_heads=frozenset()):
+    """
+    Reads the rest of a node whose '(' and head were already read, into a nested list
+    [head, arg, [child_head, ...], ...]. Children whose head is in skip_heads are skipped.
+    """
+    node = [head]
+    for token in tokens:
+        if token is OPEN:
+            child_head = next(tokens)
+            if child_head is OPEN or child_head is CLOSE:
+                raise ValueError("S-expression list without a head atom.")
+            if child_head in skip_heads:
+                skip_node(tokens)
+            else:
+                node.append(read_node(tokens, child_head, skip_heads))
+        elif token is CLOSE:
+            return node
+        else:
+            node.append(token)
+    raise ValueError("Unexpected end of file inside an S-expression node.")
+
+
+def _child(node, head):
+    """
+    Returns the first child list of a node with the given head, or None.
+    """
+    for item in node:
+        if isinstance(item, list) and item[0] == head:
+            return item
+    return None
+
+
+def _children(node, head):
+    return [item for item in node if isinstance(item, list) and item[0] == head]
+
+
+# --- pcbnew look-alike objects ---
+
+class SexprVector:
+    """
+    Stand-in for pcbnew.VECTOR2I (internal units, nanometres).
+    """
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class SexprAngle:
+    """
+    Stand-in for pcbnew.EDA_ANGLE.
+    """
+
+    def __init__(self, degrees):
+        self.degrees = degrees
+
+    def AsDegrees(self):
+        return self.degrees
+
+
+class SexprBox:
+    """
+    Stand-in for pcbnew.BOX2I.
+    """
+
+    def __init__(self, left, top, right, bottom):
+        self.left = left
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+
+    def GetLeft(self):
+        return self.left
+
+    def GetTop(self):
+        return self.top
+
+    def GetRight(self):
+        return self.right
+
+    def GetBottom(self):
+        return self.bottom
+
+
+class SexprUuid:
+    """
+    Stand-in for pcbnew.KIID.
+    """
+
+    def __init__(self, text):
+        self.text = text
+
+    def AsString(self):
+        return self.text
+
+
+class SexprLibId:
+    """
+    Stand-in for pcbnew.LIB_ID.
+    """
+
+    def __init__(self, text):
+        self.text = text
+
+    def GetUniStringLibId(self):
+        return self.text
+
+    def __str__(self):
+        return self.text
+
+
+class SexprNet:
+    """
+    Stand-in for pcbnew.NETINFO_ITEM.
+    """
+
+    def __init__(self, net_code, net_name):
+        self.net_code = net_code
+        self.net_name = net_name
+
+    def GetNetCode(self):
+        return self.net_code
+
+    def GetNetname(self):
+        return self.net_name
+
+
+class SexprField:
+    """
+    Stand-in for pcbnew.PCB_FIELD.
+    """
+
+    def __init__(self, name, text):
+        self.name = name
+        self.text = text
+
+    def GetName(self):
+        return self.name
+
+    def GetText(self):
+        return self.text
+
+
+class SexprPad:
+    """
+    Stand-in for pcbnew.PAD.
+    """
+
+    def __init__(self, pad_name, net, position):
+        self.pad_name = pad_name
+        self.net = net
+        self.position = position
+
+    def GetPadName(self):
+        return self.pad_name
+
+    def GetNumber(self):
+        return self.pad_name
+
+    def GetNet(self):
+        return self.net
+
+    def GetPosition(self):
+        return self.position
+
+
+class SexprFootprint:
+    """
+    Stand-in for pcbnew.FOOTPRINT, built from a (footprint ...) node.
+    """
+
+    def __init__(self, node, net_table):
+        self.fpid = node[1] if len(node) > 1 and isinstance(node[1], str) else ""
+
+        layer_node = _child(node, "layer")
+        self.layer_name = layer_node[1] if layer_node else "F.Cu"
+
+        uuid_node = _child(node, "uuid") or _child(node, "tstamp") # 'tstamp' before KiCad 8
+        self.m_Uuid = SexprUuid(uuid_node[1] if uuid_node else "")
+
+        at_node = _child(node, "at")
+        x_mm = float(at_node[1]) if at_node else 0.0
+        y_mm = float(at_node[2]) if at_node else 0.0
+        self.position = SexprVector(round(x_mm * 1000000), round(y_mm * 1000000))
+        self.orientation = SexprAngle(float(at_node[3]) if at_node and len(at_node) > 3 else 0.0)
+
+        descr_node = _child(node, "descr")
+        self.description = descr_node[1] if descr_node else ""
+
+        # KiCad 8+ stores Reference/Value/... as (property "Name" "Text"); KiCad 6/7 use
+        # (fp_text reference "J1") / (fp_text value "CONN") next to the user properties.
+        self.fields = [SexprField(p[1], p[2] if len(p) > 2 else "") for p in _children(node, "property") if len(p) > 1]
+        field_names = set(f.GetName() for f in self.fields)
+        legacy_fields = []
+        for fp_text in _children(node, "fp_text"):
+            if len(fp_text) > 2 and fp_text[1] in ("reference", "value"):
+                name = fp_text[1].capitalize()
+                if name not in field_names:
+                    legacy_fields.append(SexprField(name, fp_text[2]))
+        self.fields = legacy_fields + self.fields
+
+        self.reference = self._field_text("Reference")
+        self.value = self._field_text("Value")
+
+        # Pad (at ...) is relative to the footprint and in its rotated frame; convert to board coordinates
+        # (KiCad angles are counter-clockwise on screen, with Y pointing down).
+        angle = math.radians(self.orientation.degrees)
+        cos_a, sin_a = math.cos(angle), math.sin(angle)
+        self.pads = []
+        left = right = self.position.x
+        top = bottom = self.position.y
+        for pad_node in _children(node, "pad"):
+            pad_name = pad_node[1] if len(pad_node) > 1 and isinstance(pad_node[1], str) else ""
+            pad_at = _child(pad_node, "at")
+            dx = float(pad_at[1]) * 1000000 if pad_at else 0.0
+            dy = float(pad_at[2]) * 1000000 if pad_at else 0.0
+            pad_pos = SexprVector(round(self.position.x + dx * cos_a + dy * sin_a),
+                                  round(self.position.y - dx * sin_a + dy * cos_a))
+            self.pads.append(SexprPad(pad_name, net_table.net_for(_child(pad_node, "net")), pad_pos))
+            # Extent of the pad's rotated size rectangle; the pad (at ...) angle is already the board
+            # angle (footprint rotation included), missing means the footprint's.
+            size = _child(pad_node, "size")
+            if size and len(size) > 2:
+                pad_angle = math.radians(float(pad_at[3])) if pad_at and len(pad_at) > 3 else angle
+                width, height = float(size[1]) * 500000, float(size[2]) * 500000
+                pad_cos, pad_sin = abs(math.cos(pad_angle)), abs(math.sin(pad_angle))
+                reach_x = round(width * pad_cos + height * pad_sin)
+                reach_y = round(width * pad_sin + height * pad_cos)
+            else:
+                reach_x = reach_y = 0
+            left, right = min(left, pad_pos.x - reach_x), max(right, pad_pos.x + reach_x)
+            top, bottom = min(top, pad_pos.y - reach_y), max(bottom, pad_pos.y + reach_y)
+        self.bounding_box = SexprBox(left, top, right, bottom)
+
+    def _field_text(self, name):
+        for field in self.fields:
+            if field.GetName() == name:
+                return field.GetText()
+        return ""
+
+    def GetReference(self):
+        return self.reference
+
+    def GetValue(self):
+        return self.value
+
+    def GetFPID(self):
+        return SexprLibId(self.fpid)
+
+    def GetLibDescription(self):
+        return self.description
+
+    def GetLayerName(self):
+        return self.layer_name
+
+    def GetPosition(self):
+        return self.position
+
+    def GetOrientation(self):
+        return self.orientation
+
+    def GetBoundingBox(self, *include_text):
+        return self.bounding_box
+
+    def GetFields(self):
+        return self.fields
+
+    def Pads(self):
+        return self.pads
+
+    def IsSelected(self):
+        return False
+
+
+def _point(node, head):
+    child = _child(node, head)
+    if child is None or len(child) < 3:
+        return SexprVector(0, 0)
+    return SexprVector(round(float(child[1]) * 1000000), round(float(child[2]) * 1000000))
+
+
+class SexprShape:
+    """
+    Stand-in for a board-level pcbnew.PCB_SHAPE, built from a gr_line / gr_rect / gr_circle /
+    gr_arc / gr_poly node.
+    """
+
+    def __init__(self, node):
+        self.shape = SHAPE_HEADS[node[0]]
+        layer_node = _child(node, "layer")
+        self.layer_name = layer_node[1] if layer_node and len(layer_node) > 1 else ""
+        self.start = _point(node, "start")
+        self.end = _point(node, "end")
+        self.mid = _point(node, "mid")
+        if node[0] == "gr_circle":
+            self.start = _point(node, "center") # (gr_circle (center x y) (end <point on the circle>))
+        pts = _child(node, "pts")
+        self.points = [SexprVector(round(float(xy[1]) * 1000000), round(float(xy[2]) * 1000000))
+                       for xy in _children(pts, "xy")] if pts else []
+
+    def GetShape(self):
+        return self.shape
+
+    def GetLayerName(self):
+        return self.layer_name
+
+    def GetStart(self):
+        return self.start
+
+    def GetEnd(self):
+        return self.end
+
+    def GetArcMid(self):
+        return self.mid
+
+    def GetCenter(self):
+        return self.start
+
+    def GetRadius(self):
+        return round(math.hypot(self.end.x - self.start.x, self.end.y - self.start.y))
+
+    def GetPolyPoints(self):
+        return self.points
+
+
+class NetTable:
+    """
+    The board's (net code "name") table. Pads without a (net ...) node get net 0 (""),
+    which is what pcbnew returns for unconnected pads.
+    """
+
+    def __init__(self):
+        self.nets_by_code = {0: SexprNet(0, "")}
+        self.nets_by_name = {"": self.nets_by_code[0]}
+
+    def add(self, net_code, net_name):
+        net = SexprNet(net_code, net_name)
+        self.nets_by_code[net_code] = net
+        self.nets_by_name.setdefault(net_name, net)
+        return net
+
+    def net_for(self, net_node):
+        if net_node is None or len(net_node) < 2:
+            return self.nets_by_code[0]
+        if len(net_node) == 2:
+            # Name-only form (net "GND"); reuse the table entry or allocate the next code
+            net_name = net_node[1]
+            net = self.nets_by_name.get(net_name)
+            return net if net is not None else self.add(max(self.nets_by_code) + 1, net_name)
+        net_code = int(net_node[1])
+        net = self.nets_by_code.get(net_code)
+        return net if net is not None else self.add(net_code, net_node[2])
+
+
+class SexprBoard:
+    """
+    Stand-in for pcbnew.BOARD holding only footprints, nets and board drawings.
+    """
+
+    def __init__(self, footprints, net_table, drawings=()):
+        self.footprints = footprints
+        self.net_table = net_table
+        self.drawings = list(drawings)
+
+    def GetFootprints(self):
+        return self.footprints
+
+    def GetDrawings(self):
+        return self.drawings
+
+    def GetNetCount(self):
+        return len(self.net_table.nets_by_code)
+
+
+def read_board(path):
+    """
+    Reads a .kicad_pcb file and returns a SexprBoard with its footprints, nets and drawings.
+    """
+    net_table = NetTable()
+    footprints = []
+    drawings = []
+    with open(path, 'r', encoding='utf-8') as f:
+        tokens = tokenize(f)
+        if next(tokens, None) is not OPEN or next(tokens, None) != "kicad_pcb":
+            raise ValueError(f"'{path}' is not a KiCad board file.")
+        for token in tokens:
+            if token is OPEN:
+                head = next(tokens)
+                if head in FOOTPRINT_HEADS:
+                    footprints.append(SexprFootprint(read_node(tokens, head, SKIPPED_FOOTPRINT_HEADS), net_table))
+                elif head == "net":
+                    net_node = read_node(tokens, head)
+                    if len(net_node) > 2:
+                        net_table.add(int(net_node[1]), net_node[2])
+                elif head in SHAPE_HEADS:
+                    shape_node = read_node(tokens, head, SKIPPED_SHAPE_HEADS)
+                    if head != "gr_arc" or _child(shape_node, "mid") is not None: # Pre-KiCad 6 arcs have no 'mid'
+                        drawings.append(SexprShape(shape_node))
+                else:
+                    skip_node(tokens) # Tracks, vias, zones, texts, setup...
+            elif token is CLOSE:
+                break
+    return SexprBoard(footprints, net_table, drawings)
+
+
+def compare_boards(reference_board, board, compare_boxes=False):
+    """
+    Extracts every footprint of two boards (anything with GetFootprints(), e.g. a pcbnew BOARD
+    and this reader's SexprBoard) and compares the extract_data results and the board net names.
+    With compare_boxes, the footprint bounding boxes are compared as well; only meaningful
+    against boards whose boxes also come from the pads (pcbnew's include footprint graphics).
+    Returns a list of human-readable differences (empty when both agree).
+    """
+    from .board_snapshot import BoardSnapshot
+    from . import pin_export
+
+    reference_snapshot = BoardSnapshot(reference_board.GetFootprints())
+    snapshot = BoardSnapshot(board.GetFootprints())
+
+    reference_data = pin_export.extract_data(reference_snapshot, list(reference_snapshot.all_rows()))
+    data = pin_export.extract_data(snapshot, list(snapshot.all_rows()))
+
+    differences = []
+    for ref in sorted(set(reference_data) | set(data), key=pin_export.natural_sort_key):
+        if ref not in data:
+            differences.append(f"{ref}: missing from the S-expression reader")
+        elif ref not in reference_data:
+            differences.append(f"{ref}: not found on the reference board")
+        else:
+            for key in ("general_properties", "pin_data", "filtered_pins_for_csv"):
+                if reference_data[ref][key] != data[ref][key]:
+                    differences.append(f"{ref}: {key} differs\n  reference: {reference_data[ref][key]}\n  sexpr:     {data[ref][key]}")
+    if reference_snapshot.all_net_names() != snapshot.all_net_names():
+        differences.append("Board net names differ.")
+
+    if compare_boxes:
+        def boxes(snap):
+            return {snap.reference(row): (snap.fp_box_left[row], snap.fp_box_top[row],
+                                          snap.fp_box_right[row], snap.fp_box_bottom[row])
+                    for row in snap.all_rows()}
+        reference_boxes = boxes(reference_snapshot)
+        for ref, box in sorted(boxes(snapshot).items(), key=lambda item: pin_export.natural_sort_key(item[0])):
+            if ref in reference_boxes and reference_boxes[ref] != box:
+                differences.append(f"{ref}: bounding box differs\n  reference: {reference_boxes[ref]}\n  sexpr:     {box}")
+    return differences
+
+
+def compare_with_pcbnew(path):
+    """
+    Parity check: extracts every footprint of a board through both pcbnew.LoadBoard and this
+    reader and compares the extract_data results (see compare_boards). Needs KiCad's Python;
+    benchmarks/check_reader_parity.py runs the same comparison on synthetic boards without it.
+    Returns a list of human-readable differences (empty when both agree).
+    """
+    import pcbnew
+    return compare_boards(pcbnew.LoadBoard(path), read_board(path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m extract_pins_plugin.kicad_pcb_reader",
+                                     description="Read a .kicad_pcb without pcbnew and report what was found.")
+    parser.add_argument("board", help=".kicad_pcb file")
+    parser.add_argument("--compare", action="store_true", help="Check the result against pcbnew.LoadBoard")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    board = read_board(args.board)
+    elapsed = time.perf_counter() - start
+    pad_count = sum(len(fp.Pads()) for fp in board.GetFootprints())
+    print(f"Read {len(board.GetFootprints())} footprints, {pad_count} pads, {board.GetNetCount()} nets in {elapsed:.3f}s.")
+
+    if args.compare:
+        try:
+            differences = compare_with_pcbnew(args.board)
+        except ImportError:
+            print("ERROR: --compare needs KiCad's Python (the pcbnew module).")
+            return 2
+        for difference in differences:
+            print(f"MISMATCH: {difference}")
+        print("Parity check passed." if not differences else f"Parity check failed: {len(differences)} difference(s).")
+        return 1 if differences else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
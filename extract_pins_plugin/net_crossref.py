@@ -0,0 +1,150 @@
+# net_crossref.py
+"""
+NET CROSS-REFERENCE
+
+Answers "which pin of J1 is wired to which pin of J2" for a set of connectors without
+joining their CSV files by hand. All pads of the chosen connectors are bucketed by net name
+in one pass (a hash join on the net name), which gives, per net, every (connector, pin)
+endpoint on it. From the same buckets a connector x connector matrix counts the nets each
+pair of connectors shares.
+
+Building the buckets is linear in the number of pads. The matrix only visits the connectors
+that actually share a net, per net, never every pair of connectors against each other.
+This module does not import wx or pcbnew.
+"""
+
+from . import instrumentation
+from .pin_export import csv_row_formatter, natural_sort_key, unique_reference_rows
+
+
+class NetCrossReference:
+    """
+    Result of build_cross_reference().
+
+    Attributes:
+        connectors: References of the joined connectors, in natural order.
+        endpoints_by_net: net name -> list of (reference, pad name), in natural order.
+        shared_counts: (reference_a, reference_b) -> number of shared nets, with a < b
+                       in connector order; (ref, ref) holds the number of nets on that connector.
+    """
+
+    def __init__(self, connectors, endpoints_by_net, shared_counts):
+        self.connectors = connectors
+        self.endpoints_by_net = endpoints_by_net
+        self.shared_counts = shared_counts
+
+    def net_names(self):
+        return sorted(self.endpoints_by_net, key=natural_sort_key)
+
+    def shared(self, reference_a, reference_b):
+        """
+        Returns the number of nets two connectors share (symmetric).
+        """
+        key = (reference_a, reference_b)
+        if key not in self.shared_counts:
+            key = (reference_b, reference_a)
+        return self.shared_counts.get(key, 0)
+
+
+def build_cross_reference(snapshot, rows, ignore_unconnected_pins=True, shared_only=False):
+    """
+    Joins the pads of the given footprint rows on their net names.
+
+    Args:
+        ignore_unconnected_pins: Leave out pads on KiCad's 'unconnected-(...)' / 'unconnected' nets.
+                                 Pads without a net (or with an empty net name) are never joined,
+                                 they are not wired to anything.
+        shared_only: Keep only nets that reach at least two different connectors.
+    """
+    tracer = instrumentation.active_tracer()
+    rows = unique_reference_rows(snapshot, rows)
+    endpoints_by_net = {}
+    connectors_by_net = {} # net name -> references in first-seen order (dict keeps them unique)
+
+    # --- One pass over the pads: bucket (reference, pad) endpoints by net name ---
+    for row in rows:
+        ref = snapshot.reference(row)
+        for pad_idx in snapshot.pads(row):
+            if not snapshot.has_net(pad_idx):
+                continue
+            net_name = snapshot.net_name_of(pad_idx)
+            if not net_name or (ignore_unconnected_pins and net_name.lower().startswith("unconnected")):
+                continue
+            endpoints = endpoints_by_net.get(net_name)
+            if endpoints is None:
+                endpoints = endpoints_by_net[net_name] = []
+                connectors_by_net[net_name] = {}
+            endpoints.append((ref, snapshot.pad_name_of(pad_idx)))
+            connectors_by_net[net_name][ref] = True
+        if tracer.enabled:
+            tracer.count(instrumentation.FOOTPRINTS)
+            tracer.count(instrumentation.PADS_SCANNED, snapshot.pad_count(row))
+
+    if shared_only:
+        for net_name in [n for n, refs in connectors_by_net.items() if len(refs) < 2]:
+            del endpoints_by_net[net_name]
+            del connectors_by_net[net_name]
+
+    connectors = sorted(set(snapshot.reference(row) for row in rows), key=natural_sort_key)
+    order = {ref: i for i, ref in enumerate(connectors)}
+
+    # --- Shared-net counts: per net, only the connectors on that net ---
+    shared_counts = {}
+    for net_name, refs in connectors_by_net.items():
+        on_net = sorted(refs, key=order.__getitem__)
+        for i, ref_a in enumerate(on_net):
+            for ref_b in on_net[i:]:
+                shared_counts[(ref_a, ref_b)] = shared_counts.get((ref_a, ref_b), 0) + 1
+
+    for endpoints in endpoints_by_net.values():
+        endpoints.sort(key=lambda endpoint: (order[endpoint[0]], natural_sort_key(endpoint[1])))
+    return NetCrossReference(connectors, endpoints_by_net, shared_counts)
+
+
+# --- Output generation ---
+
+def iter_crossref_csv(xref):
+    """
+    Yields the cross-reference as CSV: one row per (net, connector, pin) endpoint.
+    """
+    format_row = csv_row_formatter()
+    yield format_row(["Net Name", "Connector", "Pin Number", "Connectors on Net"])
+    for net_name in xref.net_names():
+        endpoints = xref.endpoints_by_net[net_name]
+        connector_count = len(set(ref for ref, _pad in endpoints))
+        for ref, pad_name in endpoints:
+            yield format_row([net_name, ref, pad_name, connector_count])
+
+
+def iter_matrix_csv(xref):
+    """
+    Yields the connector x connector shared-net matrix as CSV (diagonal: nets on the connector).
+    """
+    format_row = csv_row_formatter()
+    yield format_row([""] + xref.connectors)
+    for ref_a in xref.connectors:
+        yield format_row([ref_a] + [xref.shared(ref_a, ref_b) for ref_b in xref.connectors])
+
+
+def iter_crossref_markdown(xref):
+    """
+    Yields the Markdown report: the shared-net matrix, then one row per net with all its endpoints.
+    """
+    yield "# Connector Net Cross-Reference\n\n"
+    yield f"{len(xref.connectors)} connectors, {len(xref.endpoints_by_net)} nets.\n\n"
+
+    if xref.connectors:
+        yield "## Shared Nets Matrix\n\n"
+        yield "| | " + " | ".join(xref.connectors) + " |\n"
+        yield "|:---|" + "---:|" * len(xref.connectors) + "\n"
+        for ref_a in xref.connectors:
+            yield f"| **{ref_a}** | " + " | ".join(str(xref.shared(ref_a, ref_b)) for ref_b in xref.connectors) + " |\n"
+        yield "\n"
+
+    yield "## Nets\n\n"
+    yield "| Net Name | Endpoints |\n"
+    yield "|:---------|:---------|\n"
+    for net_name in xref.net_names():
+        endpoints = ", ".join(f"{ref}.{pad_name}" for ref, pad_name in xref.endpoints_by_net[net_name])
+        yield f"| {net_name} | {endpoints} |\n"
+    yield "\n"
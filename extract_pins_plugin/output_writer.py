@@ -0,0 +1,373 @@
+# output_writer.py
+"""
+OUTPUT WRITER
+
+Atomic, streaming output files. Text is written chunk by chunk into a temporary file in the
+destination directory; only when the whole document has been written is it flushed to disk
+and renamed over the target (os.replace, atomic on the same file system). A crash, an error
+or a cancelled export therefore never leaves a truncated file behind, and an existing file
+is only replaced by a complete new one.
+
+Outputs can be compressed on the fly. The compression follows the file name:
+
+    '.gz'   gzip (standard library)
+    '.zst'  zstd (Python 3.14's compression.zstd, or the 'zstandard' package if installed)
+
+    with open_atomic("pinout.csv.gz") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    print(f.stats.summary()) # "12.3 MB -> 1.1 MB in 0.42s (29.3 MB/s)"
+
+open_text() reads such files back (plain or compressed). This module does not import wx or pcbnew.
+"""
+
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from . import instrumentation
+
+WRITE_BUFFER_SIZE = 1 << 16
+GZIP_LEVEL = 6 # zlib's default trade-off; 9 is much slower for a few percent
+BYTES_UNCOMPRESSED = "bytes_uncompressed" # Tracer counter: encoded text before compression
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+try:
+    from compression import zstd as _zstd # Python 3.14+
+except ImportError:
+    _zstd = None
+try:
+    import zstandard as _zstandard
+except ImportError:
+    _zstandard = None
+
+
+def _read_umask():
+    """
+    Returns the process umask from /proc (Linux), or None where that is not available.
+    os.umask() can only read it by setting it, which would briefly change it for every
+    thread of KiCad's process.
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+_UMASK = _read_umask() # Temporary files are created 0600; outputs get the usual permissions
+_TOGGLED_UMASK = None
+
+
+def available_compressions():
+    """
+    Returns the compression names that can be used here, always starting with 'none'.
+    """
+    names = ["none", "gzip"]
+    if _zstd is not None or _zstandard is not None:
+        names.append("zstd")
+    return names
+
+
+def compression_for_path(path):
+    """
+    Returns 'gzip', 'zstd' or None from the file name's extension.
+    """
+    lower = path.lower()
+    for name, suffix in COMPRESSION_SUFFIXES.items():
+        if lower.endswith(suffix):
+            return name
+    return None
+
+
+def compressed_path(path, compression):
+    """
+    Appends the suffix of a compression ('none'/None leave the path alone) unless already there.
+    """
+    suffix = COMPRESSION_SUFFIXES.get(compression or "none", "")
+    if suffix and not path.lower().endswith(suffix):
+        return path + suffix
+    return path
+
+
+def _temp_file(path):
+    directory = os.path.dirname(os.path.abspath(path))
+    return tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+
+
+def _toggled_umask():
+    """
+    Reads the umask by setting and restoring it: the last resort, for a new file where
+    /proc is not available. Done once, the value is kept.
+    """
+    global _TOGGLED_UMASK
+    if _TOGGLED_UMASK is None:
+        _TOGGLED_UMASK = os.umask(0)
+        os.umask(_TOGGLED_UMASK)
+    return _TOGGLED_UMASK
+
+
+def _publish(temp_path, path):
+    if _UMASK is not None:
+        os.chmod(temp_path, 0o666 & ~_UMASK)
+    else:
+        try:
+            shutil.copymode(path, temp_path) # Keep the permissions of the file being replaced
+        except OSError:
+            os.chmod(temp_path, 0o666 & ~_toggled_umask())
+    os.replace(temp_path, path)
+
+
+def temporary_path(path):
+    """
+    Creates an empty temporary file next to 'path' (same directory, so it can be renamed over
+    it) and returns its name, for writers that need a file name instead of a stream (SQLite).
+    Finish with move_into_place(), or remove it on failure.
+    """
+    handle, temp_path = _temp_file(path)
+    os.close(handle)
+    return temp_path
+
+
+def move_into_place(temp_path, path):
+    """
+    Flushes a finished temporary file to disk and atomically renames it to 'path'.
+    """
+    handle = os.open(temp_path, os.O_RDWR)
+    try:
+        os.fsync(handle)
+    finally:
+        os.close(handle)
+    _publish(temp_path, path)
+
+
+def _compressor(raw, compression):
+    """
+    Wraps a binary file in a compressing stream. Closing the stream does not close 'raw'.
+    """
+    if compression == "gzip":
+        # mtime=0: the same content gives the same bytes, so unchanged exports compare equal
+        return gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=GZIP_LEVEL, mtime=0)
+    if compression == "zstd":
+        if _zstd is not None:
+            return _zstd.ZstdFile(raw, "wb")
+        if _zstandard is not None:
+            return _zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+        raise ValueError("zstd compression needs Python 3.14 or the 'zstandard' package.")
+    raise ValueError(f"Unknown compression '{compression}' (expected one of {', '.join(available_compressions())}).")
+
+
+class _ByteCounter(io.RawIOBase):
+    """
+    Passes bytes through to a stream, counting them (the uncompressed size).
+    """
+
+    def __init__(self, target):
+        super(_ByteCounter, self).__init__()
+        self.target = target
+        self.count = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.count += len(data)
+        self.target.write(data)
+        return len(data)
+
+
+class WriteStats:
+    """
+    Sizes and duration of one written file.
+    """
+
+    def __init__(self, path, bytes_in, bytes_out, seconds):
+        self.path = path
+        self.bytes_in = bytes_in # Encoded text, before compression
+        self.bytes_out = bytes_out # Size on disk
+        self.seconds = seconds
+
+    def mb_per_second(self):
+        return self.bytes_in / 1e6 / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self):
+        size = f"{self.bytes_in / 1e6:.1f} MB"
+        if self.bytes_out != self.bytes_in:
+            size += f" -> {self.bytes_out / 1e6:.1f} MB"
+        return f"{size} in {self.seconds:.2f}s ({self.mb_per_second():.1f} MB/s)"
+
+
+class AtomicWriter:
+    """
+    Text file that appears at 'path' only once it has been completely written and closed.
+    Use as a context manager (an exception discards the file) or call commit() / abort().
+    commit() is finish() (complete the temporary file on disk) followed by publish() (rename
+    it over 'path'); writers of several files finish all of them before publishing any.
+
+    Attributes:
+        stats: WriteStats, set by commit().
+    """
+
+    def __init__(self, path, compression=None, buffer_size=WRITE_BUFFER_SIZE, sync=True):
+        """
+        Args:
+            compression: 'none', 'gzip' or 'zstd'; None picks it from the file name ('.gz', '.zst').
+            sync: fsync before the rename, so the new content survives a power loss. Writers of
+                  many small files that can detect and redo a lost one may skip it.
+        """
+        self.path = path
+        self.sync = sync
+        self.compression = compression_for_path(path) if compression is None else compression
+        if self.compression == "none":
+            self.compression = None
+        self.stats = None
+        self._start = time.perf_counter()
+        handle, self.temp_path = _temp_file(path)
+        # Text arrives in buffer_size blocks; only the compressor's small output pieces need buffering
+        self._raw = os.fdopen(handle, "wb", buffering=buffer_size if self.compression else 0)
+        try:
+            self._compressed = _compressor(self._raw, self.compression) if self.compression else None
+            self._counter = _ByteCounter(self._compressed if self._compressed is not None else self._raw)
+            # newline='' leaves the CSV writer's own line endings untouched
+            self._text = io.TextIOWrapper(io.BufferedWriter(self._counter, buffer_size), encoding="utf-8", newline="")
+        except BaseException:
+            self._discard()
+            raise
+        self.finished = False
+        self.closed = False
+
+    def write(self, text):
+        return self._text.write(text)
+
+    def writelines(self, chunks):
+        write = self._text.write
+        for chunk in chunks:
+            write(chunk)
+
+    def finish(self):
+        """
+        Completes the temporary file and flushes it to disk, without replacing 'path' yet.
+        Follow with publish(), or abort() to drop it.
+        """
+        if self.finished:
+            return
+        try:
+            self._text.close() # Flushes into the compressor / file, which stay open
+            if self._compressed is not None:
+                self._compressed.close() # Writes the gzip trailer / ends the zstd frame
+            self._raw.flush()
+            if self.sync:
+                os.fsync(self._raw.fileno())
+            self._raw.close()
+            bytes_out = os.path.getsize(self.temp_path)
+        except BaseException:
+            self._discard()
+            raise
+        self.finished = True
+        self.stats = WriteStats(self.path, self._counter.count, bytes_out, time.perf_counter() - self._start)
+
+    def publish(self):
+        """
+        Moves the finished file into place (finishing it first if needed). Returns the WriteStats.
+        """
+        if self.closed:
+            return self.stats
+        self.finish()
+        try:
+            _publish(self.temp_path, self.path)
+        except BaseException:
+            self._discard()
+            raise
+        self.closed = True
+        tracer = instrumentation.active_tracer()
+        if tracer.enabled:
+            tracer.count(instrumentation.BYTES_WRITTEN, self.stats.bytes_out)
+            tracer.count(BYTES_UNCOMPRESSED, self.stats.bytes_in)
+        print(f"DEBUG: Wrote '{self.path}': {self.stats.summary()}")
+        return self.stats
+
+    def commit(self):
+        """
+        Flushes everything to disk and moves the file into place. Returns the WriteStats.
+        """
+        return self.publish()
+
+    def abort(self):
+        """
+        Drops the temporary file; the target path is left untouched.
+        """
+        if not self.closed:
+            self._discard()
+
+    def _discard(self):
+        self.closed = True
+        for stream in (getattr(self, "_text", None), getattr(self, "_compressed", None), self._raw):
+            try:
+                if stream is not None:
+                    stream.close()
+            except Exception:
+                pass
+        try:
+            os.remove(self.temp_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+
+def open_atomic(path, compression=None, buffer_size=WRITE_BUFFER_SIZE, sync=True):
+    """
+    Returns an AtomicWriter for 'path' (see AtomicWriter for the arguments).
+    """
+    return AtomicWriter(path, compression, buffer_size, sync)
+
+
+def write_bytes_atomic(path, data, sync=True):
+    """
+    Replaces 'path' with 'data' (bytes, already encoded) in one go, the same way AtomicWriter
+    does: temporary file, optional fsync, rename. For small files that are built in memory.
+    """
+    handle, temp_path = _temp_file(path)
+    try:
+        with os.fdopen(handle, "wb", buffering=0) as f:
+            f.write(data)
+            if sync:
+                os.fsync(f.fileno())
+        _publish(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def open_text(path, newline=None):
+    """
+    Opens a text file for reading, decompressing '.gz' / '.zst' files.
+    """
+    compression = compression_for_path(path)
+    if compression == "gzip":
+        return gzip.open(path, "rt", encoding="utf-8", newline=newline)
+    if compression == "zstd":
+        if _zstd is not None:
+            return _zstd.open(path, "rt", encoding="utf-8", newline=newline)
+        if _zstandard is not None:
+            return _zstandard.open(path, "rt", encoding="utf-8", newline=newline)
+        raise ValueError("Reading zstd files needs Python 3.14 or the 'zstandard' package.")
+    return open(path, "r", encoding="utf-8", newline=newline)
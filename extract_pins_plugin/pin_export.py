@@ -0,0 +1,698 @@
+# pin_export.py
+"""
+PIN EXPORT
+
+GUI-free core of the plugin: selecting and filtering footprints of a BoardSnapshot,
+extracting their properties and pins, and rendering Markdown / CSV.
+
+Used by the dialog (plugin_dialog.py) and by the headless batch exporter (batch_export.py),
+so both produce identical output. Nothing in here imports wx or pcbnew.
+"""
+
+import csv
+import re
+import time
+
+from . import instrumentation
+from .board_snapshot import CONNECTOR_TYPE_FIELD, NO_NET
+from .output_writer import WRITE_BUFFER_SIZE, open_atomic
+from .wildcard_matcher import compile_wildcards
+
+# Columns written when the caller does not pass an explicit selection (everything the dialog offers)
+DEFAULT_COLUMNS = [
+    "Reference", "Value", "Description", "Layer",
+    "Position", "Rotation", "Connector Type",
+    "Pad Name/Number", "Net Name"
+]
+
+
+PIN_COLUMNS = ("Pad Name/Number", "Net Name", "Pins (Aggregated)")
+
+
+def with_extra_field_columns(selected_columns, extra_fields):
+    """
+    Returns the column list with custom field columns inserted right after the general properties.
+    """
+    columns = list(selected_columns)
+    insert_at = len([c for c in columns if c not in PIN_COLUMNS])
+    columns[insert_at:insert_at] = [f for f in extra_fields if f not in columns and f not in DEFAULT_COLUMNS]
+    return columns
+
+
+def natural_sort_key(text):
+    """
+    Helper for natural sorting (e.g., J1, J2, J10 instead of J1, J10, J2).
+    """
+    return [int(s) if s.isdigit() else s.lower() for s in re.split('([0-9]+)', text)]
+
+
+# --- Footprint selection ---
+
+def select_rows_by_reference(snapshot, reference_pattern="J*"):
+    """
+    Returns the rows whose reference designator matches a wildcard pattern list (e.g. 'J*').
+    """
+    reference_matcher = compile_wildcards(reference_pattern)
+    return [row for row in snapshot.all_rows() if reference_matcher(snapshot.reference(row))]
+
+
+def select_rows_by_field(snapshot, type_filter_text, type_field=CONNECTOR_TYPE_FIELD):
+    """
+    Returns the rows whose 'type_field' value matches any of the comma-separated
+    wildcard patterns, in board order.
+    """
+    type_matcher = compile_wildcards(type_filter_text)
+    # Each distinct value of the type field is matched once; rows are sorted back into board order
+    return sorted(snapshot.field_index().rows_matching(type_field, type_matcher))
+
+
+def apply_text_filters(snapshot, rows, value_filter_text="", net_name_filter_text=""):
+    """
+    Applies Value and Net Name filters to a list of snapshot footprint rows, supporting wildcards.
+    Returns a new filtered list of rows.
+    """
+    filtered = list(rows)
+    value_filter_text = value_filter_text.strip()
+    net_name_filter_text = net_name_filter_text.strip()
+
+    # Apply Value filter with wildcard support
+    if value_filter_text:
+        value_matcher = compile_wildcards(value_filter_text, comma_separated=False)
+        filtered = [row for row in filtered if value_matcher(snapshot.value(row))]
+        print(f"DEBUG: Applied Value filter '{value_filter_text}'. Found {len(filtered)} FPs.")
+
+    # Apply Net Name filter (for footprints with *any* matching pin) with wildcard support
+    # This filter is applied to the footprints themselves, not to their pins.
+    if net_name_filter_text:
+        # For footprint-level filtering, we want to check if *any* of the comma-separated patterns match
+        net_matcher = compile_wildcards(net_name_filter_text)
+
+        if net_matcher: # Only apply if there are valid patterns
+            # Resolve the matching nets from the index keys, then keep the candidates
+            # that sit on any of them; no pad is visited.
+            rows_on_matching_nets = snapshot.net_index().footprints_matching(net_matcher)
+            filtered = [row for row in filtered if row in rows_on_matching_nets]
+            print(f"DEBUG: Applied Net Name filter (footprint-level) '{net_name_filter_text}'. Found {len(filtered)} FPs.")
+
+    return filtered
+
+
+def pins_on_matching_nets(snapshot, net_name_filter_text):
+    """
+    Resolves a Net Name filter (comma-separated wildcards) to the pins it keeps, for extracting
+    only those: {footprint row: flat pad indexes}, or None if the filter is empty (every pin is kept).
+    Pins without a net never match.
+    """
+    net_matcher = compile_wildcards(net_name_filter_text)
+    if not net_matcher:
+        return None
+    return snapshot.net_index().pads_by_footprint(net_matcher)
+
+
+# --- Extraction ---
+
+def _format_description(record):
+    description = record.description
+    return description if description and description != "No description" else "N/A"
+
+
+# General properties, formatted from a record's raw values only when output asks for them
+_PROPERTY_FORMATTERS = {
+    "Reference": lambda record: record.reference,
+    "Value": lambda record: record.value,
+    "Footprint Name": lambda record: record.footprint_name,
+    "Description": _format_description,
+    "Layer": lambda record: record.layer,
+    "Position": lambda record: f"({record.pos_x / 1000000.0:.2f}mm, {record.pos_y / 1000000.0:.2f}mm)",
+    "Rotation": lambda record: f"{record.rotation:.1f}°",
+    "Connector Type": lambda record: record.connector_type if record.connector_type is not None else "",
+}
+
+
+class ComponentRecord:
+    """
+    Extracted data of one footprint.
+
+    Pins are two parallel tuples of the snapshot's interned strings (pad names, net names).
+    There is no per-pad object. The CSV view is 'csv_pins', a tuple of pin indexes left
+    after the CSV pin filters, or None when every pin is kept. Properties keep their raw
+    values (position in nanometres, rotation in degrees) and are formatted when output
+    asks for them (get()).
+
+    For code written against the dicts extract_data used to return, record["general_properties"],
+    record["pin_data"] and record["filtered_pins_for_csv"] build those dicts on access.
+    """
+    __slots__ = ("reference", "value", "footprint_name", "description", "layer", "pos_x", "pos_y", "rotation",
+                 "connector_type", "extra", "pad_names", "net_names", "csv_pins")
+
+    def __init__(self, reference, value, footprint_name, description, layer, pos_x, pos_y, rotation,
+                 connector_type, extra, pad_names, net_names, csv_pins):
+        self.reference = reference
+        self.value = value
+        self.footprint_name = footprint_name
+        self.description = description
+        self.layer = layer
+        self.pos_x = pos_x
+        self.pos_y = pos_y
+        self.rotation = rotation
+        self.connector_type = connector_type # None if the footprint has no such field
+        self.extra = extra # ((field name, text or None), ...) for the extra field columns
+        self.pad_names = pad_names
+        self.net_names = net_names # "" for pins without a net
+        self.csv_pins = csv_pins
+
+    def __contains__(self, name):
+        """
+        True if 'name' is one of the general properties (including extra field columns).
+        """
+        return name in _PROPERTY_FORMATTERS or any(field_name == name for field_name, _text in self.extra)
+
+    def get(self, name, default=None):
+        """
+        Returns the formatted general property 'name', like general_properties().get(name, default).
+        """
+        formatter = _PROPERTY_FORMATTERS.get(name)
+        if formatter is not None:
+            return formatter(self)
+        for field_name, text in self.extra:
+            if field_name == name:
+                return text if text is not None else ""
+        return default
+
+    def general_properties(self):
+        properties = {name: formatter(self) for name, formatter in _PROPERTY_FORMATTERS.items()}
+        for field_name, text in self.extra:
+            properties[field_name] = text if text is not None else ""
+        return properties
+
+    def pin_count(self):
+        return len(self.pad_names)
+
+    def csv_pin_indexes(self):
+        return self.csv_pins if self.csv_pins is not None else range(len(self.pad_names))
+
+    def __getitem__(self, key):
+        if key == "general_properties":
+            return self.general_properties()
+        if key == "pin_data":
+            return [{"Pad Name/Number": pad, "Net Name": net} for pad, net in zip(self.pad_names, self.net_names)]
+        if key == "filtered_pins_for_csv":
+            return [{"Pad Name/Number": self.pad_names[i], "Net Name": self.net_names[i]}
+                    for i in self.csv_pin_indexes()]
+        raise KeyError(key)
+
+
+def _extract_component(snapshot, row, ignore_unconnected_pins_for_csv, ignore_free_pins_for_csv,
+                       type_field, extra_fields, pad_indexes=None):
+    """
+    Builds the ComponentRecord of one footprint row: raw properties, all pins (Markdown)
+    and the indexes of the pins left after the CSV pin filters. With 'pad_indexes' (flat pad
+    indexes of the footprint) only those pins are read.
+    """
+    strings = snapshot.strings
+    if type_field == CONNECTOR_TYPE_FIELD:
+        connector_type = snapshot.connector_type(row)
+    else:
+        connector_type = snapshot.field(row, type_field)
+    extra = []
+    for field_name in extra_fields:
+        if field_name not in _PROPERTY_FORMATTERS and all(name != field_name for name, _text in extra):
+            extra.append((field_name, snapshot.field(row, field_name)))
+
+    if pad_indexes is None:
+        pads = snapshot.pads(row)
+        pad_names = tuple([strings[i] for i in snapshot.pad_name[pads.start:pads.stop]])
+        net_codes = snapshot.pad_net_code[pads.start:pads.stop]
+        net_name_ids = snapshot.pad_net_name[pads.start:pads.stop]
+    else:
+        pad_names = tuple([strings[snapshot.pad_name[i]] for i in pad_indexes])
+        net_codes = [snapshot.pad_net_code[i] for i in pad_indexes]
+        net_name_ids = [snapshot.pad_net_name[i] for i in pad_indexes]
+    net_names = tuple([strings[i] if code != NO_NET else "" for i, code in zip(net_name_ids, net_codes)])
+
+    # CSV pin filters: only the indexes of the kept pins are stored, and only if some pin was dropped
+    csv_pins = None
+    if ignore_unconnected_pins_for_csv or ignore_free_pins_for_csv:
+        kept = [i for i, (net_name, code) in enumerate(zip(net_names, net_codes))
+                if not (ignore_unconnected_pins_for_csv and net_name.lower() == "unconnected")
+                and not (ignore_free_pins_for_csv and code == NO_NET)]
+        if len(kept) != len(net_names):
+            csv_pins = tuple(kept)
+
+    return ComponentRecord(
+        snapshot.reference(row), snapshot.value(row), strings[snapshot.fp_fpid[row]],
+        strings[snapshot.fp_description[row]], strings[snapshot.fp_layer[row]],
+        snapshot.fp_pos_x[row], snapshot.fp_pos_y[row], snapshot.fp_rotation[row],
+        connector_type, tuple(extra), pad_names, net_names, csv_pins)
+
+
+def iter_extracted(snapshot, rows_to_process, ignore_unconnected_pins_for_csv=False, ignore_free_pins_for_csv=False,
+                   type_field=CONNECTOR_TYPE_FIELD, extra_fields=(), progress_callback=None, pin_net_filter=""):
+    """
+    Streaming form of extract_data: yields (reference, component_data) one footprint at a time,
+    so only a single component is held in memory. Pass the rows through unique_reference_rows
+    first to get exactly the components extract_data would return.
+
+    Args:
+        progress_callback: Optional callable(done, total), called once per footprint.
+        pin_net_filter: Net Name filter pushed down to the pins: if set, only pins on a matching
+                        net are extracted (and written); the other pads are never read.
+    """
+    tracer = instrumentation.active_tracer()
+    selected_pads = pins_on_matching_nets(snapshot, pin_net_filter) if pin_net_filter else None
+    total_footprints = len(rows_to_process)
+    for i, row in enumerate(rows_to_process):
+        if progress_callback is not None:
+            progress_callback(i, total_footprints)
+        pad_indexes = selected_pads.get(row, ()) if selected_pads is not None else None
+        if tracer.enabled:
+            start = time.perf_counter()
+            component = _extract_component(snapshot, row, ignore_unconnected_pins_for_csv,
+                                           ignore_free_pins_for_csv, type_field, extra_fields, pad_indexes)
+            tracer.add_time("extract", time.perf_counter() - start)
+            tracer.count(instrumentation.FOOTPRINTS)
+            tracer.count(instrumentation.PADS_SCANNED,
+                         snapshot.pad_count(row) if pad_indexes is None else len(pad_indexes))
+            yield snapshot.reference(row), component
+        else:
+            yield snapshot.reference(row), _extract_component(snapshot, row, ignore_unconnected_pins_for_csv,
+                                                              ignore_free_pins_for_csv, type_field, extra_fields,
+                                                              pad_indexes)
+
+
+def extract_data(snapshot, rows_to_process, ignore_unconnected_pins_for_csv=False, ignore_free_pins_for_csv=False,
+                 type_field=CONNECTOR_TYPE_FIELD, extra_fields=(), progress_callback=None, pin_net_filter=""):
+    """
+    Extracts relevant properties and pin details for the given board snapshot rows.
+    Applies pin filtering for CSV based on ignore_unconnected_pins_for_csv and ignore_free_pins_for_csv flags.
+    'type_field' is the field reported as "Connector Type", 'extra_fields' are custom fields added as columns.
+    With 'pin_net_filter' only the pins on matching nets are extracted (see iter_extracted).
+
+    Args:
+        progress_callback: Optional callable(done, total), called once per footprint.
+
+    Returns a dictionary of ComponentRecord organized by footprint reference designator.
+    """
+    return dict(iter_extracted(snapshot, rows_to_process, ignore_unconnected_pins_for_csv, ignore_free_pins_for_csv,
+                               type_field, extra_fields, progress_callback, pin_net_filter))
+
+
+def unique_reference_rows(snapshot, rows):
+    """
+    Returns one row per reference designator, reproducing the dict semantics of extract_data:
+    a reference keeps the position where it was first seen and the data of its last footprint.
+    """
+    last_row_by_ref = {}
+    for row in rows:
+        last_row_by_ref[snapshot.reference(row)] = row
+    return list(last_row_by_ref.values())
+
+
+def sort_rows_by_reference(snapshot, rows):
+    """
+    Returns the rows in natural reference order (C1, J1, J2, J10, U1), before anything is extracted.
+    """
+    return sorted(rows, key=lambda row: natural_sort_key(snapshot.reference(row)))
+
+
+def sort_by_reference(data_by_footprint):
+    """
+    Returns the extracted data re-ordered by natural reference order (C1, J1, J2, J10, U1).
+    """
+    sorted_refs = sorted(data_by_footprint.keys(), key=lambda k: natural_sort_key(data_by_footprint[k].reference))
+    return {ref: data_by_footprint[ref] for ref in sorted_refs}
+
+
+def collect_unique_nets(snapshot, rows, ignore_unconnected_pins=False, progress_callback=None):
+    """
+    Returns the set of net names found on the pads of the given footprint rows
+    (pins without a net never contribute a name). 'unconnected' nets can be left out.
+
+    Args:
+        progress_callback: Optional callable(done, total), called once per footprint.
+    """
+    unique_nets = set()
+    tracer = instrumentation.active_tracer()
+    total_footprints = len(rows)
+    for i, row in enumerate(rows):
+        if progress_callback is not None:
+            progress_callback(i, total_footprints)
+        if tracer.enabled:
+            tracer.count(instrumentation.FOOTPRINTS)
+            tracer.count(instrumentation.PADS_SCANNED, snapshot.pad_count(row))
+        for pad_idx in snapshot.pads(row):
+            if not snapshot.has_net(pad_idx):
+                continue # Free pins have no net name to collect, whether or not they are ignored
+            net_name = snapshot.net_name_of(pad_idx)
+            if ignore_unconnected_pins and net_name.lower() == "unconnected":
+                continue
+            unique_nets.add(net_name)
+    return unique_nets
+
+
+# --- Output generation ---
+# The iter_* renderers take an iterable of (reference, component_data) pairs (e.g. iter_extracted(...)
+# or data_by_footprint.items()) and yield the document piece by piece, one component at a time.
+
+MARKDOWN_TITLE = "# Extracted Component Pin Data\n\n"
+
+MARKDOWN_NET_PALETTE = [
+    "#FF0000", "#008000", "#0000FF", "#FFA500", "#800080", "#00FFFF", "#FFC0CB", "#00FF7F", "#8B4513",
+    "#A52A2A", "#6A5ACD", "#D2691E", "#4682B4", "#BDB76B", "#FFD700"
+]
+
+
+def render_markdown_head(ref, component_data, selected_columns):
+    """
+    Renders the part of a component's Markdown section that comes before its pin rows.
+
+    Returns:
+        (text, pin_columns): pin_columns are the columns of the pin table whose rows follow
+        (see render_markdown_pin_row), or [] if the section has no pin table; 'text' is then
+        the whole section.
+    """
+    general_props = component_data # Properties are formatted on access
+    pin_count = component_data.pin_count() # Markdown lists every pin, unfiltered
+    pin_headers_to_include = [col for col in selected_columns if col in ["Pad Name/Number", "Net Name"]]
+
+    parts = [f"## Component: {ref}\n\n"]
+
+    general_headers_to_include = [col for col in selected_columns if col in general_props]
+    if general_headers_to_include:
+        parts.append("### General Properties\n\n")
+        parts.append("| " + " | ".join(general_headers_to_include) + " |\n")
+        parts.append("|:" + "---------|:---------".join([""] * len(general_headers_to_include)) + "|\n")
+
+        row_values = []
+        for header in general_headers_to_include:
+            if header == "Position":
+                row_values.append(general_props.get("Position (X, Y)", "N/A"))
+            elif header == "Rotation":
+                row_values.append(general_props.get("Rotation", "N/A"))
+            else: # This covers Reference, Value, Description, Layer, Connector Type, Footprint Name
+                row_values.append(str(general_props.get(header, "N/A")))
+        parts.append("| " + " | ".join(row_values) + " |\n")
+        parts.append("\n")
+
+    if pin_count and pin_headers_to_include:
+        parts.append("### Pin Details\n\n")
+        parts.append("| " + " | ".join(pin_headers_to_include) + " |\n")
+        parts.append("|:" + "----------------|:---------".join([""] * len(pin_headers_to_include)) + "|\n")
+        return "".join(parts), pin_headers_to_include
+    elif pin_count and not pin_headers_to_include:
+        parts.append("Pin details available but no pin columns selected.\n\n")
+    else:
+        parts.append("No pins found for this component.\n\n")
+    return "".join(parts), []
+
+
+MARKDOWN_PIN_TABLE_END = "\n"
+
+
+def _markdown_net_cell(net_name, net_color):
+    if net_color is None or net_name == "N/A" or net_name == "":
+        return net_name
+    return f'<span style="color: {net_color(net_name)};">{net_name}</span>'
+
+
+def render_markdown_pin_row(component_data, index, pin_columns, net_color=None):
+    """
+    Renders the pin table row of pin 'index' (see render_markdown_head for 'pin_columns').
+    """
+    values = [component_data.pad_names[index] if header == "Pad Name/Number"
+              else _markdown_net_cell(component_data.net_names[index], net_color)
+              for header in pin_columns]
+    return "| " + " | ".join(values) + " |\n"
+
+
+def render_markdown_component(ref, component_data, selected_columns, net_color=None):
+    """
+    Renders the Markdown section of one component (a ComponentRecord): the head, one row per
+    pin (render_markdown_pin_row, here done column-wise for speed) and the end of the table.
+
+    Args:
+        net_color: Optional callable(net_name) returning the highlight colour of a net;
+                   None renders net names without highlighting.
+    """
+    head, pin_columns = render_markdown_head(ref, component_data, selected_columns)
+    if not pin_columns:
+        return head
+
+    parts = [head]
+    columns = []
+    for header in pin_columns:
+        values = component_data.pad_names if header == "Pad Name/Number" else component_data.net_names
+        if header == "Net Name" and net_color is not None:
+            values = [_markdown_net_cell(val, net_color) for val in values]
+        columns.append(values)
+    for row_values in zip(*columns):
+        parts.append("| " + " | ".join(row_values) + " |\n")
+    parts.append(MARKDOWN_PIN_TABLE_END)
+    return "".join(parts)
+
+
+def markdown_net_colorizer():
+    """
+    Returns a net_color(net_name) function for one document: colours are handed out
+    in order of first appearance over the whole document.
+    """
+    net_colors_map = {}
+
+    def net_color(net_name):
+        color = net_colors_map.get(net_name)
+        if color is None:
+            color = MARKDOWN_NET_PALETTE[len(net_colors_map) % len(MARKDOWN_NET_PALETTE)]
+            net_colors_map[net_name] = color
+        return color
+    return net_color
+
+
+def iter_markdown(components, apply_highlight=False, selected_columns=None):
+    """
+    Yields the Markdown document (one section per component) chunk by chunk.
+    Markdown always lists every pin, the CSV pin filters do not apply here.
+    """
+    yield MARKDOWN_TITLE
+
+    if selected_columns is None:
+        selected_columns = DEFAULT_COLUMNS
+
+    net_color = markdown_net_colorizer() if apply_highlight else None
+
+    tracer = instrumentation.active_tracer()
+    for ref, component_data in components:
+        if tracer.enabled:
+            start = time.perf_counter()
+            chunk = render_markdown_component(ref, component_data, selected_columns, net_color)
+            tracer.add_time("render_markdown", time.perf_counter() - start)
+            yield chunk
+        else:
+            yield render_markdown_component(ref, component_data, selected_columns, net_color)
+
+
+def generate_markdown(data_by_footprint, apply_highlight=False, selected_columns=None):
+    """
+    Renders the extracted data as a Markdown document (one section per component).
+    """
+    return "".join(iter_markdown(data_by_footprint.items(), apply_highlight, selected_columns))
+
+
+class _CsvLine:
+    """
+    Minimal file-like target for csv.writer that only keeps the last written row,
+    so rows can be formatted one by one without growing a StringIO.
+    """
+
+    def __init__(self):
+        self.text = ""
+
+    def write(self, text):
+        self.text = text
+
+
+def csv_row_formatter():
+    """
+    Returns a format_row(values) function that turns one row into a CSV line.
+    """
+    line = _CsvLine()
+    writer = csv.writer(line)
+
+    def format_row(row):
+        writer.writerow(row)
+        return line.text
+    return format_row
+
+
+# Map display name to internal storage key for general properties
+CSV_GENERAL_PROPERTY_KEYS = {
+    "Reference": "Reference", "Value": "Value", "Footprint Name": "Footprint Name",
+    "Description": "Description", "Layer": "Layer",
+    "Position": "Position (X, Y)", "Rotation": "Rotation",
+    "Connector Type": "Connector Type"
+}
+
+# Fixed headers for the pin rows (as requested)
+CSV_PIN_ROW_HEADERS = ["Connector Name", "Pin Number", "Net Name"]
+
+
+def render_csv_head(ref, component_data, selected_columns, format_row):
+    """
+    Renders the CSV rows of one component that come before its pin rows: a "Component:" row,
+    the selected general properties as key/value rows and the pin header row.
+
+    Returns:
+        (text, pin_indexes): the (CSV-filtered) pins whose rows follow (see render_csv_pin_row),
+        empty if the component has no pin rows. 'text' is "" if there is nothing to write.
+    """
+    general_props = component_data # Properties are formatted on access
+    filtered_pins_for_csv = component_data.csv_pin_indexes() # Use the filtered pins
+    include_pin_rows = ("Pad Name/Number" in selected_columns) or ("Net Name" in selected_columns)
+    parts = []
+
+    # --- Write Connector Properties Section ---
+    # Custom field columns are stored under their own name
+    general_headers_to_include = [col for col in selected_columns
+                                  if col in CSV_GENERAL_PROPERTY_KEYS or col in general_props]
+
+    # Only write general properties section if general properties are selected OR if there are pins to list
+    if general_headers_to_include or filtered_pins_for_csv:
+        parts.append(format_row([f"Component: {ref}"])) # Section header for the component
+
+        if general_headers_to_include: # Only write properties if columns are selected
+            # Write general properties as key-value pairs
+            for col_display_name in general_headers_to_include:
+                col_storage_name = CSV_GENERAL_PROPERTY_KEYS.get(col_display_name, col_display_name)
+                value = general_props.get(col_storage_name, "")
+                parts.append(format_row([col_display_name, value]))
+        # No blank row needed here as per request
+
+    # --- Write Pin Details Section ---
+    # Only write pin section if pin details are selected for output AND there are filtered pins
+    if filtered_pins_for_csv and include_pin_rows:
+        parts.append(format_row(CSV_PIN_ROW_HEADERS)) # Write pin headers
+        return "".join(parts), filtered_pins_for_csv
+    return "".join(parts), ()
+
+
+def render_csv_pin_row(component_data, index, format_row):
+    """
+    Renders the CSV row of pin 'index': Connector Name (Reference), Pin Number, Net Name.
+    """
+    return format_row([component_data.reference, component_data.pad_names[index], component_data.net_names[index]])
+
+
+def render_csv_component(ref, component_data, selected_columns, format_row):
+    """
+    Renders the CSV rows of one component: render_csv_head, then the (CSV-filtered) pin rows.
+    Returns "" if there is nothing to write.
+    """
+    head, pin_indexes = render_csv_head(ref, component_data, selected_columns, format_row)
+    if not pin_indexes:
+        return head
+    parts = [head]
+    reference = component_data.reference
+    pad_names = component_data.pad_names
+    net_names = component_data.net_names
+    for i in pin_indexes:
+        parts.append(format_row([reference, pad_names[i], net_names[i]]))
+    # No blank row needed here as per request
+    return "".join(parts)
+
+
+def iter_csv(components, selected_columns=None):
+    """
+    Yields the CSV output chunk by chunk (one chunk per component), see render_csv_component.
+    """
+    if selected_columns is None:
+        selected_columns = DEFAULT_COLUMNS
+
+    tracer = instrumentation.active_tracer()
+    format_row = csv_row_formatter()
+    for ref, component_data in components:
+        if tracer.enabled:
+            start = time.perf_counter()
+            chunk = render_csv_component(ref, component_data, selected_columns, format_row)
+            tracer.add_time("render_csv", time.perf_counter() - start)
+        else:
+            chunk = render_csv_component(ref, component_data, selected_columns, format_row)
+        if chunk:
+            yield chunk
+
+
+def generate_csv(data_by_footprint, selected_columns=None):
+    """
+    Renders the extracted data as CSV, see iter_csv.
+    """
+    return "".join(iter_csv(data_by_footprint.items(), selected_columns))
+
+
+# General properties as JSON members: the same names as the SQLite columns, raw values
+# (positions in mm, rotation in degrees, null where the footprint has none)
+JSON_PROPERTIES = {
+    "Reference": lambda record: (("reference", record.reference),),
+    "Value": lambda record: (("value", record.value),),
+    "Footprint Name": lambda record: (("footprint", record.footprint_name),),
+    "Description": lambda record: (("description", record.description if record.description
+                                                    and record.description != "No description" else None),),
+    "Layer": lambda record: (("layer", record.layer),),
+    "Position": lambda record: (("x_mm", record.pos_x / 1000000.0), ("y_mm", record.pos_y / 1000000.0)),
+    "Rotation": lambda record: (("rotation", record.rotation),),
+    "Connector Type": lambda record: (("connector_type", record.connector_type),),
+}
+
+
+def json_properties(component_data, selected_columns):
+    """
+    Returns the selected general properties of a record as a dict for the JSON outputs
+    (see JSON_PROPERTIES). 'reference' always comes first; custom field columns are
+    collected under 'fields'.
+    """
+    properties = {"reference": component_data.reference}
+    fields = {}
+    for column in selected_columns:
+        members = JSON_PROPERTIES.get(column)
+        if members is not None:
+            properties.update(members(component_data))
+            continue
+        for field_name, text in component_data.extra:
+            if field_name == column:
+                fields[field_name] = text
+    if fields:
+        properties["fields"] = fields
+    return properties
+
+
+def iter_unique_nets_csv(net_names):
+    """
+    Yields the unique-nets CSV (a header row, then one net per row) line by line.
+    """
+    format_row = csv_row_formatter()
+    yield format_row(["Unique Net Name"])
+    for net_name in net_names:
+        yield format_row([net_name])
+
+
+# --- File output ---
+
+def write_chunks(path, chunks, buffer_size=WRITE_BUFFER_SIZE):
+    """
+    Writes an iterable of text chunks to a file through a fixed-size write buffer, so output
+    reaches the disk while the chunks are still being produced. The file is written atomically
+    (a failed or cancelled write leaves no partial file, see output_writer.py) and compressed
+    if the name ends in '.gz' or '.zst'.
+    Returns the number of characters written.
+    """
+    tracer = instrumentation.active_tracer()
+    written = 0
+    with open_atomic(path, buffer_size=buffer_size) as f:
+        if tracer.enabled:
+            for chunk in chunks:
+                start = time.perf_counter()
+                f.write(chunk)
+                tracer.add_time("write", time.perf_counter() - start)
+                written += len(chunk)
+        else:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+    return written
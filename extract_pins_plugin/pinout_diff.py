@@ -0,0 +1,337 @@
+# pinout_diff.py
+"""
+PINOUT DIFF
+
+Compares the connector pinouts of two board revisions and lists, per connector, which pins
+were added or removed and which pins changed nets. Net changes are classified as
+
+  - renamed: the old net disappeared and every pin it was on is now on one new net
+  - moved:   the new net of the pin was already on another pin of the same connector
+  - changed: any other net change
+
+Either side can be a board (snapshot of the current board, or a .kicad_pcb file read with the
+S-expression reader) or a previously saved CSV / Markdown export of this plugin. Both sides are
+turned into (reference, pad, net) records, sorted on (reference, pad) and walked once in a
+merge, so two 50k-pad revisions compare in a fraction of a second.
+
+Command line (no KiCad needed):
+
+    python -m extract_pins_plugin.pinout_diff old.kicad_pcb new.kicad_pcb --output respin_diff
+    python -m extract_pins_plugin.pinout_diff js_components_v1.csv board_v2.kicad_pcb --mode type --type-filter harness
+"""
+
+import argparse
+import csv
+import os
+import re
+import sys
+
+from .board_snapshot import CONNECTOR_TYPE_FIELD
+from .output_writer import COMPRESSION_SUFFIXES, open_text
+from .pin_export import csv_row_formatter, natural_sort_key, unique_reference_rows
+
+ADDED = "added"
+REMOVED = "removed"
+RENAMED = "renamed"
+MOVED = "moved"
+CHANGED = "changed"
+CHANGE_KINDS = (ADDED, REMOVED, RENAMED, MOVED, CHANGED)
+
+_SPAN_RE = re.compile(r'<span[^>]*>(.*?)</span>')
+
+
+class PinChange:
+    """
+    One changed pin. 'old_net' is None for added pins, 'new_net' is None for removed pins.
+    'detail' explains renamed/moved changes.
+    """
+    __slots__ = ("kind", "reference", "pad", "old_net", "new_net", "detail")
+
+    def __init__(self, kind, reference, pad, old_net, new_net, detail=""):
+        self.kind = kind
+        self.reference = reference
+        self.pad = pad
+        self.old_net = old_net
+        self.new_net = new_net
+        self.detail = detail
+
+
+# --- Reading both sides into (reference, pad, net) records ---
+
+def pins_from_snapshot(snapshot, rows, ignore_unconnected_pins=False, ignore_free_pins=False):
+    """
+    Returns the (reference, pad, net) records of the given footprint rows. The pin filters
+    work like the CSV export options, so a board compares cleanly against a CSV saved with them.
+    """
+    records = []
+    for row in unique_reference_rows(snapshot, rows):
+        ref = snapshot.reference(row)
+        for pad_idx in snapshot.pads(row):
+            is_connected = snapshot.has_net(pad_idx)
+            net_name = snapshot.net_name_of(pad_idx) if is_connected else ""
+            if ignore_unconnected_pins and net_name.lower() == "unconnected":
+                continue
+            if ignore_free_pins and not is_connected:
+                continue
+            records.append((ref, snapshot.pad_name_of(pad_idx), net_name))
+    return records
+
+
+def read_csv_export(path):
+    """
+    Reads the pin rows ("Connector Name", "Pin Number", "Net Name") of a CSV written by the plugin.
+    """
+    records = []
+    in_pins = False
+    with open_text(path, newline='') as f:
+        for row in csv.reader(f):
+            if len(row) == 1 and row[0].startswith("Component: "):
+                in_pins = False
+            elif row == ["Connector Name", "Pin Number", "Net Name"]:
+                in_pins = True
+            elif in_pins and len(row) == 3:
+                records.append((row[0], row[1], row[2]))
+    return records
+
+
+def read_markdown_export(path):
+    """
+    Reads the "Pin Details" tables of a Markdown export written by the plugin. The export
+    must include both the "Pad Name/Number" and the "Net Name" columns.
+    """
+    records = []
+    ref = None
+    columns = None
+    in_pin_table = False
+    with open_text(path) as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith("## Component: "):
+                ref = line[len("## Component: "):]
+                in_pin_table = False
+            elif line.startswith("### Pin Details"):
+                in_pin_table = True
+                columns = None
+            elif in_pin_table and line.startswith("|"):
+                cells = [cell.strip() for cell in line.strip("|").split(" | ")]
+                if columns is None:
+                    columns = cells
+                elif not line.startswith("|:"):
+                    values = dict(zip(columns, cells))
+                    if "Pad Name/Number" not in values or "Net Name" not in values:
+                        raise ValueError(f"'{path}' has no 'Pad Name/Number' and 'Net Name' columns to compare.")
+                    records.append((ref, values["Pad Name/Number"], _SPAN_RE.sub(r'\1', values["Net Name"])))
+            elif line.strip():
+                in_pin_table = False
+    return records
+
+
+def read_export_pins(path):
+    """
+    Reads a saved .csv or .md export (also compressed, '.csv.gz', '.md.zst') into (reference, pad, net) records.
+    """
+    name = path.lower()
+    for suffix in COMPRESSION_SUFFIXES.values():
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    if name.endswith(".csv"):
+        return read_csv_export(path)
+    if name.endswith(".md"):
+        return read_markdown_export(path)
+    raise ValueError(f"Unsupported export file '{path}' (expected .csv or .md).")
+
+
+# --- Diff ---
+
+def _pin_map(records):
+    """
+    Sorts records on (reference, pad) and collapses pads that appear more than once
+    (e.g. several shield pads numbered 'SH') into one entry with their distinct nets.
+    Returns a sorted list of ((reference, pad), net).
+    """
+    records = sorted(records)
+    merged = []
+    for ref, pad, net in records:
+        key = (ref, pad)
+        if merged and merged[-1][0] == key:
+            if net not in merged[-1][1].split(" / "):
+                merged[-1] = (key, merged[-1][1] + " / " + net)
+        else:
+            merged.append((key, net))
+    return merged
+
+
+def diff_pinouts(old_records, new_records):
+    """
+    Compares two pinouts given as (reference, pad, net) records.
+
+    Returns:
+        A list of PinChange, in natural (reference, pad) order.
+    """
+    old_pins = _pin_map(old_records)
+    new_pins = _pin_map(new_records)
+
+    # --- Sorted merge over the (reference, pad) keys ---
+    added, removed, net_changes = [], [], []
+    i = j = 0
+    while i < len(old_pins) and j < len(new_pins):
+        old_key, old_net = old_pins[i]
+        new_key, new_net = new_pins[j]
+        if old_key == new_key:
+            if old_net != new_net:
+                net_changes.append((old_key, old_net, new_net))
+            i += 1
+            j += 1
+        elif old_key < new_key:
+            removed.append(old_pins[i])
+            i += 1
+        else:
+            added.append(new_pins[j])
+            j += 1
+    removed.extend(old_pins[i:])
+    added.extend(new_pins[j:])
+
+    # --- Classify the net changes ---
+    old_net_names = set(net for _key, net in old_pins)
+    new_net_names = set(net for _key, net in new_pins)
+    rename_targets = {} # old net -> set of new nets its pins went to
+    for _key, old_net, new_net in net_changes:
+        rename_targets.setdefault(old_net, set()).add(new_net)
+    renames = {old: next(iter(targets)) for old, targets in rename_targets.items()
+               if len(targets) == 1 and old not in new_net_names and next(iter(targets)) not in old_net_names}
+
+    old_pads_by_ref_net = {}
+    for (ref, pad), net in old_pins:
+        old_pads_by_ref_net.setdefault((ref, net), []).append(pad)
+
+    changes = [PinChange(ADDED, ref, pad, None, net) for (ref, pad), net in added]
+    changes.extend(PinChange(REMOVED, ref, pad, net, None) for (ref, pad), net in removed)
+    for (ref, pad), old_net, new_net in net_changes:
+        if renames.get(old_net) == new_net:
+            changes.append(PinChange(RENAMED, ref, pad, old_net, new_net, f"net '{old_net}' renamed to '{new_net}'"))
+            continue
+        previous_pads = [p for p in old_pads_by_ref_net.get((ref, new_net), ()) if p != pad]
+        if new_net and previous_pads:
+            changes.append(PinChange(MOVED, ref, pad, old_net, new_net,
+                                     f"'{new_net}' was on pin {', '.join(sorted(previous_pads, key=natural_sort_key))}"))
+        else:
+            changes.append(PinChange(CHANGED, ref, pad, old_net, new_net))
+
+    # References and pad names repeat a lot, compute each natural sort key once
+    sort_keys = {}
+
+    def sort_key(text):
+        key = sort_keys.get(text)
+        if key is None:
+            key = sort_keys[text] = natural_sort_key(text)
+        return key
+
+    changes.sort(key=lambda c: (sort_key(c.reference), sort_key(c.pad)))
+    return changes
+
+
+def count_changes(changes):
+    counts = dict.fromkeys(CHANGE_KINDS, 0)
+    for change in changes:
+        counts[change.kind] += 1
+    return counts
+
+
+# --- Reports ---
+
+def iter_diff_markdown(changes, old_label, new_label):
+    """
+    Yields the Markdown change report: a summary, then one table per changed connector.
+    """
+    counts = count_changes(changes)
+    yield "# Pinout Changes\n\n"
+    yield f"Old: `{old_label}`  \nNew: `{new_label}`\n\n"
+    yield "| " + " | ".join(kind.capitalize() for kind in CHANGE_KINDS) + " |\n"
+    yield "|" + "---:|" * len(CHANGE_KINDS) + "\n"
+    yield "| " + " | ".join(str(counts[kind]) for kind in CHANGE_KINDS) + " |\n\n"
+    if not changes:
+        yield "No pin changes.\n"
+        return
+
+    current_ref = None
+    for change in changes:
+        if change.reference != current_ref:
+            if current_ref is not None:
+                yield "\n"
+            current_ref = change.reference
+            yield f"## Component: {current_ref}\n\n"
+            yield "| Pin | Change | Old Net | New Net | Detail |\n"
+            yield "|:---|:---|:---|:---|:---|\n"
+        old_net = change.old_net if change.old_net is not None else "-"
+        new_net = change.new_net if change.new_net is not None else "-"
+        yield f"| {change.pad} | {change.kind} | {old_net} | {new_net} | {change.detail} |\n"
+    yield "\n"
+
+
+def iter_diff_csv(changes):
+    """
+    Yields the change report as CSV, one row per changed pin.
+    """
+    format_row = csv_row_formatter()
+    yield format_row(["Connector Name", "Pin Number", "Change", "Old Net", "New Net", "Detail"])
+    for change in changes:
+        yield format_row([change.reference, change.pad, change.kind,
+                          change.old_net if change.old_net is not None else "",
+                          change.new_net if change.new_net is not None else "", change.detail])
+
+
+# --- Command line ---
+
+def load_pins(path, options):
+    """
+    Reads one side of the comparison: a .kicad_pcb board (footprints picked like batch export's
+    --mode) or a saved .csv / .md export (taken as a whole).
+    """
+    if not path.lower().endswith(".kicad_pcb"):
+        return read_export_pins(path)
+    from .batch_export import load_board_snapshot, resolve_reader, select_rows
+    _board, snapshot = load_board_snapshot(path, resolve_reader(options["reader"]))
+    return pins_from_snapshot(snapshot, select_rows(snapshot, options),
+                              options["ignore_unconnected"], options["ignore_free"])
+
+
+def main(argv=None):
+    from .batch_export import EXPORT_MODES, READERS
+    from .pin_export import write_chunks
+
+    parser = argparse.ArgumentParser(prog="python -m extract_pins_plugin.pinout_diff",
+                                     description="Compare the connector pinouts of two board revisions.")
+    parser.add_argument("old", help="Old revision: .kicad_pcb, or a .csv / .md export of this plugin")
+    parser.add_argument("new", help="New revision: .kicad_pcb, or a .csv / .md export of this plugin")
+    parser.add_argument("--mode", choices=EXPORT_MODES, default="js", help="Footprints compared on boards (as batch_export)")
+    parser.add_argument("--reference-filter", default="J*", help="Reference wildcard list for --mode js")
+    parser.add_argument("--type-filter", default="", help="Comma-separated type wildcards for --mode type")
+    parser.add_argument("--type-field", default=CONNECTOR_TYPE_FIELD, help="Field used as connector type")
+    parser.add_argument("--ignore-unconnected", action="store_true", help="Skip 'unconnected' pins on boards")
+    parser.add_argument("--ignore-free", action="store_true", help="Skip pins without a net on boards")
+    parser.add_argument("--reader", choices=READERS, default="auto", help="Board loader (default: pcbnew if available)")
+    parser.add_argument("--output", default="pinout_diff", help="Base name of the .md / .csv reports")
+    args = parser.parse_args(argv)
+
+    options = {
+        "mode": args.mode, "reference_filter": args.reference_filter, "type_filter": args.type_filter,
+        "type_field": args.type_field, "ignore_unconnected": args.ignore_unconnected,
+        "ignore_free": args.ignore_free, "reader": args.reader,
+    }
+    try:
+        old_records = load_pins(args.old, options)
+        new_records = load_pins(args.new, options)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        return 2
+
+    changes = diff_pinouts(old_records, new_records)
+    write_chunks(args.output + ".md", iter_diff_markdown(changes, os.path.basename(args.old), os.path.basename(args.new)))
+    write_chunks(args.output + ".csv", iter_diff_csv(changes))
+    counts = count_changes(changes)
+    print(", ".join(f"{counts[kind]} {kind}" for kind in CHANGE_KINDS) + f". Reports: {args.output}.md, {args.output}.csv")
+    return 1 if changes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
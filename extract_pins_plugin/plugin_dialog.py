@@ -17,12 +17,85 @@ THIS PLUGIN IS PROVIDED AS IS WITHOUT ANY GUARANTEE OR WARRANTY.
 
 import wx
 import pcbnew
-import csv
-from io import StringIO
 import random
 import os
 import webbrowser
-import re
+
+from .board_snapshot import BoardSnapshot, CONNECTOR_TYPE_FIELD, footprint_key, footprint_lib_id
+from .wildcard_matcher import compile_wildcards
+from . import pin_export
+from . import instrumentation
+from . import net_crossref
+from . import pinout_diff
+from . import sqlite_export
+from . import board_sync
+from . import export_sinks
+from . import filter_expression
+from . import output_writer
+from . import sharded_export
+from .export_worker import ExportWorker
+from .export_cache import ExportCache
+from .footprint_list import FootprintList
+from .prefix_index import PrefixIndex, build_catalogue_indexes
+
+SELECTION_POLL_INTERVAL_MS = 300 # Live sync: how often the editor's selection is checked
+CATALOGUE_REFRESH_DELAY_MS = 1000 # Live sync: quiet time after board edits before the suggestions are rebuilt
+
+
+class FootprintListCtrl(wx.ListCtrl):
+    """
+    Virtual (wx.LC_VIRTUAL) single-column list of footprint references. Rows are drawn on
+    demand from a FootprintList model, so the control stays responsive with 10k+ entries.
+    """
+
+    def __init__(self, parent, model, size):
+        super(FootprintListCtrl, self).__init__(parent, size=size,
+                                                style=wx.LC_REPORT | wx.LC_NO_HEADER | wx.LC_VIRTUAL)
+        self.model = model
+        self.InsertColumn(0, "Reference")
+        self.SetColumnWidth(0, 150)
+
+    def OnGetItemText(self, item, column):
+        return self.model.reference(item)
+
+    def selected_indices(self):
+        indices = []
+        idx = self.GetFirstSelected()
+        while idx != wx.NOT_FOUND:
+            indices.append(idx)
+            idx = self.GetNextSelected(idx)
+        return indices
+
+    def refresh_items(self):
+        """
+        Clears the selection and redraws after the model changed.
+        """
+        for idx in self.selected_indices():
+            self.Select(idx, False)
+        self.SetItemCount(len(self.model))
+        self.Refresh()
+
+
+class PrefixCompleter(wx.TextCompleter):
+    """
+    Autocompletion for a filter text box, backed by a PrefixIndex. Only the first
+    AUTOCOMPLETE_LIMIT matches of the typed prefix are offered per keystroke.
+    The index is swapped in once the background catalogue build has finished.
+    """
+
+    def __init__(self, comma_separated=False):
+        super(PrefixCompleter, self).__init__()
+        self.index = PrefixIndex()
+        self.comma_separated = comma_separated
+        self._matches = iter(())
+
+    def Start(self, prefix):
+        self._matches = iter(self.index.complete(prefix, self.comma_separated))
+        return True
+
+    def GetNext(self):
+        return next(self._matches, "") # An empty string ends the list
+
 
 class PluginDialog(wx.Dialog):
     """
@@ -46,24 +119,31 @@ class PluginDialog(wx.Dialog):
         self.board = pcbnew.GetBoard()
         self.all_board_footprints = self.board.GetFootprints()
 
-        self.all_values = sorted(list(set(fp.GetValue() for fp in self.all_board_footprints if fp.GetValue())))
-        
-        all_nets = set()
-        all_connector_types = set()
-        for fp in self.all_board_footprints:
-            for pad in fp.Pads():
-                net = pad.GetNet()
-                if net:
-                    all_nets.add(net.GetNetname())
-            
-            connector_type_val = self._get_footprint_property_safe(fp, "connector-type")
-            if connector_type_val:
-                all_connector_types.add(connector_type_val.strip())
-
-        self.all_net_names = sorted(list(all_nets))
-        self.all_connector_types = sorted(list(all_connector_types))
-
-        self.current_display_footprints = []
+        # Single pass over every footprint/pad/net/field. Filters, exports and the details
+        # panel all read from this snapshot until it is invalidated ('Rescan Board').
+        # It is read right after the dialog is shown, see _load_board_catalogues().
+        self.board_snapshot = None
+
+        # Autocompletion of the filter inputs; the catalogues behind them are built in the background
+        self.value_completer = PrefixCompleter()
+        self.net_name_completer = PrefixCompleter(comma_separated=True)
+        self.type_field_completer = PrefixCompleter()
+        self.connector_type_completer = PrefixCompleter(comma_separated=True)
+        self.catalogue_worker = None
+
+        self.footprint_list = FootprintList() # Model of the virtual footprint list control
+        self.current_display_footprints = self.footprint_list.footprints
+        self.export_worker = None # Background ExportWorker while an export is running
+        self.export_cache = ExportCache() # Per-footprint records/fragments reused by the next export
+        self.last_output_dir = None # Folder of the previous export, offered again
+
+        # Live sync: board listener events and editor selection polling, see board_sync.py
+        self.board_changes = board_sync.BoardChangeSet()
+        self.board_listener = None
+        self.board_changes_pending = False # A _apply_board_changes call is queued
+        self.last_selection_keys = ()
+        self.selection_timer = None
+        self.catalogue_refresh_timer = None
 
         self.InitUI()
 
@@ -72,6 +152,13 @@ class PluginDialog(wx.Dialog):
         self.Centre()
         self.Show()
         self.Bind(wx.EVT_CLOSE, self.OnClose)
+        self.selection_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.OnSelectionTimer, self.selection_timer)
+        self.catalogue_refresh_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.OnCatalogueRefreshTimer, self.catalogue_refresh_timer)
+
+        # Read the board once the window is on screen
+        wx.CallAfter(self._load_board_catalogues)
 
     def InitUI(self):
         panel = wx.Panel(self)
@@ -84,9 +171,7 @@ class PluginDialog(wx.Dialog):
 
         list_vbox.Add(wx.StaticText(list_panel, label="Selected Components:"), 0, wx.ALL | wx.EXPAND, 2) # Reduced padding
         # --- Reduced height for ListCtrl ---
-        self.footprint_list_ctrl = wx.ListCtrl(list_panel, size=(-1, 120), style=wx.LC_REPORT | wx.LC_NO_HEADER) 
-        self.footprint_list_ctrl.InsertColumn(0, "Reference")
-        self.footprint_list_ctrl.SetColumnWidth(0, 150)
+        self.footprint_list_ctrl = FootprintListCtrl(list_panel, self.footprint_list, size=(-1, 120))
         self.footprint_list_ctrl.Bind(wx.EVT_LIST_ITEM_SELECTED, self.OnListItemSelected)
 
         list_vbox.Add(self.footprint_list_ctrl, 0, wx.ALL | wx.EXPAND, 2) # Proportion 0, fixed height
@@ -97,6 +182,12 @@ class PluginDialog(wx.Dialog):
         self.multi_select_checkbox.SetToolTip("If checked, 'Refresh Selection' adds to list instead of replacing.")
         selection_control_hbox.Add(self.multi_select_checkbox, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 2) # Reduced padding
 
+        self.live_sync_checkbox = wx.CheckBox(list_panel, label="Live Sync")
+        self.live_sync_checkbox.SetToolTip("If checked, the list follows the PCB selection and board edits "
+                                           "(footprints added, deleted or changed) without refreshing or rescanning.")
+        self.live_sync_checkbox.Bind(wx.EVT_CHECKBOX, self.OnLiveSyncToggled)
+        selection_control_hbox.Add(self.live_sync_checkbox, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 2) # Reduced padding
+
         refresh_button = wx.Button(list_panel, label="Refresh Selection from PCB")
         refresh_button.Bind(wx.EVT_BUTTON, self.OnRefreshSelection)
         selection_control_hbox.Add(refresh_button, 0, wx.ALL, 2) # Reduced padding
@@ -105,6 +196,11 @@ class PluginDialog(wx.Dialog):
         remove_button.Bind(wx.EVT_BUTTON, self.OnRemoveSelectedFromList)
         selection_control_hbox.Add(remove_button, 0, wx.ALL, 2) # Reduced padding
 
+        rescan_button = wx.Button(list_panel, label="Rescan Board")
+        rescan_button.SetToolTip("Re-reads footprints, pads, nets and fields from the PCB after board edits.")
+        rescan_button.Bind(wx.EVT_BUTTON, self.OnRescanBoard)
+        selection_control_hbox.Add(rescan_button, 0, wx.ALL, 2) # Reduced padding
+
         list_vbox.Add(selection_control_hbox, 0, wx.EXPAND | wx.ALL, 2) # Reduced padding
 
         list_panel.SetSizer(list_vbox)
@@ -124,20 +220,41 @@ class PluginDialog(wx.Dialog):
 
         filters_panel = wx.StaticBoxSizer(wx.StaticBox(panel, label="Filters (Apply to 'J's & 'Connectors' Exports)"),
                                            wx.VERTICAL)
-        grid_filters = wx.GridSizer(3, 2, 2, 2) # Reduced gaps
+        grid_filters = wx.GridSizer(5, 2, 2, 2) # Reduced gaps
 
         grid_filters.Add(wx.StaticText(panel, label="Value Filter (wildcard *):"), 0, wx.ALIGN_CENTER_VERTICAL)
-        self.value_filter_ctrl = wx.ComboBox(panel, size=(120, -1), choices=self.all_values, style=wx.CB_DROPDOWN) # Reduced width
+        self.value_filter_ctrl = wx.TextCtrl(panel, size=(120, -1)) # Reduced width
+        self.value_filter_ctrl.AutoComplete(self.value_completer)
         grid_filters.Add(self.value_filter_ctrl, 0, wx.EXPAND)
 
         grid_filters.Add(wx.StaticText(panel, label="Net Name Filter (comma-sep, wildcard *):"), 0, wx.ALIGN_CENTER_VERTICAL)
-        self.net_name_filter_ctrl = wx.ComboBox(panel, size=(120, -1), choices=self.all_net_names, style=wx.CB_DROPDOWN) # Reduced width
+        self.net_name_filter_ctrl = wx.TextCtrl(panel, size=(120, -1)) # Reduced width
+        self.net_name_filter_ctrl.AutoComplete(self.net_name_completer)
         grid_filters.Add(self.net_name_filter_ctrl, 0, wx.EXPAND)
 
+        grid_filters.Add(wx.StaticText(panel, label="Type Field (property to filter by type):"), 0, wx.ALIGN_CENTER_VERTICAL)
+        self.type_field_ctrl = wx.TextCtrl(panel, size=(120, -1), value=CONNECTOR_TYPE_FIELD) # Reduced width
+        self.type_field_ctrl.SetToolTip("Footprint field used by the Connector Type filter and the 'Connector Type' column (default 'connector-type').")
+        self.type_field_ctrl.AutoComplete(self.type_field_completer)
+        self.type_field_ctrl.Bind(wx.EVT_TEXT, self.OnTypeFieldChanged)
+        grid_filters.Add(self.type_field_ctrl, 0, wx.EXPAND)
+
         grid_filters.Add(wx.StaticText(panel, label="Connector Type Filter (comma-sep, wildcard *):"), 0, wx.ALIGN_CENTER_VERTICAL)
-        self.connector_type_filter_ctrl = wx.ComboBox(panel, size=(120, -1), choices=self.all_connector_types, style=wx.CB_DROPDOWN) # Reduced width
+        self.connector_type_filter_ctrl = wx.TextCtrl(panel, size=(120, -1)) # Reduced width
+        self.connector_type_filter_ctrl.AutoComplete(self.connector_type_completer)
         grid_filters.Add(self.connector_type_filter_ctrl, 0, wx.EXPAND)
 
+        grid_filters.Add(wx.StaticText(panel, label="Filter Expression (AND / OR / NOT):"), 0, wx.ALIGN_CENTER_VERTICAL)
+        self.filter_expression_ctrl = wx.TextCtrl(panel, size=(120, -1))
+        self.filter_expression_ctrl.SetToolTip("Combines terms such as ref:J*, value:10k, layer:B.Cu, footprint:*USB*, type:harness, "
+                                               "field:MPN=TE-* and net:CAN* with AND, OR, NOT and parentheses, e.g.\n"
+                                               "ref:J* AND (type:harness OR net:CAN*) AND NOT layer:B.Cu\n"
+                                               "Board position (mm): rect:0,0,50,20 (inside a rectangle), region:User.1 "
+                                               "(inside an outline drawn on a layer), edge:5 (within 5 mm of the board edge).\n"
+                                               "Applies to every export together with the Value and Net Name filters; "
+                                               "'Export Matching' exports the whole board through it.")
+        grid_filters.Add(self.filter_expression_ctrl, 0, wx.EXPAND)
+
         filters_panel.Add(grid_filters, 1, wx.EXPAND | wx.ALL, 2) # Reduced padding
         middle_hbox.Add(filters_panel, 1, wx.EXPAND | wx.ALL, 2) # Proportion 1 for filters panel
 
@@ -157,6 +274,47 @@ class PluginDialog(wx.Dialog):
         self.ignore_free_pins_checkbox.SetToolTip("If checked, pins with no assigned net are excluded from CSV.")
         options_panel.Add(self.ignore_free_pins_checkbox, 0, wx.ALL, 2) # Reduced padding
 
+        self.net_filter_pins_checkbox = wx.CheckBox(panel, label="Export Only Pins Matching Net Name Filter")
+        self.net_filter_pins_checkbox.SetToolTip("If checked, the Net Name filter also selects the pins: only pins on a "
+                                                 "matching net are written (e.g. 12 'PWR_*' rows of a 400-pin connector "
+                                                 "instead of all 400). Otherwise every pin of a matching component is written.")
+        options_panel.Add(self.net_filter_pins_checkbox, 0, wx.ALL, 2) # Reduced padding
+
+        # Outputs of the export buttons, all written in one pass into one folder (see export_sinks.py)
+        outputs_hbox = wx.WrapSizer(wx.HORIZONTAL) # Wraps once the registered outputs no longer fit in one row
+        outputs_hbox.Add(wx.StaticText(panel, label="Outputs:"), 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 2)
+        self.output_sink_checkboxes = {}
+        for name, sink_class in export_sinks.SINKS.items():
+            checkbox = wx.CheckBox(panel, label=sink_class.label)
+            checkbox.SetValue(sink_class.default)
+            checkbox.SetToolTip(f"Written as '<name>{sink_class.suffix}'.")
+            outputs_hbox.Add(checkbox, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 2)
+            self.output_sink_checkboxes[name] = checkbox
+
+        self.write_sqlite_checkbox = wx.CheckBox(panel, label="SQLite")
+        self.write_sqlite_checkbox.SetToolTip("If checked, the export buttons also write '<name>.sqlite' with indexed "
+                                              "'components', 'pins' and 'nets' tables (CSV pin filters apply).")
+        outputs_hbox.Add(self.write_sqlite_checkbox, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 2)
+
+        outputs_hbox.Add(wx.StaticText(panel, label="Compression:"), 0, wx.ALIGN_CENTER_VERTICAL | wx.LEFT, 8)
+        self.compression_choice = wx.Choice(panel, choices=output_writer.available_compressions())
+        self.compression_choice.SetSelection(0)
+        self.compression_choice.SetToolTip("Compresses the Markdown/CSV/JSON/Unique Nets outputs while they are written "
+                                           "('<name>.md.gz' / '.md.zst'); zstd is offered when it is installed.")
+        outputs_hbox.Add(self.compression_choice, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 2)
+
+        self.sharded_output_checkbox = wx.CheckBox(panel, label="One File per Component")
+        self.sharded_output_checkbox.SetToolTip("If checked, Markdown, CSV and JSON are written as one file per component "
+                                                "('<name>/J1.md', '<name>/J1.csv') with an 'index.md'. Re-exporting only "
+                                                "rewrites the files whose content changed (see sharded_export.py).")
+        outputs_hbox.Add(self.sharded_output_checkbox, 0, wx.ALIGN_CENTER_VERTICAL | wx.LEFT, 8)
+        options_panel.Add(outputs_hbox, 0, wx.ALL, 0)
+
+        self.save_trace_checkbox = wx.CheckBox(panel, label="Save Timing Trace (JSON)")
+        self.save_trace_checkbox.SetToolTip("If checked, stage timings and counters of the export are shown in the status bar "
+                                            "and saved next to the output as '<name>_trace.json' (Chrome trace format).")
+        options_panel.Add(self.save_trace_checkbox, 0, wx.ALL, 2) # Reduced padding
+
         self.output_column_checkboxes = {}
         column_checkbox_data = {
             "General Properties": ["Reference", "Value", "Footprint Name", "Description", "Layer", "Position", "Rotation",
@@ -179,6 +337,13 @@ class PluginDialog(wx.Dialog):
             column_checkbox_hbox.Add(col_vbox, 1, wx.EXPAND | wx.ALL, 2) # Proportion 1 for each column group
         
         options_panel.Add(column_checkbox_hbox, 1, wx.EXPAND | wx.ALL, 2) # Proportion 1 for column checkboxes
+
+        extra_fields_hbox = wx.BoxSizer(wx.HORIZONTAL)
+        extra_fields_hbox.Add(wx.StaticText(panel, label="Extra Field Columns (comma-sep):"), 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 2)
+        self.extra_fields_ctrl = wx.TextCtrl(panel, size=(120, -1))
+        self.extra_fields_ctrl.SetToolTip("Custom footprint fields to add as output columns, e.g. 'harness,mating-part,voltage-domain'.")
+        extra_fields_hbox.Add(self.extra_fields_ctrl, 1, wx.EXPAND | wx.ALL, 2)
+        options_panel.Add(extra_fields_hbox, 0, wx.EXPAND | wx.ALL, 2)
         middle_hbox.Add(options_panel, 1, wx.EXPAND | wx.ALL, 2) # Proportion 1 for options panel
         main_vbox.Add(middle_hbox, 1, wx.EXPAND | wx.ALL, 2) # Proportion 1 for middle_hbox
 
@@ -189,6 +354,11 @@ class PluginDialog(wx.Dialog):
         self.progress_bar = wx.Gauge(panel, range=100, size=(150, 15), style=wx.GA_HORIZONTAL)
         self.progress_bar.Hide()
         progress_sizer.Add(self.progress_bar, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 2)
+        self.cancel_export_button = wx.Button(panel, label="Cancel")
+        self.cancel_export_button.SetToolTip("Stops the running export. Partially written files are removed.")
+        self.cancel_export_button.Bind(wx.EVT_BUTTON, self.OnCancelExport)
+        self.cancel_export_button.Hide()
+        progress_sizer.Add(self.cancel_export_button, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 2)
         main_vbox.Add(progress_sizer, 0, wx.EXPAND | wx.ALL, 2)
 
         button_sizer = wx.BoxSizer(wx.HORIZONTAL)
@@ -206,10 +376,34 @@ class PluginDialog(wx.Dialog):
         export_connectors_by_type_button.Bind(wx.EVT_BUTTON, self.OnExportConnectorsByType)
         button_sizer.Add(export_connectors_by_type_button, 0, wx.ALL, 2)
 
+        export_matching_button = wx.Button(panel, label="Export Matching")
+        export_matching_button.SetToolTip("Exports every footprint on the board accepted by the Filter Expression.")
+        export_matching_button.Bind(wx.EVT_BUTTON, self.OnExportMatching)
+        button_sizer.Add(export_matching_button, 0, wx.ALL, 2)
+
         extract_unique_nets_button = wx.Button(panel, label="Extract Unique Connector Nets")
         extract_unique_nets_button.Bind(wx.EVT_BUTTON, self.OnExtractUniqueNets)
         button_sizer.Add(extract_unique_nets_button, 0, wx.ALL, 2)
 
+        export_crossref_button = wx.Button(panel, label="Net Cross-Reference")
+        export_crossref_button.SetToolTip("Joins the selected connectors (or those matching the Connector Type Filter) "
+                                          "on their nets: which pin of which connector is wired to which, plus a "
+                                          "connector x connector shared-net matrix.")
+        export_crossref_button.Bind(wx.EVT_BUTTON, self.OnExportNetCrossReference)
+        button_sizer.Add(export_crossref_button, 0, wx.ALL, 2)
+
+        compare_revision_button = wx.Button(panel, label="Compare With Revision...")
+        compare_revision_button.SetToolTip("Compares the connector pinouts of this board with an older .kicad_pcb "
+                                           "or a previously saved CSV / Markdown export, and reports added, removed, "
+                                           "renamed-net and moved pins per connector.")
+        compare_revision_button.Bind(wx.EVT_BUTTON, self.OnCompareWithRevision)
+        button_sizer.Add(compare_revision_button, 0, wx.ALL, 2)
+
+        # Disabled while a background export is running
+        self.export_buttons = [self.export_selected_button, export_js_button,
+                               export_connectors_by_type_button, export_matching_button, extract_unique_nets_button,
+                               export_crossref_button, compare_revision_button]
+
         help_button = wx.Button(panel, label="Help")
         help_button.Bind(wx.EVT_BUTTON, self.OnHelp)
         button_sizer.Add(help_button, 0, wx.ALL, 2)
@@ -242,20 +436,25 @@ class PluginDialog(wx.Dialog):
 
     def OnClose(self, event):
         print("DEBUG: Main Dialog OnClose event fired. Destroying dialog.")
+        self._stop_live_sync() # The board must not call into a destroyed dialog
+        if self.export_worker is not None:
+            # The worker's pending wx.CallAfter callbacks check that the dialog still exists
+            self.export_worker.cancel()
         self.Destroy()
 
-    def _update_footprint_list_display(self, footprints_list):
-        self.footprint_list_ctrl.ClearAll()
-        self.footprint_list_ctrl.InsertColumn(0, "Reference")
-        self.footprint_list_ctrl.SetColumnWidth(0, 150)
-        self.current_display_footprints = footprints_list
+    def _update_footprint_list_display(self, footprints_list=None):
+        """
+        Redraws the virtual footprint list. With 'footprints_list' the list is replaced first,
+        otherwise the current FootprintList model (already merged into / removed from) is shown.
+        """
+        if footprints_list is not None:
+            self.footprint_list.set(footprints_list)
+        self.current_display_footprints = self.footprint_list.footprints
+        self.footprint_list_ctrl.refresh_items()
 
-        for i, fp in enumerate(self.current_display_footprints):
-            self.footprint_list_ctrl.InsertItem(i, fp.GetReference())
-        
         self.details_text_ctrl.SetValue("")
 
-        self.export_selected_button.Enable(bool(footprints_list))
+        self.export_selected_button.Enable(bool(self.current_display_footprints) and self.export_worker is None)
 
 
     def OnRefreshSelection(self, event):
@@ -266,25 +465,220 @@ class PluginDialog(wx.Dialog):
         """
         print("DEBUG: OnRefreshSelection method called.")
         
-        newly_selected_from_pcb = [f for f in self.board.GetFootprints() if f.IsSelected()]
-        
+        newly_selected_from_pcb = board_sync.selected_footprints(self.board)
+        self._apply_pcb_selection(newly_selected_from_pcb)
+
+    def _apply_pcb_selection(self, newly_selected_from_pcb):
+        """
+        Replaces the list with the PCB selection, or merges it in with 'Multi-select from PCB'.
+        The result is shown in the status bar (no modal message box, live sync calls this too).
+        """
         if self.multi_select_checkbox.IsChecked():
             print("DEBUG: Multi-select mode enabled. Merging selections.")
-            existing_footprints_dict = {fp.GetReference(): fp for fp in self.current_display_footprints}
-            
-            for fp in newly_selected_from_pcb:
-                existing_footprints_dict[fp.GetReference()] = fp
-            
-            merged_footprints_list = sorted(existing_footprints_dict.values(), key=lambda f: self._natural_sort_key(f.GetReference()))
-            
-            self._update_footprint_list_display(merged_footprints_list)
-            wx.MessageBox(f"Merged selection. Added {len(newly_selected_from_pcb)} new items. Total: {len(merged_footprints_list)}.", 
-                          "Selection Merged", wx.OK | wx.ICON_INFORMATION)
+            # Sorted-insertion merge: only the new references are sorted, then merged in one pass
+            added = self.footprint_list.merge(newly_selected_from_pcb)
+            self._update_footprint_list_display()
+            self.status_text.SetLabel(f"Merged selection. Added {added} new items. Total: {len(self.footprint_list)}.")
         else:
             print("DEBUG: Single-select mode. Replacing selections.")
             self._update_footprint_list_display(newly_selected_from_pcb)
-            wx.MessageBox(f"Refreshed selection. Found {len(newly_selected_from_pcb)} selected components.", 
-                          "Selection Refreshed", wx.OK | wx.ICON_INFORMATION)
+            self.status_text.SetLabel(f"Refreshed selection. Found {len(newly_selected_from_pcb)} selected components.")
+
+    def OnLiveSyncToggled(self, event):
+        if self.live_sync_checkbox.IsChecked():
+            self._start_live_sync()
+        else:
+            self._stop_live_sync()
+
+    def _start_live_sync(self):
+        """
+        Registers the board listener and starts following the editor's selection. Parts this
+        KiCad build does not support are left out; without both, the checkbox is cleared again.
+        """
+        self.board_listener = board_sync.create_board_listener(self.board_changes, self._queue_board_changes)
+        if self.board_listener is not None:
+            self.board.AddListener(self.board_listener)
+        selection_supported = board_sync.current_selection() is not None
+        if selection_supported:
+            self.last_selection_keys = ()
+            self.selection_timer.Start(SELECTION_POLL_INTERVAL_MS)
+        if self.board_listener is None and not selection_supported:
+            self.live_sync_checkbox.SetValue(False)
+            self.status_text.SetLabel("Live sync is not supported by this KiCad version; use Refresh / Rescan.")
+            return
+        print(f"DEBUG: Live sync started (board listener: {self.board_listener is not None}, "
+              f"selection: {selection_supported}).")
+        self.status_text.SetLabel("Live sync on." if self.board_listener is not None and selection_supported else
+                                  "Live sync on (partly supported by this KiCad version).")
+
+    def _stop_live_sync(self):
+        if self.selection_timer is not None:
+            self.selection_timer.Stop()
+        if self.catalogue_refresh_timer is not None:
+            self.catalogue_refresh_timer.Stop()
+        if self.board_listener is not None:
+            self.board.RemoveListener(self.board_listener)
+            self.board_listener = None
+            print("DEBUG: Live sync stopped.")
+        self.board_changes.take() # Drop events that were not applied yet
+
+    def OnSelectionTimer(self, event):
+        """
+        Polls the editor's selection (costs the size of the selection, not of the board) and
+        applies it to the list when it changed. An empty selection keeps the list as it is.
+        """
+        selection = board_sync.current_selection()
+        if not selection:
+            self.last_selection_keys = ()
+            return
+        keys = tuple(footprint_key(fp) for fp in selection)
+        if keys == self.last_selection_keys:
+            return
+        self.last_selection_keys = keys
+        self._apply_pcb_selection(selection)
+
+    def _queue_board_changes(self):
+        """
+        Called by the board listener for every footprint event. Events of one edit are
+        applied together, once control is back in the event loop.
+        """
+        if not self.board_changes_pending:
+            self.board_changes_pending = True
+            wx.CallAfter(self._apply_board_changes)
+
+    def _apply_board_changes(self):
+        """
+        Applies the footprints added, removed and changed since the last call: the list drops
+        deleted footprints and takes over changed ones; added footprints that are selected
+        (e.g. pasted) are added to it. The snapshot is read again at the next export (unchanged
+        footprints are then served from the export cache), or when the filter suggestions are
+        rebuilt once the edits have paused for CATALOGUE_REFRESH_DELAY_MS.
+        """
+        if not self:
+            return
+        self.board_changes_pending = False
+        added, removed_keys, changed = self.board_changes.take()
+        if not (added or removed_keys or changed):
+            return
+        dropped = self.footprint_list.discard(removed_keys)
+        updated = self.footprint_list.update(changed)
+        selected_added = [fp for fp in added if fp.IsSelected()]
+        if selected_added:
+            self.footprint_list.merge(selected_added)
+        self._update_footprint_list_display()
+        self._mark_board_changed()
+        self.catalogue_refresh_timer.StartOnce(CATALOGUE_REFRESH_DELAY_MS) # Restarted by every further edit
+        print(f"DEBUG: Board changes applied: {len(added)} added, {len(removed_keys)} removed, {len(changed)} changed "
+              f"({dropped} dropped from / {updated} updated in / {len(selected_added)} added to the list).")
+        self.status_text.SetLabel(f"Board changed: {len(added)} added, {len(removed_keys)} removed, "
+                                  f"{len(changed)} changed footprints.")
+
+    def OnRescanBoard(self, event):
+        """
+        Event handler for the 'Rescan Board' button.
+        Drops the cached board snapshot so the next filter/export reads the PCB again.
+        """
+        print("DEBUG: OnRescanBoard method called.")
+        self._invalidate_board_snapshot()
+        snapshot = self._load_board_catalogues()
+        if self.export_worker is None: # The worker may be filling the cache right now
+            self.export_cache.prune(snapshot)
+
+    def OnCatalogueRefreshTimer(self, event):
+        """
+        Live sync: the board has not changed for a moment, bring the filter suggestions
+        (values, nets, fields, types) up to date with the edits.
+        """
+        if self.board_snapshot is None:
+            print("DEBUG: Rebuilding filter suggestions after board changes.")
+            self._load_board_catalogues(quiet=True)
+
+    def _load_board_catalogues(self, quiet=False):
+        """
+        Reads the board into the snapshot (GUI thread, it calls pcbnew), then builds the
+        autocompletion catalogues (values, nets, fields, types) on a background thread.
+        With 'quiet', the status bar is left alone (live sync refreshes). Returns the snapshot.
+        """
+        if not quiet:
+            self.status_text.SetLabel("Reading board...")
+            wx.Yield()
+        snapshot = self._get_board_snapshot()
+        type_field = self._get_type_field()
+        if not quiet:
+            self.status_text.SetLabel(f"{len(snapshot)} footprints read. Indexing nets and fields...")
+
+        def job(progress):
+            return build_catalogue_indexes(snapshot, type_field)
+
+        def on_done(status, result, error):
+            if not self: # Dialog closed before the catalogues were ready
+                return
+            if status != "done":
+                self.status_text.SetLabel("Could not build the filter suggestions.")
+                return
+            if snapshot is not self.board_snapshot:
+                return # Superseded by a rescan or board edits, whose own build will finish later
+            self.value_completer.index = result["values"]
+            self.net_name_completer.index = result["net_names"]
+            self.type_field_completer.index = result["field_names"]
+            self.connector_type_completer.index = result["connector_types"]
+            if not quiet:
+                self.status_text.SetLabel(f"Ready. {len(snapshot)} footprints, {len(result['net_names'])} nets.")
+            print("DEBUG: Filter autocompletion catalogues ready.")
+
+        self.catalogue_worker = ExportWorker(job, on_progress=lambda percent, message: None,
+                                             on_done=on_done, dispatch=wx.CallAfter)
+        self.catalogue_worker.start()
+        return snapshot
+
+    def OnTypeFieldChanged(self, event):
+        """
+        Event handler for the 'Type Field' input.
+        Reloads the Connector Type Filter suggestions with the values of the chosen field.
+        """
+        type_field = self._get_type_field()
+        print(f"DEBUG: Type field changed to '{type_field}'.")
+        # Reads the board again if live sync dropped the snapshot after an edit
+        self.connector_type_completer.index = PrefixIndex(self._get_board_snapshot().all_field_values(type_field))
+
+    def _get_type_field(self):
+        """
+        Returns the footprint field used as 'connector type' (defaults to 'connector-type').
+        """
+        return self.type_field_ctrl.GetValue().strip() or CONNECTOR_TYPE_FIELD
+
+    def _get_extra_fields(self):
+        """
+        Returns the custom field names the user asked to add as output columns.
+        """
+        return [f.strip() for f in self.extra_fields_ctrl.GetValue().split(',') if f.strip()]
+
+    def _get_board_snapshot(self):
+        """
+        Returns the cached BoardSnapshot, building it on first use or after invalidation.
+        """
+        if self.board_snapshot is None:
+            if self.all_board_footprints is None:
+                self.all_board_footprints = self.board.GetFootprints()
+            self.board_snapshot = BoardSnapshot(self.all_board_footprints)
+        return self.board_snapshot
+
+    def _invalidate_board_snapshot(self):
+        """
+        Discards the cached snapshot. The board footprint list is re-read as well,
+        so footprints added or deleted since the last scan are picked up.
+        """
+        print("DEBUG: Board snapshot invalidated.")
+        self.all_board_footprints = self.board.GetFootprints()
+        self.board_snapshot = None
+
+    def _mark_board_changed(self):
+        """
+        Live-sync counterpart of _invalidate_board_snapshot: the footprint list and the snapshot
+        are only read again when the next filter or export needs them.
+        """
+        self.all_board_footprints = None
+        self.board_snapshot = None
 
     def OnListItemSelected(self, event):
         selected_index = event.GetIndex()
@@ -309,34 +703,23 @@ class PluginDialog(wx.Dialog):
         Removes currently selected items from the dialog's ListCtrl and internal list.
         """
         print("DEBUG: OnRemoveSelectedFromList called.")
-        items_to_remove_indices = []
-        
-        idx = self.footprint_list_ctrl.GetFirstSelected()
-        while idx != wx.NOT_FOUND:
-            items_to_remove_indices.append(idx)
-            idx = self.footprint_list_ctrl.GetNextSelected(idx)
-        
+        items_to_remove_indices = self.footprint_list_ctrl.selected_indices()
+
         if not items_to_remove_indices:
             wx.MessageBox("No items selected in the list to remove.", "No Selection", wx.OK | wx.ICON_INFORMATION)
             return
 
-        new_current_display_footprints = []
-        removed_count = 0
-        for i in range(len(self.current_display_footprints)):
-            if i not in items_to_remove_indices:
-                new_current_display_footprints.append(self.current_display_footprints[i])
-            else:
-                removed_count += 1
-        
+        removed_count = self.footprint_list.remove(items_to_remove_indices) # Set-based, one pass over the list
+
         print(f"DEBUG: Removed {removed_count} items from the list.")
-        self._update_footprint_list_display(new_current_display_footprints)
+        self._update_footprint_list_display()
         wx.MessageBox(f"Removed {removed_count} item(s) from the list.", "Items Removed", wx.OK | wx.ICON_INFORMATION)
 
     def _natural_sort_key(self, text):
         """
         Helper for natural sorting (e.g., J1, J2, J10 instead of J1, J10, J2).
         """
-        return [int(s) if s.isdigit() else s.lower() for s in re.split('([0-9]+)', text)]
+        return pin_export.natural_sort_key(text)
 
 
     def _get_footprint_property_safe(self, footprint, prop_name):
@@ -350,12 +733,34 @@ class PluginDialog(wx.Dialog):
         return None
 
     def _get_footprint_properties_for_display(self, fp):
+        snapshot = self._get_board_snapshot()
+        row = snapshot.row_of(fp)
+        type_field = self._get_type_field()
+        if row is not None:
+            general_props = snapshot.general_properties(row)
+            connector_type_val = snapshot.field(row, type_field)
+            properties = {
+                "Reference": general_props["Reference"],
+                "Value": general_props["Value"],
+                "Footprint Name": general_props["Footprint Name"],
+                "Description": general_props["Description"],
+                "Layer": general_props["Layer"],
+                "Position (X, Y)": general_props["Position"],
+                "Rotation": general_props["Rotation"],
+                "Connector Type": connector_type_val.strip() if connector_type_val is not None
+                                  else f"N/A (No '{type_field}' property)"
+            }
+            for field_name in self._get_extra_fields():
+                field_val = snapshot.field(row, field_name)
+                properties.setdefault(field_name, field_val if field_val is not None else "N/A")
+            return properties
+
+        # Footprint not in the snapshot (added after the last scan), read it directly.
         properties = {}
         properties["Reference"] = fp.GetReference()
         properties["Value"] = fp.GetValue()
 
-        footprint_id = fp.GetFPID()
-        properties["Footprint Name"] = str(footprint_id)
+        properties["Footprint Name"] = footprint_lib_id(fp) # 'lib:name', same as the snapshot
 
         description = fp.GetLibDescription()
         properties["Description"] = description if description and description != "No description" else "N/A"
@@ -366,30 +771,31 @@ class PluginDialog(wx.Dialog):
         rot = fp.GetOrientation()
         properties["Rotation"] = f"{rot.AsDegrees():.1f}°"
 
-        connector_type_val = self._get_footprint_property_safe(fp, "connector-type")
+        connector_type_val = self._get_footprint_property_safe(fp, type_field)
         if connector_type_val is not None:
             properties["Connector Type"] = connector_type_val.strip()
         else:
-            properties["Connector Type"] = "N/A (No 'connector-type' property)"
+            properties["Connector Type"] = f"N/A (No '{type_field}' property)"
 
         return properties
 
 
     def OnExportSelected(self, event):
         print("DEBUG: OnExportSelected method called.")
-        initial_footprints = list(self.current_display_footprints)
-        self._process_and_export(initial_footprints, "selected_data.md", "selected_data.csv", "selected components")
+        snapshot = self._get_board_snapshot()
+        initial_rows = snapshot.rows_for(self.current_display_footprints)
+        self._process_and_export(initial_rows, "selected_data", "selected components")
 
     def OnExportJs(self, event):
         print("DEBUG: OnExportJs method called.")
-        initial_footprints = list(self.all_board_footprints)
+        snapshot = self._get_board_snapshot()
         # Apply wildcard matching for 'J*' references
-        filtered_footprints = [f for f in initial_footprints if re.fullmatch(self._convert_wildcard_to_regex("J*"), f.GetReference().upper())]
-        self._process_and_export(filtered_footprints, "js_components.md", "js_components.csv", "'J' components")
+        filtered_rows = pin_export.select_rows_by_reference(snapshot, "J*")
+        self._process_and_export(filtered_rows, "js_components", "'J' components")
 
     def OnExportConnectorsByType(self, event):
         print("DEBUG: OnExportConnectorsByType method called.")
-        initial_footprints = list(self.all_board_footprints)
+        snapshot = self._get_board_snapshot()
 
         connector_type_filter_raw = self.connector_type_filter_ctrl.GetValue().strip()
         
@@ -398,211 +804,477 @@ class PluginDialog(wx.Dialog):
                           "Filter Required", wx.OK | wx.ICON_INFORMATION)
             return
 
-        # Split by comma and convert each part to a regex pattern
-        connector_type_patterns = [self._convert_wildcard_to_regex(t.strip().lower()) for t in connector_type_filter_raw.split(',') if t.strip()]
+        filtered_rows = pin_export.select_rows_by_field(snapshot, connector_type_filter_raw, self._get_type_field())
+
+        self._process_and_export(filtered_rows, "connectors_by_type", "connectors by type")
+
+    def OnExportMatching(self, event):
+        print("DEBUG: OnExportMatching method called.")
+        if not self.filter_expression_ctrl.GetValue().strip():
+            wx.MessageBox("Please enter a Filter Expression, e.g. 'ref:J* AND NOT layer:B.Cu'.",
+                          "Filter Required", wx.OK | wx.ICON_INFORMATION)
+            return
+        snapshot = self._get_board_snapshot()
+        # The expression itself is applied with the other filters in _process_and_export
+        self._process_and_export(list(snapshot.all_rows()), "matching_components", "components matching the filter")
+
+    def OnExportNetCrossReference(self, event):
+        """
+        Event handler for the 'Net Cross-Reference' button.
+        Uses the listed components, or else the footprints matching the Connector Type Filter.
+        Writes a Markdown report (matrix + nets), a CSV with one row per net endpoint
+        and '<name>_matrix.csv' with the shared-net matrix.
+        """
+        print("DEBUG: OnExportNetCrossReference method called.")
+        if self.export_worker is not None:
+            return # An export is already running
+
+        snapshot = self._get_board_snapshot()
+        if self.current_display_footprints:
+            rows = snapshot.rows_for(self.current_display_footprints)
+        else:
+            connector_type_filter_raw = self.connector_type_filter_ctrl.GetValue().strip()
+            if not connector_type_filter_raw:
+                wx.MessageBox("Select connectors in the list, or enter connector types (e.g., 'harness,backplane') "
+                              "in the Connector Type Filter field.", "Filter Required", wx.OK | wx.ICON_INFORMATION)
+                return
+            rows = pin_export.select_rows_by_field(snapshot, connector_type_filter_raw, self._get_type_field())
+
+        tracer = self._start_trace("net cross-reference")
+        with tracer.stage("filter"):
+            rows = self._apply_text_filters(rows)
+        if rows is None:
+            self._finish_trace(None)
+            return
+        if not rows:
+            wx.MessageBox("No connectors found after applying the filters.", "No Connectors", wx.OK | wx.ICON_INFORMATION)
+            self._finish_trace(None)
+            return
+
+        md_path = self._ask_save_path("Markdown Files (*.md)|*.md", "Save Net Cross-Reference (Markdown)", "net_crossref.md")
+        csv_path = self._ask_save_path("CSV Files (*.csv)|*.csv", "Save Net Cross-Reference (CSV)", "net_crossref.csv")
+        if not md_path and not csv_path:
+            self.status_text.SetLabel("Export cancelled.")
+            self._finish_trace(None)
+            return
+        ignore_unconnected = self.ignore_unconnected_pins_checkbox.IsChecked()
+
+        def job(progress):
+            progress.update(0, f"Joining {len(rows)} connectors on their nets...", force=True)
+            with tracer.stage("join"):
+                xref = net_crossref.build_cross_reference(snapshot, rows, ignore_unconnected)
+            written_paths = []
+            outputs = []
+            if md_path:
+                outputs.append((md_path, net_crossref.iter_crossref_markdown(xref)))
+            if csv_path:
+                outputs.append((csv_path, net_crossref.iter_crossref_csv(xref)))
+                outputs.append((os.path.splitext(csv_path)[0] + "_matrix.csv", net_crossref.iter_matrix_csv(xref)))
+            with tracer.stage("write"):
+                for i, (path, chunks) in enumerate(outputs):
+                    progress.update(50 + 50 * i // len(outputs), f"Writing {os.path.basename(path)}...")
+                    pin_export.write_chunks(path, chunks)
+                    written_paths.append(path)
+            return written_paths
+
+        self._start_export_worker(job, self._report_saved_files)
+
+    def OnCompareWithRevision(self, event):
+        """
+        Event handler for the 'Compare With Revision...' button.
+        The current side is the listed components, or else the footprints matching the
+        Connector Type Filter, or else all 'J' references. An older .kicad_pcb is read with
+        the same selection; a saved export is compared as a whole. The CSV pin options
+        ("Ignore 'Unconnected' Pins", "Ignore Free Pins") apply to both boards.
+        """
+        print("DEBUG: OnCompareWithRevision method called.")
+        if self.export_worker is not None:
+            return # An export is already running
+
+        with wx.FileDialog(
+                None,
+                "Open Old Revision (board or saved export)",
+                wildcard="Board or Export (*.kicad_pcb;*.csv;*.md;*.gz;*.zst)|*.kicad_pcb;*.csv;*.md;*.gz;*.zst",
+                style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST
+        ) as file_dialog:
+            if file_dialog.ShowModal() == wx.ID_CANCEL:
+                return
+            old_path = file_dialog.GetPath()
 
-        filtered_footprints = []
-        for fp in initial_footprints:
-            fp_connector_type_val = self._get_footprint_property_safe(fp, "connector-type")
-            if fp_connector_type_val is not None:
-                fp_connector_type_val_lower = fp_connector_type_val.lower().strip()
-                # Check if the footprint's connector type matches any of the patterns
-                if any(re.fullmatch(pattern, fp_connector_type_val_lower) for pattern in connector_type_patterns):
-                    filtered_footprints.append(fp)
+        snapshot = self._get_board_snapshot()
+        type_field = self._get_type_field()
+        connector_type_filter_raw = self.connector_type_filter_ctrl.GetValue().strip()
+        if self.current_display_footprints:
+            rows = snapshot.rows_for(self.current_display_footprints)
+            listed_references = set(snapshot.reference(row) for row in rows)
+            select_old_rows = lambda old: [row for row in old.all_rows() if old.reference(row) in listed_references]
+        elif connector_type_filter_raw:
+            rows = pin_export.select_rows_by_field(snapshot, connector_type_filter_raw, type_field)
+            select_old_rows = lambda old: pin_export.select_rows_by_field(old, connector_type_filter_raw, type_field)
+        else:
+            rows = pin_export.select_rows_by_reference(snapshot, "J*")
+            select_old_rows = lambda old: pin_export.select_rows_by_reference(old, "J*")
 
-        self._process_and_export(filtered_footprints, "connectors_by_type.md", "connectors_by_type.csv",
-                                 "connectors by type")
+        md_path = self._ask_save_path("Markdown Files (*.md)|*.md", "Save Pinout Changes (Markdown)", "pinout_diff.md")
+        csv_path = self._ask_save_path("CSV Files (*.csv)|*.csv", "Save Pinout Changes (CSV)", "pinout_diff.csv")
+        if not md_path and not csv_path:
+            self.status_text.SetLabel("Export cancelled.")
+            return
+        ignore_unconnected = self.ignore_unconnected_pins_checkbox.IsChecked()
+        ignore_free = self.ignore_free_pins_checkbox.IsChecked()
+        tracer = self._start_trace("pinout diff")
+
+        def job(progress):
+            progress.update(0, f"Reading {os.path.basename(old_path)}...", force=True)
+            with tracer.stage("load"):
+                if old_path.lower().endswith(".kicad_pcb"):
+                    from .kicad_pcb_reader import read_board
+                    old_board = read_board(old_path)
+                    old_snapshot = BoardSnapshot(old_board.GetFootprints())
+                    old_records = pinout_diff.pins_from_snapshot(old_snapshot, select_old_rows(old_snapshot),
+                                                                 ignore_unconnected, ignore_free)
+                else:
+                    old_records = pinout_diff.read_export_pins(old_path)
+                new_records = pinout_diff.pins_from_snapshot(snapshot, rows, ignore_unconnected, ignore_free)
+            progress.update(40, f"Comparing {len(old_records)} and {len(new_records)} pins...")
+            with tracer.stage("diff"):
+                changes = pinout_diff.diff_pinouts(old_records, new_records)
+            written_paths = []
+            with tracer.stage("write"):
+                if md_path:
+                    pin_export.write_chunks(md_path, pinout_diff.iter_diff_markdown(
+                        changes, os.path.basename(old_path), "current board"))
+                    written_paths.append(md_path)
+                if csv_path:
+                    pin_export.write_chunks(csv_path, pinout_diff.iter_diff_csv(changes))
+                    written_paths.append(csv_path)
+            return written_paths
+
+        self._start_export_worker(job, self._report_saved_files)
 
     def OnExtractUniqueNets(self, event):
         print("DEBUG: OnExtractUniqueNets method called.")
-        
+        if self.export_worker is not None:
+            return # An export is already running
+
+        tracer = self._start_trace("unique nets")
+        snapshot = self._get_board_snapshot()
         connectors_to_process = []
         if self.current_display_footprints:
             print("DEBUG: Extracting unique nets from currently displayed footprints.")
-            connectors_to_process = list(self.current_display_footprints)
+            connectors_to_process = snapshot.rows_for(self.current_display_footprints)
         else:
-            print("DEBUG: No footprints displayed. Extracting unique nets from all 'connector-type' footprints on board.")
-            for fp in self.all_board_footprints:
-                if self._get_footprint_property_safe(fp, "connector-type") is not None:
-                    connectors_to_process.append(fp)
+            type_field = self._get_type_field()
+            print(f"DEBUG: No footprints displayed. Extracting unique nets from all '{type_field}' footprints on board.")
+            connectors_to_process = sorted(snapshot.field_index().rows_with_field(type_field))
 
         if not connectors_to_process:
-            wx.MessageBox("No connectors found in current selection or on board with 'connector-type' property.", "No Connectors", wx.OK | wx.ICON_INFORMATION)
+            wx.MessageBox(f"No connectors found in current selection or on board with '{self._get_type_field()}' property.", "No Connectors", wx.OK | wx.ICON_INFORMATION)
+            self._finish_trace(None)
             return
 
         # Apply general text filters (Value, Net Name) to the connectors
         # Note: The net_name_filter_text is used here to filter the *footprints*
         # based on whether *any* of their pins match the filter.
         # The actual filtering of the *unique nets list* will happen after collection.
-        filtered_connectors = self._apply_text_filters(connectors_to_process)
+        with tracer.stage("filter"):
+            filtered_connectors = self._apply_text_filters(connectors_to_process)
+        if filtered_connectors is None:
+            self._finish_trace(None)
+            return
 
         if not filtered_connectors:
             wx.MessageBox("No connectors found after applying general text filters.", "No Unique Nets", wx.OK | wx.ICON_INFORMATION)
+            self._finish_trace(None)
             return
 
-        self.status_text.SetLabel(f"Extracting unique nets from {len(filtered_connectors)} connectors...")
-        self.progress_bar.Show()
-        self.progress_bar.SetValue(0)
-        wx.Yield()
-
-        unique_nets = set()
-        total_pads_scanned = 0
-        for i, fp in enumerate(filtered_connectors):
-            self.progress_bar.SetValue(int((i / len(filtered_connectors)) * 50))
-            wx.Yield()
-            for pad in fp.Pads():
-                total_pads_scanned += 1
-                net = pad.GetNet()
-                if net:
-                    net_name = net.GetNetname()
-                    
-                    is_connected = bool(net)
-                    current_net_name = net_name # Use net_name directly
-                    is_unconnected_literal = (current_net_name.lower() == "unconnected")
-
-                    skip_net = False
-                    if self.ignore_unconnected_pins_checkbox.IsChecked() and is_unconnected_literal:
-                        skip_net = True
-                    if self.ignore_free_pins_checkbox.IsChecked() and not is_connected:
-                        skip_net = True
-
-                    if not skip_net:
-                        unique_nets.add(net_name)
-
-        # Apply wildcard filter to the collected unique nets
+        ignore_unconnected = self.ignore_unconnected_pins_checkbox.IsChecked()
         net_name_filter_text = self.net_name_filter_ctrl.GetValue().strip()
-        if net_name_filter_text:
-            print(f"DEBUG: Applying wildcard filter '{net_name_filter_text}' to unique nets.")
-            unique_nets = self._filter_nets_by_wildcard(unique_nets, net_name_filter_text)
-            if not unique_nets:
+
+        def job(progress):
+            # Runs on the worker thread: only reads the snapshot
+            with tracer.stage("collect_nets"):
+                unique_nets = pin_export.collect_unique_nets(
+                    snapshot, filtered_connectors, ignore_unconnected,
+                    progress_callback=progress.stage(0, 90, f"Extracting unique nets from {len(filtered_connectors)} connectors..."))
+            # Apply wildcard filter to the collected unique nets
+            with tracer.stage("filter_nets"):
+                if net_name_filter_text:
+                    print(f"DEBUG: Applying wildcard filter '{net_name_filter_text}' to unique nets.")
+                    unique_nets = self._filter_nets_by_wildcard(unique_nets, net_name_filter_text)
+                return sorted(unique_nets, key=pin_export.natural_sort_key)
+
+        self._start_export_worker(job, lambda sorted_unique_nets: self._save_unique_nets(sorted_unique_nets, net_name_filter_text))
+
+    def _save_unique_nets(self, sorted_unique_nets, net_name_filter_text):
+        """
+        Finishes OnExtractUniqueNets on the GUI thread once the worker has collected the nets.
+        """
+        if not sorted_unique_nets:
+            if net_name_filter_text:
                 wx.MessageBox(f"No unique nets found matching '{net_name_filter_text}' after filtering.", "No Matching Unique Nets", wx.OK | wx.ICON_INFORMATION)
                 self.status_text.SetLabel("No matching unique nets found.")
-                self.progress_bar.Hide()
-                return
-
-
-        if not unique_nets:
-            wx.MessageBox("No unique nets found on the selected/filtered connectors.", "No Unique Nets", wx.OK | wx.ICON_INFORMATION)
-            self.status_text.SetLabel("No unique nets found.")
-            self.progress_bar.Hide()
+            else:
+                wx.MessageBox("No unique nets found on the selected/filtered connectors.", "No Unique Nets", wx.OK | wx.ICON_INFORMATION)
+                self.status_text.SetLabel("No unique nets found.")
+            self._finish_trace(None)
             return
 
-        sorted_unique_nets = sorted(list(unique_nets), key=self._natural_sort_key)
-        
-        self.status_text.SetLabel(f"Generating unique nets CSV for {len(sorted_unique_nets)} nets...")
-        self.progress_bar.SetValue(75)
-        wx.Yield()
-
-        output = StringIO()
-        writer = csv.writer(output)
-        writer.writerow(["Unique Net Name"])
-        for net_name in sorted_unique_nets:
-            writer.writerow([net_name])
-        csv_content = output.getvalue()
-
         self.status_text.SetLabel("Showing save dialog...")
-        self.progress_bar.Hide()
-        wx.Yield()
-
-        self.save_file_dialog(csv_content, "CSV Files (*.csv)|*.csv", "Save Unique Connector Nets", "unique_connector_nets.csv")
+        pathname = self._ask_save_path("CSV Files (*.csv)|*.csv", "Save Unique Connector Nets", "unique_connector_nets.csv")
+        if pathname is not None:
+            with instrumentation.active_tracer().stage("write"):
+                self._write_export_file(pathname, pin_export.iter_unique_nets_csv(sorted_unique_nets))
 
         self.status_text.SetLabel("Done.")
-        self.progress_bar.SetValue(100)
-        self.progress_bar.Hide()
+        self._finish_trace(pathname)
         print(f"DEBUG: Unique nets extraction complete. Total unique nets: {len(sorted_unique_nets)}")
 
     def OnCancel(self, event):
         print("DEBUG: Close button clicked. Closing dialog.")
         self.Close()
 
-    def _process_and_export(self, initial_footprints_list, default_md_name, default_csv_name, export_type_desc):
+    def _process_and_export(self, initial_rows, default_base_name, export_type_desc):
         """
         Consolidates filtering, extraction, generation, and saving for all export types.
+        'initial_rows' are footprint rows of the current board snapshot.
+        One output directory is asked first; all chosen outputs (see the Outputs checkboxes)
+        are then written as '<default_base_name><suffix>' from a single pass over the components
+        on a background worker, which the Cancel button can stop. With 'One File per Component',
+        Markdown, CSV and JSON go into the folder '<default_base_name>' instead, one file per component.
         """
+        if self.export_worker is not None:
+            return # An export is already running
         self.status_text.SetLabel(f"Applying filters for {export_type_desc}...")
-        self.progress_bar.Show()
-        self.progress_bar.SetValue(0)
         self.progress_bar.SetRange(100)
-        wx.Yield()
-
-        filtered_footprints = self._apply_text_filters(initial_footprints_list)
 
-        self.status_text.SetLabel(f"Extracting data for {len(filtered_footprints)} components...")
-        self.progress_bar.SetValue(25)
-        wx.Yield()
+        sink_names = [name for name, checkbox in self.output_sink_checkboxes.items() if checkbox.IsChecked()]
+        write_sqlite = self.write_sqlite_checkbox.IsChecked()
+        if not sink_names and not write_sqlite:
+            wx.MessageBox("Please choose at least one output (Markdown, CSV, ...) under Outputs.", "No Outputs",
+                          wx.OK | wx.ICON_INFORMATION)
+            return
 
-        extracted_data_by_footprint = self.extract_data(
-            filtered_footprints,
-            ignore_unconnected_pins_for_csv=self.ignore_unconnected_pins_checkbox.IsChecked(),
-            ignore_free_pins_for_csv=self.ignore_free_pins_checkbox.IsChecked()
-        )
-        print(f"DEBUG: _process_and_export: extract_data completed. Found {len(extracted_data_by_footprint)} components.")
+        tracer = self._start_trace(export_type_desc)
+        snapshot = self._get_board_snapshot()
+        with tracer.stage("filter"):
+            filtered_rows = self._apply_text_filters(initial_rows)
+            if filtered_rows is None:
+                self._finish_trace(None)
+                return
+            # One entry per reference, exactly as the extracted dictionary used to hold them
+            export_rows = pin_export.unique_reference_rows(snapshot, filtered_rows)
+        print(f"DEBUG: _process_and_export: {len(export_rows)} components to export.")
 
-        if not extracted_data_by_footprint:
+        if not export_rows:
             wx.MessageBox(f"No pins found in the {export_type_desc} after filtering to export.", "No Pin Data",
                           wx.OK | wx.ICON_INFORMATION)
             self.status_text.SetLabel("No data found.")
-            self.progress_bar.Hide()
+            self._finish_trace(None)
             return
 
         if self.sort_by_reference_checkbox.IsChecked():
             print("DEBUG: Sorting components by reference for output.")
-            sorted_refs = sorted(extracted_data_by_footprint.keys(),
-                                 key=lambda k: self._natural_sort_key(extracted_data_by_footprint[k]['general_properties']['Reference']))
-            ordered_extracted_data = {ref: extracted_data_by_footprint[ref] for ref in sorted_refs}
-            extracted_data_by_footprint = ordered_extracted_data
+            with tracer.stage("sort"):
+                export_rows = pin_export.sort_rows_by_reference(snapshot, export_rows)
         else:
             print("DEBUG: Outputting components in processed order.")
 
-        apply_markdown_highlight = self.highlight_nets_markdown_checkbox.IsChecked()
         selected_columns = self._get_selected_columns()
+        extraction_options = {
+            "ignore_unconnected_pins_for_csv": self.ignore_unconnected_pins_checkbox.IsChecked(),
+            "ignore_free_pins_for_csv": self.ignore_free_pins_checkbox.IsChecked(),
+            "type_field": self._get_type_field(),
+            "extra_fields": self._get_extra_fields(),
+            # Pushed down into extraction: the other pads of the matching components are never read
+            "pin_net_filter": self.net_name_filter_ctrl.GetValue() if self.net_filter_pins_checkbox.IsChecked() else ""
+        }
+        sink_options = {
+            "apply_highlight": self.highlight_nets_markdown_checkbox.IsChecked(),
+            "ignore_unconnected_pins": extraction_options["ignore_unconnected_pins_for_csv"],
+            "net_name_filter": self.net_name_filter_ctrl.GetValue().strip()
+        }
 
-        self.status_text.SetLabel("Generating Markdown content...")
-        self.progress_bar.SetValue(50)
-        wx.Yield()
-        markdown_content = self.generate_markdown(extracted_data_by_footprint, apply_markdown_highlight,
-                                                  selected_columns)
-
-        self.status_text.SetLabel("Generating CSV content...")
-        self.progress_bar.SetValue(75)
-        wx.Yield()
-        
-        csv_content = ""
-        try:
-            csv_content = self.generate_csv(extracted_data_by_footprint, selected_columns)
-            print(f"DEBUG: CSV content generated. Length: {len(csv_content)} bytes.")
-        except Exception as e:
-            print(f"ERROR: Exception during CSV generation: {e}")
-            import traceback
-            traceback.print_exc()
-            wx.MessageBox(f"An error occurred during CSV generation:\n{e}", "CSV Generation Error", wx.OK | wx.ICON_ERROR)
-            self.status_text.SetLabel("Error during CSV generation.")
-            self.progress_bar.Hide()
+        self.status_text.SetLabel("Showing save dialog...")
+        output_dir = self._ask_output_directory(f"Choose Output Folder ({default_base_name}.*)")
+        if output_dir is None:
+            self.status_text.SetLabel("Export cancelled.")
+            self._finish_trace(None)
+            return
+        shard_formats = []
+        shard_dir = os.path.join(output_dir, default_base_name)
+        if self.sharded_output_checkbox.IsChecked():
+            # Only files of the previous sharded export in that folder are replaced, no need to ask
+            shard_formats = [name for name in sink_names if name in sharded_export.SHARD_FORMATS]
+            sink_names = [name for name in sink_names if name not in shard_formats]
+        sinks = export_sinks.create_sinks(sink_names, output_dir, default_base_name, selected_columns, sink_options,
+                                          self.compression_choice.GetStringSelection())
+        sqlite_path = os.path.join(output_dir, default_base_name + ".sqlite") if write_sqlite else None
+        if not self._confirm_overwrite([sink.path for sink in sinks] + ([sqlite_path] if sqlite_path else [])):
+            self.status_text.SetLabel("Export cancelled.")
+            self._finish_trace(None)
             return
 
-        self.status_text.SetLabel("Showing save dialogs...")
-        self.progress_bar.Hide()
-        wx.Yield()
+        cache = self.export_cache
+        cache.reset_stats()
+
+        def job(progress):
+            # Runs on the worker thread: extraction reads only the snapshot, never pcbnew
+            # Footprints unchanged since the last export come out of the export cache
+            written_paths = []
+            write_summary = None # "<size> at <rate> MB/s" for the status bar
+            text_span = 100 if not sqlite_path else (80 if sinks or shard_formats else 0)
+            shards_span = text_span // 2 if sinks and shard_formats else (text_span if shard_formats else 0)
+            sinks_span = text_span - shards_span
+            if shard_formats:
+                with tracer.stage("sharded_export"):
+                    shard_stats = sharded_export.write_sharded(
+                        snapshot, export_rows, shard_dir, shard_formats, selected_columns, cache,
+                        progress_callback=progress.stage(0, shards_span,
+                                                         f"Writing one file per component for {len(export_rows)} components..."),
+                        options=sink_options, **extraction_options)
+                written_paths.append(os.path.join(shard_dir, sharded_export.INDEX_NAME))
+                write_summary = shard_stats.summary()
+            if sinks:
+                labels = ", ".join(sink.label for sink in sinks)
+                with tracer.stage("fused_export"):
+                    written_paths.extend(export_sinks.write_fused(
+                        snapshot, export_rows, sinks, cache,
+                        progress.stage(shards_span, sinks_span, f"Writing {labels} for {len(export_rows)} components..."),
+                        **extraction_options))
+                # The sinks are written side by side, so their combined size over the slowest one is the rate
+                seconds = max(sink.stats.seconds for sink in sinks)
+                megabytes = sum(sink.stats.bytes_in for sink in sinks) / 1e6
+                rate = f"{megabytes:.1f} MB at {megabytes / seconds if seconds > 0 else 0.0:.1f} MB/s"
+                write_summary = f"{write_summary}; {rate}" if write_summary else rate
+            if sqlite_path:
+                with tracer.stage("sqlite"):
+                    sqlite_export.write_sqlite(
+                        sqlite_path, snapshot, export_rows, extraction_options["ignore_unconnected_pins_for_csv"],
+                        extraction_options["ignore_free_pins_for_csv"], extraction_options["type_field"],
+                        progress.stage(text_span, 100 - text_span, "Writing SQLite database..."),
+                        extraction_options["pin_net_filter"])
+                written_paths.append(sqlite_path)
+            return written_paths, write_summary
+
+        self._start_export_worker(job, lambda result: self._report_saved_files(*result))
+
+    def _ask_output_directory(self, title):
+        """
+        Shows a directory dialog and returns the chosen folder, or None if the user cancelled.
+        """
+        with wx.DirDialog(None, title, defaultPath=self.last_output_dir or "",
+                          style=wx.DD_DEFAULT_STYLE) as dir_dialog:
+            if dir_dialog.ShowModal() == wx.ID_CANCEL:
+                return None
+            self.last_output_dir = dir_dialog.GetPath()
+            return self.last_output_dir
+
+    def _confirm_overwrite(self, paths):
+        """
+        Asks once before replacing existing output files. Returns True to go ahead.
+        """
+        existing = [path for path in paths if os.path.exists(path)]
+        if not existing:
+            return True
+        answer = wx.MessageBox("These files already exist and will be replaced:\n" + "\n".join(existing),
+                               "Replace Files?", wx.YES_NO | wx.ICON_QUESTION)
+        return answer == wx.YES
+
+    def _report_saved_files(self, written_paths, write_summary=None):
+        wx.MessageBox("File(s) saved successfully to:\n" + "\n".join(written_paths), "Success", wx.OK | wx.ICON_INFORMATION)
+        written = f" Wrote {write_summary}." if write_summary else ""
+        self.status_text.SetLabel(f"Done.{written} Cache: {self.export_cache.hits} reused, "
+                                  f"{self.export_cache.misses} re-extracted.")
+        print(f"DEBUG: _perform_export: Export complete. Export cache: {self.export_cache.summary()}")
+        self._finish_trace(written_paths[0])
+
+    def _start_trace(self, name):
+        """
+        Starts an instrumentation trace if 'Save Timing Trace' is checked.
+        Returns the active tracer (the no-op NULL_TRACER otherwise).
+        """
+        if self.save_trace_checkbox.IsChecked():
+            return instrumentation.start_trace(name)
+        instrumentation.stop_trace() # Makes sure no stale trace from an aborted export stays active
+        return instrumentation.NULL_TRACER
+
+    def _finish_trace(self, output_path):
+        """
+        Stops the active trace. With an output path, the trace is saved next to it and
+        its summary is shown in the status bar; otherwise it is discarded.
+        """
+        tracer = instrumentation.stop_trace()
+        if not tracer.enabled or output_path is None:
+            return
+        trace_path = os.path.splitext(output_path)[0] + "_trace.json"
+        try:
+            tracer.write(trace_path, chrome=True)
+            print(f"DEBUG: Timing trace saved to '{trace_path}'.")
+        except OSError as e:
+            print(f"ERROR: Could not write trace '{trace_path}': {e}")
+        summary = tracer.summary()
+        print(f"DEBUG: Trace summary: {summary}")
+        self.status_text.SetLabel(summary)
+
+    def _start_export_worker(self, job, on_success):
+        """
+        Runs job(progress) on a background ExportWorker. Export buttons are disabled and the
+        Cancel button is shown until it ends; on_success(result) is then called on the GUI thread.
+        """
+        self._set_export_running(True)
+        self.export_worker = ExportWorker(
+            job,
+            on_progress=self._on_export_progress,
+            on_done=lambda status, result, error: self._on_export_done(status, result, error, on_success),
+            dispatch=wx.CallAfter
+        )
+        self.export_worker.start()
+
+    def _set_export_running(self, running):
+        for button in self.export_buttons:
+            button.Enable(not running)
+        if not running:
+            self.export_selected_button.Enable(bool(self.current_display_footprints))
+        self.cancel_export_button.Show(running)
+        self.cancel_export_button.Enable(running)
+        self.progress_bar.Show(running)
+        self.progress_bar.SetValue(0)
+        self.Layout()
 
-        self.save_file_dialog(markdown_content, "Markdown Files (*.md)|*.md", "Save Pin Data (Markdown)",
-                              default_md_name)
-        self.save_file_dialog(csv_content, "CSV Files (*.csv)|*.csv", "Save Pin Data (CSV)", default_csv_name)
+    def _on_export_progress(self, percent, message):
+        if not self: # Dialog destroyed while the worker was still running
+            return
+        self.progress_bar.SetValue(min(percent, 100))
+        if message:
+            self.status_text.SetLabel(message)
 
-        self.status_text.SetLabel("Done.")
-        self.progress_bar.SetValue(100)
-        self.progress_bar.Hide()
-        print("DEBUG: _perform_export: Export complete.")
+    def _on_export_done(self, status, result, error, on_success):
+        if not self:
+            return
+        self.export_worker = None
+        self._set_export_running(False)
+        if status == "done":
+            on_success(result)
+            return
+        self._finish_trace(None)
+        if status == "cancelled":
+            self.status_text.SetLabel("Export cancelled.")
+            print("DEBUG: Export cancelled by user.")
+        else:
+            self.status_text.SetLabel("Error during export.")
+            wx.MessageBox(f"An error occurred during the export:\n{error}", "Export Error", wx.OK | wx.ICON_ERROR)
 
-    def _convert_wildcard_to_regex(self, pattern):
+    def OnCancelExport(self, event):
         """
-        Converts a wildcard pattern (e.g., 'J*') into a regex pattern.
-        Escapes special regex characters and replaces '*' with '.*'.
+        Event handler for the 'Cancel' button next to the progress bar.
+        The worker stops at its next progress check.
         """
-        # Escape all special regex characters first
-        escaped_pattern = re.escape(pattern)
-        # Then replace the escaped '*' with '.*'
-        regex_pattern = escaped_pattern.replace(r'\*', '.*')
-        return regex_pattern
+        print("DEBUG: OnCancelExport called.")
+        if self.export_worker is not None:
+            self.export_worker.cancel()
+            self.cancel_export_button.Enable(False)
+            self.status_text.SetLabel("Cancelling...")
 
     def _filter_nets_by_wildcard(self, net_names_set, wildcard_pattern_string):
         """
@@ -612,58 +1284,30 @@ class PluginDialog(wx.Dialog):
         if not wildcard_pattern_string:
             return net_names_set # No filter applied
 
-        # Split the input string by comma and generate a list of regex patterns
-        patterns = [self._convert_wildcard_to_regex(p.strip().lower()) for p in wildcard_pattern_string.split(',') if p.strip()]
-        
-        if not patterns: # If splitting results in an empty list (e.g., input was just ", ,")
+        net_matcher = compile_wildcards(wildcard_pattern_string)
+        if not net_matcher: # If splitting results in no patterns (e.g., input was just ", ,")
             return net_names_set
 
-        filtered_nets = set()
-        for net_name in net_names_set:
-            net_name_lower = net_name.lower()
-            # Check if the net_name matches any of the provided patterns
-            if any(re.fullmatch(pattern, net_name_lower) for pattern in patterns):
-                filtered_nets.add(net_name)
-        return filtered_nets
+        return net_matcher.filter(net_names_set)
 
-    def _apply_text_filters(self, footprints_list):
+    def _apply_text_filters(self, rows):
         """
-        Applies Value and Net Name filters to a list of footprints, supporting wildcards.
-        Returns a new filtered list.
+        Applies the Filter Expression, Value and Net Name filters to a list of snapshot footprint rows,
+        evaluated together as one plan (see filter_expression.py).
+        Returns a new filtered list of rows, or None (after telling the user) if the expression is invalid.
         """
-        filtered = list(footprints_list)
-
-        value_filter_text = self.value_filter_ctrl.GetValue().strip()
-        # Note: net_name_filter_text is used here for filtering footprints by pins,
+        # Note: the net name filter is used here for filtering footprints by pins,
         # and also later in OnExtractUniqueNets for filtering the final set of unique nets.
-        net_name_filter_text = self.net_name_filter_ctrl.GetValue().strip()
-
-        # Apply Value filter with wildcard support
-        if value_filter_text:
-            value_regex = self._convert_wildcard_to_regex(value_filter_text.lower())
-            filtered = [fp for fp in filtered if re.fullmatch(value_regex, fp.GetValue().lower())]
-            print(f"DEBUG: Applied Value filter '{value_filter_text}'. Found {len(filtered)} FPs.")
-
-        # Apply Net Name filter (for footprints with *any* matching pin) with wildcard support
-        # This filter is applied to the footprints themselves, not the final unique nets list yet.
-        if net_name_filter_text:
-            # For footprint-level filtering, we want to check if *any* of the comma-separated patterns match
-            net_name_patterns_for_footprint_filter = [self._convert_wildcard_to_regex(p.strip().lower()) for p in net_name_filter_text.split(',') if p.strip()]
-            
-            if net_name_patterns_for_footprint_filter: # Only apply if there are valid patterns
-                filtered_by_net = []
-                for fp in filtered:
-                    for pad in fp.Pads():
-                        net = pad.GetNet()
-                        if net:
-                            net_name_lower = net.GetNetname().lower()
-                            if any(re.fullmatch(pattern, net_name_lower) for pattern in net_name_patterns_for_footprint_filter):
-                                filtered_by_net.append(fp)
-                                break # Found a matching net for this footprint, move to next footprint
-                filtered = filtered_by_net
-                print(f"DEBUG: Applied Net Name filter (footprint-level) '{net_name_filter_text}'. Found {len(filtered)} FPs.")
-
-        return filtered
+        try:
+            plan = filter_expression.build_filter(self.filter_expression_ctrl.GetValue(),
+                                                  self.value_filter_ctrl.GetValue(),
+                                                  self.net_name_filter_ctrl.GetValue())
+            return filter_expression.select_rows(self._get_board_snapshot(), rows, plan, self._get_type_field(),
+                                                 board=self.board)
+        except filter_expression.FilterError as e: # Syntax errors, or e.g. 'edge:' without a board outline
+            wx.MessageBox(f"Invalid Filter Expression: {e}", "Filter Expression", wx.OK | wx.ICON_ERROR)
+            self.status_text.SetLabel("Invalid filter expression.")
+            return None
 
     def _get_selected_columns(self):
         """
@@ -681,205 +1325,14 @@ class PluginDialog(wx.Dialog):
             cb = self.output_column_checkboxes.get(col_name)
             if cb and cb.IsChecked():
                 selected_cols.append(col_name)
-        return selected_cols
-
-    # extract_data now accepts pin filter flags
-    def extract_data(self, footprints_to_process, ignore_unconnected_pins_for_csv=False, ignore_free_pins_for_csv=False):
-        """
-        Extracts relevant properties and pin details from the provided list of footprints.
-        Applies pin filtering for CSV based on ignore_unconnected_pins_for_csv and ignore_free_pins_for_csv flags.
-        Returns a dictionary organized by footprint reference designator.
-        """
-        extracted_data_by_footprint = {}
-        total_footprints = len(footprints_to_process)
-        for i, footprint in enumerate(footprints_to_process):
-            if total_footprints > 0:
-                self.progress_bar.SetValue(25 + int((i / total_footprints) * 25))
-                wx.Yield()
-
-            footprint_ref = footprint.GetReference()
-            footprint_value = footprint.GetValue()
-
-            footprint_id = footprint.GetFPID()
-            footprint_full_name = str(footprint_id) # Still extract for internal use/details panel
-
-            footprint_description = footprint.GetLibDescription()
-
-            footprint_layer = footprint.GetLayerName()
-            footprint_pos = footprint.GetPosition()
-            footprint_rot = footprint.GetOrientation()
-
-            connector_type_val = self._get_footprint_property_safe(footprint, "connector-type")
-            if connector_type_val is None:
-                connector_type_val = ""
-
-            general_properties = {
-                "Reference": footprint_ref,
-                "Value": footprint_value,
-                "Footprint Name": footprint_full_name, # Still included here for internal use/details
-                "Description": footprint_description if footprint_description and footprint_description != "No description" else "N/A",
-                "Layer": footprint_layer,
-                "Position": f"({footprint_pos.x / 1000000.0:.2f}mm, {footprint_pos.y / 1000000.0:.2f}mm)",
-                "Rotation": f"{footprint_rot.AsDegrees():.1f}°",
-                "Connector Type": connector_type_val
-            }
 
-            pin_data_unfiltered = [] # This list holds all pins, used for Markdown
-            filtered_pins_for_csv = [] # This list holds pins after CSV-specific filters
-            # aggregated_pins_str is REMOVED from here, as it's built in generate_csv now
-
-            for pad in footprint.Pads():
-                pad_name = pad.GetPadName()
-                net_name = ""
-                net = pad.GetNet()
-                
-                is_connected = bool(net) # True if net object exists
-                current_net_name = net.GetNetname() if is_connected else ""
-                is_unconnected_literal = (current_net_name.lower() == "unconnected") # Check for literal "unconnected" string
-
-                # Always add to unfiltered list for Markdown
-                pin_data_unfiltered.append({
-                    "Pad Name/Number": pad_name,
-                    "Net Name": current_net_name
-                })
-
-                # Apply pin filters for CSV only
-                skip_pin_for_csv = False
-                if ignore_unconnected_pins_for_csv and is_unconnected_literal:
-                    skip_pin_for_csv = True
-                if ignore_free_pins_for_csv and not is_connected: # Only skip if it's truly free (no net)
-                    skip_pin_for_csv = True
-
-                if not skip_pin_for_csv:
-                    filtered_pins_for_csv.append({
-                        "Pad Name/Number": pad_name,
-                        "Net Name": current_net_name
-                    })
-            
-            extracted_data_by_footprint[footprint_ref] = {
-                "general_properties": general_properties,
-                "pin_data": pin_data_unfiltered, # Unfiltered list for Markdown output
-                "filtered_pins_for_csv": filtered_pins_for_csv, # Filtered list for CSV
-                # "aggregated_pins_str" is REMOVED from here
-            }
-        return extracted_data_by_footprint
+        # Custom field columns always follow the general properties
+        return pin_export.with_extra_field_columns(selected_cols, self._get_extra_fields())
 
-    def generate_markdown(self, data_by_footprint, apply_highlight=False, selected_columns=None):
-        markdown = "# Extracted Component Pin Data\n\n"
-
-        if selected_columns is None:
-            selected_columns = self._get_selected_columns()
-
-        html_color_palette = [
-            "#FF0000", "#008000", "#0000FF", "#FFA500", "#800080", "#00FFFF", "#FFC0CB", "#00FF7F", "#8B4513",
-            "#A52A2A", "#6A5ACD", "#D2691E", "#4682B4", "#BDB76B", "#FFD700"
-        ]
-        net_colors_map = {}
-        color_index = 0
-
-        for ref, component_data in data_by_footprint.items():
-            general_props = component_data["general_properties"]
-            pin_data = component_data["pin_data"] # Markdown uses the unfiltered pin_data
-
-            markdown += f"## Component: {ref}\n\n"
-
-            general_headers_to_include = [col for col in selected_columns if col in general_props]
-            if general_headers_to_include:
-                markdown += "### General Properties\n\n"
-                markdown += "| " + " | ".join(general_headers_to_include) + " |\n"
-                markdown += "|:" + "---------|:---------".join([""] * len(general_headers_to_include)) + "|\n"
-
-                row_values = []
-                for header in general_headers_to_include:
-                    if header == "Position":
-                        row_values.append(general_props.get("Position (X, Y)", "N/A"))
-                    elif header == "Rotation":
-                        row_values.append(general_props.get("Rotation", "N/A"))
-                    else: # This covers Reference, Value, Description, Layer, Connector Type, Footprint Name
-                        row_values.append(str(general_props.get(header, "N/A")))
-                markdown += "| " + " | ".join(row_values) + " |\n"
-                markdown += "\n"
-
-            pin_headers_to_include = [col for col in selected_columns if col in ["Pad Name/Number", "Net Name"]]
-            if pin_data and pin_headers_to_include:
-                markdown += "### Pin Details\n\n"
-                markdown += "| " + " | ".join(pin_headers_to_include) + " |\n"
-                markdown += "|:" + "----------------|:---------".join([""] * len(pin_headers_to_include)) + "|\n"
-
-                for pin_row in pin_data:
-                    row_values = []
-                    for header in pin_headers_to_include:
-                        val = pin_row.get(header, "N/A")
-                        if header == "Net Name" and apply_highlight and val != "N/A" and val != "":
-                            if val not in net_colors_map:
-                                net_colors_map[val] = html_color_palette[color_index % len(html_color_palette)]
-                                color_index += 1
-
-                            display_val = f'<span style="color: {net_colors_map[val]};">{val}</span>'
-                        else:
-                            display_val = val
-
-                        row_values.append(display_val)
-                    markdown += "| " + " | ".join(row_values) + " |\n"
-                markdown += "\n"
-            elif pin_data and not pin_headers_to_include:
-                markdown += "Pin details available but no pin columns selected.\n\n"
-            else:
-                markdown += "No pins found for this component.\n\n"
-
-        return markdown
-
-    def generate_csv(self, data_by_footprint, selected_columns=None):
-        output = StringIO()
-        writer = csv.writer(output)
-
-        # Map display name to internal storage key for general properties
-        general_prop_cols_map = {
-            "Reference": "Reference", "Value": "Value", "Footprint Name": "Footprint Name",
-            "Description": "Description", "Layer": "Layer",
-            "Position": "Position (X, Y)", "Rotation": "Rotation",
-            "Connector Type": "Connector Type"
-        }
-        
-        # Fixed headers for the pin rows (as requested)
-        pin_row_headers = ["Connector Name", "Pin Number", "Net Name"]
-
-        for ref, component_data in data_by_footprint.items():
-            general_props = component_data["general_properties"]
-            filtered_pins_for_csv = component_data["filtered_pins_for_csv"] # Use the filtered pins
-
-            # --- Write Connector Properties Section ---
-            general_headers_to_include = [col for col in selected_columns if col in general_prop_cols_map]
-            
-            # Only write general properties section if general properties are selected OR if there are pins to list
-            if general_headers_to_include or filtered_pins_for_csv:
-                writer.writerow([f"Component: {ref}"]) # Section header for the component
-                
-                if general_headers_to_include: # Only write properties if columns are selected
-                    # Write general properties as key-value pairs
-                    for col_display_name in general_headers_to_include:
-                        col_storage_name = general_prop_cols_map[col_display_name]
-                        value = general_props.get(col_storage_name, "")
-                        writer.writerow([col_display_name, value])
-                # No blank row needed here as per request
-
-            # --- Write Pin Details Section ---
-            # Only write pin section if pin details are selected for output AND there are filtered pins
-            if filtered_pins_for_csv and (("Pad Name/Number" in selected_columns) or ("Net Name" in selected_columns)):
-                writer.writerow(pin_row_headers) # Write pin headers
-                for pin_row in filtered_pins_for_csv:
-                    # Ensure columns match the pin_row_headers order and content
-                    row_data = [
-                        general_props.get("Reference", ""), # Connector Name (Reference)
-                        pin_row.get("Pad Name/Number", ""), # Pin Number
-                        pin_row.get("Net Name", "") # Net Name
-                    ]
-                    writer.writerow(row_data)
-                # No blank row needed here as per request
-
-        return output.getvalue()
-
-    def save_file_dialog(self, content, wildcard, title, default_filename):
+    def _ask_save_path(self, wildcard, title, default_filename):
+        """
+        Shows a save dialog and returns the chosen path, or None if the user cancelled.
+        """
         with wx.FileDialog(
                 None,
                 title,
@@ -888,13 +1341,23 @@ class PluginDialog(wx.Dialog):
                 style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT
         ) as file_dialog:
             if file_dialog.ShowModal() == wx.ID_CANCEL:
-                return
-
-            pathname = file_dialog.GetPath()
-            try:
-                with open(pathname, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                wx.MessageBox(f"File saved successfully to:\n{pathname}", "Success", wx.OK | wx.ICON_INFORMATION)
-            except Exception as e:
-                wx.MessageBox(f"Error saving file:\n{e}", "Error", wx.OK | wx.ICON_ERROR)
+                return None
+            return file_dialog.GetPath()
 
+    def _write_export_file(self, pathname, content):
+        """
+        Writes 'content' (a string, or an iterable of string chunks that is streamed to disk)
+        and reports the outcome to the user. Returns True on success.
+        """
+        if isinstance(content, str):
+            content = (content,)
+        try:
+            pin_export.write_chunks(pathname, content)
+            wx.MessageBox(f"File saved successfully to:\n{pathname}", "Success", wx.OK | wx.ICON_INFORMATION)
+            return True
+        except Exception as e:
+            print(f"ERROR: Exception while writing '{pathname}': {e}")
+            import traceback
+            traceback.print_exc()
+            wx.MessageBox(f"Error saving file:\n{e}", "Error", wx.OK | wx.ICON_ERROR)
+            return False
@@ -0,0 +1,78 @@
+# prefix_index.py
+"""
+PREFIX INDEX
+
+Sorted, case-insensitive prefix index behind the filter autocompletion. Instead of
+loading every net name of a large board into a drop-down, the dialog asks the index
+for the first few matches of what has been typed so far; each lookup is one bisect
+plus at most 'limit' steps, however many names the board has.
+
+build_catalogue_indexes() collects the board catalogues (values, net names, field names,
+type field values) from a BoardSnapshot. It only reads the snapshot, so the dialog runs
+it on a background thread. This module does not import wx.
+"""
+
+from bisect import bisect_left
+
+AUTOCOMPLETE_LIMIT = 50 # Suggestions shown per keystroke
+
+
+class PrefixIndex:
+    """
+    Case-insensitive prefix lookup over a fixed set of strings.
+    """
+
+    def __init__(self, strings=()):
+        entries = sorted((s.lower(), s) for s in set(strings) if s)
+        self._keys = [entry[0] for entry in entries]
+        self.strings = [entry[1] for entry in entries]
+
+    def __len__(self):
+        return len(self.strings)
+
+    def matches(self, prefix, limit=AUTOCOMPLETE_LIMIT):
+        """
+        Returns up to 'limit' strings starting with 'prefix' (ignoring case), in sorted order.
+        """
+        prefix = prefix.lower()
+        start = bisect_left(self._keys, prefix)
+        end = min(start + limit, len(self._keys))
+        result = []
+        for i in range(start, end):
+            if not self._keys[i].startswith(prefix):
+                break
+            result.append(self.strings[i])
+        return result
+
+    def complete(self, text, comma_separated=False, limit=AUTOCOMPLETE_LIMIT):
+        """
+        Returns completions of the whole text. In a comma-separated list only the last
+        entry is completed and the earlier ones are kept ('GND, CA' -> 'GND, CAN_H', ...).
+        Nothing is suggested for entries containing a '*' wildcard.
+        """
+        head = ""
+        token = text
+        if comma_separated and ',' in text:
+            split_at = text.rindex(',') + 1
+            head = text[:split_at] + " "
+            token = text[split_at:]
+        token = token.strip()
+        if '*' in token:
+            return []
+        return [head + match for match in self.matches(token, limit)]
+
+
+def build_catalogue_indexes(snapshot, type_field):
+    """
+    Builds the prefix indexes for the filter inputs from a board snapshot.
+
+    Returns:
+        A dict with the PrefixIndex of "values", "net_names", "field_names" and "connector_types"
+        (the values of 'type_field').
+    """
+    return {
+        "values": PrefixIndex(snapshot.all_values()),
+        "net_names": PrefixIndex(snapshot.all_net_names()),
+        "field_names": PrefixIndex(snapshot.all_field_names()),
+        "connector_types": PrefixIndex(snapshot.all_field_values(type_field)),
+    }
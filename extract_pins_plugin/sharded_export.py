@@ -0,0 +1,270 @@
+# sharded_export.py
+"""
+SHARDED EXPORT
+
+One file per component instead of one big document: the Markdown, CSV or JSON section of
+every exported footprint goes into its own file ('J1.md', 'J1.csv', ...) inside an output
+directory, next to an 'index.md' that lists them with links. On a large board a changed
+connector then only changes its own shards, which keeps diffs and version control history small.
+
+Re-exporting into the same directory only writes what changed. A manifest
+('.pinout_shards.json') remembers the content hash and size of every file written; a shard
+whose new content hashes the same, and whose file is still there with that size, is not
+touched. Shards of components that are no longer exported (and only those, files the export
+did not create are never removed) are deleted.
+
+Extraction and rendering stay on the calling thread, they share the export cache and gain
+nothing from threads under the GIL. Hashing (hashlib releases the GIL for larger buffers),
+comparing and writing the shards run on a small thread pool, overlapped with rendering.
+Each shard is written atomically (output_writer.write_bytes_atomic); the manifest is written
+last, so a cancelled or failed export leaves complete files and a manifest that lists the
+previous run plus the shards finished so far; the next export rewrites whatever differs and
+still removes shards that are no longer wanted. This module does not import wx or pcbnew.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from . import instrumentation
+from . import output_writer
+from . import pin_export
+from .board_snapshot import CONNECTOR_TYPE_FIELD
+from .export_sinks import SINKS
+
+SHARD_FORMATS = ("md", "csv", "jsonl", "json") # Sinks whose output is a per-component section
+MANIFEST_NAME = ".pinout_shards.json"
+MANIFEST_VERSION = 1
+INDEX_NAME = "index.md"
+DEFAULT_WORKERS = 4 # Shards are small; more threads only add contention on the directory
+MAX_PENDING_PER_WORKER = 8 # Rendered but unwritten components held in memory, per worker
+
+SHARDS_WRITTEN = "shards_written" # Tracer counters
+SHARDS_UNCHANGED = "shards_unchanged"
+
+_INVALID_NAME_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+_WINDOWS_RESERVED = {"CON", "PRN", "AUX", "NUL"} | {f"COM{i}" for i in range(1, 10)} | {f"LPT{i}" for i in range(1, 10)}
+
+
+def shard_name(reference, taken):
+    """
+    Returns a file name stem for 'reference' that is valid on Windows, macOS and Linux and
+    unique (case-insensitively) among the lowercase stems in 'taken', which it is added to.
+    """
+    name = _INVALID_NAME_CHARS.sub("_", reference).strip(" .") or "_"
+    if name.split(".")[0].upper() in _WINDOWS_RESERVED:
+        name = "_" + name
+    stem, count = name, 1
+    while stem.lower() in taken:
+        count += 1
+        stem = f"{name}~{count}"
+    taken.add(stem.lower())
+    return stem
+
+
+def content_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def read_manifest(directory):
+    """
+    Returns {file name: (hash, size)} of the last sharded export into 'directory' ({} if none).
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return {name: tuple(entry) for name, entry in manifest.get("files", {}).items()
+            if isinstance(entry, list) and len(entry) == 2}
+
+
+def _write_manifest(directory, files):
+    manifest = {"version": MANIFEST_VERSION, "files": {name: list(entry) for name, entry in sorted(files.items())}}
+    output_writer.write_bytes_atomic(os.path.join(directory, MANIFEST_NAME),
+                                     json.dumps(manifest, separators=(",", ":")).encode("utf-8"))
+
+
+def _store_shard(path, data, previous):
+    """
+    Worker side: writes 'data' to 'path' unless the manifest entry 'previous' shows the file
+    already holds it. Returns (hash, size, written).
+    """
+    digest = content_hash(data)
+    if previous == (digest, len(data)):
+        try:
+            if os.path.getsize(path) == len(data):
+                return digest, len(data), False
+        except OSError:
+            pass # Deleted since the last export
+    # No fsync per shard: a shard lost in a crash fails the size check and is written again
+    output_writer.write_bytes_atomic(path, data, sync=False)
+    return digest, len(data), True
+
+
+def _store_batch(directory, batch):
+    return [(name,) + _store_shard(os.path.join(directory, name), data, previous)
+            for name, data, previous in batch]
+
+
+class ShardStats:
+    """
+    Outcome of one sharded export.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.components = 0
+        self.written = 0 # Files (shards and index) actually written
+        self.unchanged = 0 # Files skipped because their content had not changed
+        self.removed = 0 # Stale shards deleted
+        self.bytes_written = 0
+        self.seconds = 0.0
+
+    def summary(self):
+        return (f"{self.components} components: {self.written} files written, {self.unchanged} unchanged, "
+                f"{self.removed} removed ({self.bytes_written / 1e6:.1f} MB in {self.seconds:.2f}s)")
+
+
+def render_index(entries, formats):
+    """
+    Returns the Markdown index of the shards: entries are (reference, value, pin count,
+    {format: file name}).
+    """
+    labels = [SINKS[name].label for name in formats]
+    parts = [pin_export.MARKDOWN_TITLE,
+             "| Reference | Value | Pins | " + " | ".join(labels) + " |\n",
+             "|:---------|:---------|---------:|" + ":---------|" * len(labels) + "\n"]
+    for ref, value, pin_count, files in entries:
+        links = " | ".join(f"[{files[name]}]({quote(files[name])})" for name in formats)
+        parts.append(f"| {ref} | {str(value).replace('|', '/')} | {pin_count} | {links} |\n")
+    return "".join(parts)
+
+
+def write_sharded(snapshot, rows, directory, formats=SHARD_FORMATS, selected_columns=None, cache=None,
+                  workers=None, progress_callback=None, options=None, **extraction_options):
+    """
+    Writes one file per component and format plus the index into 'directory', skipping files
+    whose content did not change since the last export into it (see the module docstring).
+
+    Args:
+        formats: Names of per-component sinks (SHARD_FORMATS); the index lists them in that order.
+        options: Sink options, as for export_sinks.create_sinks ('apply_highlight' colours each
+                 Markdown shard on its own).
+        workers: Threads hashing and writing shards (default DEFAULT_WORKERS).
+        extraction_options: The keyword arguments of pin_export.iter_extracted.
+
+    Returns:
+        A ShardStats.
+    """
+    formats = [name for name in SHARD_FORMATS if name in formats]
+    if not formats:
+        raise ValueError(f"Sharded export needs one of the formats {', '.join(SHARD_FORMATS)}.")
+    tracer = instrumentation.active_tracer()
+    stats = ShardStats(directory)
+    start = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+
+    extraction = {
+        "ignore_unconnected_pins_for_csv": False,
+        "ignore_free_pins_for_csv": False,
+        "type_field": CONNECTOR_TYPE_FIELD,
+        "extra_fields": (),
+        "pin_net_filter": ""
+    }
+    extraction.update(extraction_options)
+    if cache is not None:
+        components = ((ref, entry.record, entry) for ref, entry in cache.iter_entries(
+            snapshot, rows, progress_callback=progress_callback, **extraction))
+    else:
+        components = ((ref, record, None) for ref, record in pin_export.iter_extracted(
+            snapshot, rows, progress_callback=progress_callback, **extraction))
+
+    # Sinks whose sections do not depend on earlier components render every shard; the others
+    # (highlighted Markdown, colours handed out per document) get a fresh instance per shard
+    shared_sinks = {name: SINKS[name](None, selected_columns, options) for name in formats}
+    suffixes = {name: SINKS[name].suffix for name in formats}
+
+    previous = read_manifest(directory)
+    files = {} # name -> (hash, size), the new manifest
+    taken = {os.path.splitext(INDEX_NAME)[0].lower()}
+    index_entries = []
+    workers = workers or DEFAULT_WORKERS
+    pending = deque()
+
+    def collect(future):
+        for name, digest, size, written in future.result():
+            files[name] = (digest, size)
+            if written:
+                stats.written += 1
+                stats.bytes_written += size
+            else:
+                stats.unchanged += 1
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shard-writer") as pool:
+        try:
+            for ref, record, entry in components:
+                stem = shard_name(ref, taken)
+                batch = []
+                shard_files = {}
+                for name in formats:
+                    sink = shared_sinks[name]
+                    if sink.fragment_key is None:
+                        sink = SINKS[name](None, selected_columns, options)
+                    if entry is not None and sink.fragment_key is not None:
+                        section = cache.fragment(entry, sink.fragment_key, lambda: sink.render(ref, record))
+                    else:
+                        section = sink.render(ref, record)
+                    file_name = stem + suffixes[name]
+                    shard_files[name] = file_name
+                    data = (sink.begin() + section + sink.end()).encode("utf-8")
+                    batch.append((file_name, data, previous.get(file_name)))
+                index_entries.append((ref, record.value, record.pin_count(), shard_files))
+                pending.append(pool.submit(_store_batch, directory, batch))
+                while len(pending) > workers * MAX_PENDING_PER_WORKER:
+                    collect(pending.popleft())
+            stats.components = len(index_entries)
+
+            index = render_index(index_entries, formats).encode("utf-8")
+            pending.append(pool.submit(_store_batch, directory, [(INDEX_NAME, index, previous.get(INDEX_NAME))]))
+            while pending:
+                collect(pending.popleft())
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            for future in pending:
+                if not future.cancelled(): # Already running: let it finish and record its files
+                    try:
+                        collect(future)
+                    except Exception:
+                        pass
+            # Keep track of the shards written so far, so a later export can still remove them
+            try:
+                _write_manifest(directory, dict(previous, **files))
+            except OSError:
+                pass
+            raise
+
+    for name in previous:
+        if name not in files:
+            try:
+                os.remove(os.path.join(directory, name))
+                stats.removed += 1
+            except OSError:
+                pass # Already gone
+    _write_manifest(directory, files)
+
+    stats.seconds = time.perf_counter() - start
+    if tracer.enabled:
+        tracer.count(SHARDS_WRITTEN, stats.written)
+        tracer.count(SHARDS_UNCHANGED, stats.unchanged)
+        tracer.count(instrumentation.BYTES_WRITTEN, stats.bytes_written)
+    print(f"DEBUG: Sharded export into '{directory}': {stats.summary()}")
+    return stats
@@ -0,0 +1,417 @@
+# spatial_index.py
+"""
+SPATIAL INDEX
+
+Selects footprints by where they sit on the board instead of by name:
+
+  - inside a rectangle (footprint position, in mm on the board's coordinates),
+  - inside a closed outline drawn on a board layer (e.g. an 'I/O bracket' rectangle or
+    polygon on User.1),
+  - within a distance of the board edge (any part of the footprint's bounding box near
+    an Edge.Cuts line, arc or circle).
+
+SpatialIndex is a uniform grid over the footprint bounding boxes of a BoardSnapshot,
+sized so that a cell holds about one footprint. A query only visits the cells its area
+touches and tests the footprints found there, so it costs about the number of hits
+(plus the cells along a region's border), not a scan of every footprint.
+
+BoardShapes reads the board drawings (pcbnew PCB_SHAPEs, or the S-expression reader's
+stand-ins) once and turns them into point lists per layer: arcs and circles are
+approximated by short segments, and open lines are chained into closed outlines where
+their ends meet.
+
+The filter expression language uses this through its 'rect:', 'region:' and 'edge:' terms
+(see filter_expression.py). This module does not import wx or pcbnew.
+"""
+
+import math
+
+NM_PER_MM = 1000000
+EDGE_LAYER = "Edge.Cuts"
+
+# PCB_SHAPE.GetShape() values (SHAPE_T in KiCad 7+, the same numbers as PCB_SHAPE_TYPE_T in KiCad 6)
+SHAPE_SEGMENT = 0
+SHAPE_RECT = 1
+SHAPE_ARC = 2
+SHAPE_CIRCLE = 3
+SHAPE_POLY = 4
+
+ARC_SEGMENTS_PER_TURN = 64 # Resolution used to approximate arcs and circles
+CHAIN_TOLERANCE = 1000 # Line ends closer than this (nm) are joined into one outline
+
+
+def footprint_bounding_box(footprint):
+    """
+    Returns (left, top, right, bottom) of a footprint in nm, without its texts where the
+    KiCad version allows it; falls back to its position when there is no bounding box.
+    """
+    try:
+        get_box = footprint.GetBoundingBox
+    except AttributeError:
+        pos = footprint.GetPosition()
+        return int(pos.x), int(pos.y), int(pos.x), int(pos.y)
+    try:
+        box = get_box(False, False) # KiCad 7: (include text, include invisible text)
+    except TypeError:
+        try:
+            box = get_box(False) # KiCad 8+: (include text)
+        except TypeError:
+            box = get_box()
+    return int(box.GetLeft()), int(box.GetTop()), int(box.GetRight()), int(box.GetBottom())
+
+
+# --- Geometry helpers (coordinates in nm) ---
+
+def point_segment_distance(px, py, x1, y1, x2, y2):
+    dx, dy = x2 - x1, y2 - y1
+    length_sq = dx * dx + dy * dy
+    t = 0.0 if length_sq == 0 else max(0.0, min(1.0, ((px - x1) * dx + (py - y1) * dy) / length_sq))
+    return math.hypot(px - (x1 + t * dx), py - (y1 + t * dy))
+
+
+def point_box_distance(px, py, left, top, right, bottom):
+    dx = max(left - px, 0, px - right)
+    dy = max(top - py, 0, py - bottom)
+    return math.hypot(dx, dy)
+
+
+def _segments_cross(ax, ay, bx, by, cx, cy, dx, dy):
+    def orientation(px, py, qx, qy, rx, ry):
+        value = (qx - px) * (ry - py) - (qy - py) * (rx - px)
+        return (value > 0) - (value < 0)
+    o1 = orientation(ax, ay, bx, by, cx, cy)
+    o2 = orientation(ax, ay, bx, by, dx, dy)
+    o3 = orientation(cx, cy, dx, dy, ax, ay)
+    o4 = orientation(cx, cy, dx, dy, bx, by)
+    return o1 != o2 and o3 != o4
+
+
+def box_segment_distance(left, top, right, bottom, x1, y1, x2, y2):
+    """
+    Shortest distance between an axis-aligned box and a segment (0 if they touch).
+    """
+    if left <= x1 <= right and top <= y1 <= bottom:
+        return 0.0
+    corners = ((left, top), (right, top), (right, bottom), (left, bottom))
+    for i in range(4):
+        (cx, cy), (dx, dy) = corners[i], corners[(i + 1) % 4]
+        if _segments_cross(x1, y1, x2, y2, cx, cy, dx, dy):
+            return 0.0
+    return min(min(point_segment_distance(cx, cy, x1, y1, x2, y2) for cx, cy in corners),
+               point_box_distance(x1, y1, left, top, right, bottom),
+               point_box_distance(x2, y2, left, top, right, bottom))
+
+
+def point_in_polygon(px, py, points):
+    """
+    Even-odd test of a point against a closed outline given as [(x, y), ...].
+    """
+    inside = False
+    j = len(points) - 1
+    for i in range(len(points)):
+        xi, yi = points[i]
+        xj, yj = points[j]
+        if (yi > py) != (yj > py) and px < (xj - xi) * (py - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def _arc_points(center_x, center_y, radius, start_angle, sweep):
+    steps = max(2, int(math.ceil(abs(sweep) / (2 * math.pi) * ARC_SEGMENTS_PER_TURN)))
+    return [(center_x + radius * math.cos(start_angle + sweep * i / steps),
+             center_y + radius * math.sin(start_angle + sweep * i / steps)) for i in range(steps + 1)]
+
+
+def arc_through(start, mid, end):
+    """
+    Returns points along the arc from 'start' through 'mid' to 'end' (each an (x, y) pair).
+    """
+    (ax, ay), (bx, by), (cx, cy) = start, mid, end
+    d = 2 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+    if d == 0:
+        return [start, end] # Collinear: a straight line
+    a_sq, b_sq, c_sq = ax * ax + ay * ay, bx * bx + by * by, cx * cx + cy * cy
+    ux = (a_sq * (by - cy) + b_sq * (cy - ay) + c_sq * (ay - by)) / d
+    uy = (a_sq * (cx - bx) + b_sq * (ax - cx) + c_sq * (bx - ax)) / d
+    radius = math.hypot(ax - ux, ay - uy)
+    a_start = math.atan2(ay - uy, ax - ux)
+    a_mid = math.atan2(by - uy, bx - ux)
+    a_end = math.atan2(cy - uy, cx - ux)
+    sweep = (a_end - a_start) % (2 * math.pi)
+    if (a_mid - a_start) % (2 * math.pi) > sweep: # The arc runs the other way round
+        sweep -= 2 * math.pi
+    points = _arc_points(ux, uy, radius, a_start, sweep)
+    points[0], points[-1] = start, end # Exact ends, so chained lines still meet
+    return points
+
+
+def _xy(vector):
+    return int(vector.x), int(vector.y)
+
+
+def shape_outline(shape):
+    """
+    Converts one PCB_SHAPE into (points, closed), or None for shapes that are not handled
+    (Bezier curves, unknown types).
+    """
+    kind = shape.GetShape()
+    if kind == SHAPE_SEGMENT:
+        return [_xy(shape.GetStart()), _xy(shape.GetEnd())], False
+    if kind == SHAPE_RECT:
+        (x1, y1), (x2, y2) = _xy(shape.GetStart()), _xy(shape.GetEnd())
+        return [(x1, y1), (x2, y1), (x2, y2), (x1, y2)], True
+    if kind == SHAPE_CIRCLE:
+        cx, cy = _xy(shape.GetCenter())
+        points = _arc_points(cx, cy, shape.GetRadius(), 0.0, 2 * math.pi)
+        return points[:-1], True
+    if kind == SHAPE_ARC:
+        return arc_through(_xy(shape.GetStart()), _xy(shape.GetArcMid()), _xy(shape.GetEnd())), False
+    if kind == SHAPE_POLY:
+        try:
+            points = [_xy(p) for p in shape.GetPolyPoints()]
+        except AttributeError:
+            outline = shape.GetPolyShape().Outline(0)
+            points = [_xy(outline.CPoint(i)) for i in range(outline.PointCount())]
+        return (points, True) if len(points) >= 3 else None
+    return None
+
+
+def _close_enough(a, b):
+    return abs(a[0] - b[0]) <= CHAIN_TOLERANCE and abs(a[1] - b[1]) <= CHAIN_TOLERANCE
+
+
+def join_chains(polylines):
+    """
+    Chains open polylines whose ends meet (in any direction) and returns the closed outlines
+    that result; chains that never close are dropped.
+    """
+    open_lines = [list(points) for points in polylines]
+    closed = []
+    while open_lines:
+        chain = open_lines.pop()
+        extended = True
+        while extended and not (len(chain) > 2 and _close_enough(chain[0], chain[-1])):
+            extended = False
+            for i, line in enumerate(open_lines):
+                if _close_enough(chain[-1], line[0]):
+                    chain.extend(line[1:])
+                elif _close_enough(chain[-1], line[-1]):
+                    chain.extend(reversed(line[:-1]))
+                elif _close_enough(chain[0], line[-1]):
+                    chain[:0] = line[:-1]
+                elif _close_enough(chain[0], line[0]):
+                    chain[:0] = list(reversed(line[1:]))
+                else:
+                    continue
+                del open_lines[i]
+                extended = True
+                break
+        if len(chain) > 2 and _close_enough(chain[0], chain[-1]):
+            closed.append(chain[:-1])
+    return closed
+
+
+class BoardShapes:
+    """
+    The board's drawings as point lists per layer, read once from board.GetDrawings().
+    """
+
+    def __init__(self, board):
+        self.closed_by_layer = {} # layer name -> [[(x, y), ...], ...] closed outlines
+        self.open_by_layer = {} # layer name -> [[(x, y), ...], ...] lines and arcs
+        get_drawings = getattr(board, "GetDrawings", None)
+        for item in (get_drawings() if get_drawings is not None else ()):
+            shape = item.Cast() if hasattr(item, "Cast") else item
+            if not hasattr(shape, "GetShape"):
+                continue # Texts, dimensions...
+            outline = shape_outline(shape)
+            if outline is None:
+                continue
+            points, closed = outline
+            target = self.closed_by_layer if closed else self.open_by_layer
+            target.setdefault(shape.GetLayerName(), []).append(points)
+        self._regions = {}
+        print(f"DEBUG: BoardShapes read. {sum(len(v) for v in self.closed_by_layer.values())} closed and "
+              f"{sum(len(v) for v in self.open_by_layer.values())} open shapes.")
+
+    def layer_names(self):
+        return sorted(set(self.closed_by_layer) | set(self.open_by_layer))
+
+    def regions(self, layer_name):
+        """
+        Returns the closed outlines on a layer (matched ignoring case), including outlines
+        made of lines and arcs that meet end to end.
+        """
+        key = layer_name.lower()
+        regions = self._regions.get(key)
+        if regions is None:
+            regions = []
+            open_lines = []
+            for name in self.layer_names():
+                if name.lower() == key:
+                    regions.extend(self.closed_by_layer.get(name, ()))
+                    open_lines.extend(self.open_by_layer.get(name, ()))
+            regions.extend(join_chains(open_lines))
+            self._regions[key] = regions
+        return regions
+
+    def segments(self, layer_name=EDGE_LAYER):
+        """
+        Returns every straight piece of the drawings on a layer as (x1, y1, x2, y2).
+        """
+        key = layer_name.lower()
+        segments = []
+        for name in self.layer_names():
+            if name.lower() != key:
+                continue
+            for points in self.closed_by_layer.get(name, ()):
+                segments.extend((*points[i - 1], *points[i]) for i in range(len(points)))
+            for points in self.open_by_layer.get(name, ()):
+                segments.extend((*points[i - 1], *points[i]) for i in range(1, len(points)))
+        return segments
+
+
+class SpatialIndex:
+    """
+    Uniform grid over the footprint bounding boxes of a snapshot (fp_box_* columns, nm).
+    Every footprint is listed in each cell its bounding box touches.
+    """
+
+    def __init__(self, snapshot):
+        self.left = snapshot.fp_box_left
+        self.top = snapshot.fp_box_top
+        self.right = snapshot.fp_box_right
+        self.bottom = snapshot.fp_box_bottom
+        self.pos_x = snapshot.fp_pos_x
+        self.pos_y = snapshot.fp_pos_y
+        count = len(self.left)
+        self.cells = {}
+        if not count:
+            self.cell_size = NM_PER_MM
+            self.cell_columns = self.cell_rows = 0
+            return
+        self.origin_x = min(self.left)
+        self.origin_y = min(self.top)
+        width = max(self.right) - self.origin_x
+        height = max(self.bottom) - self.origin_y
+        # About one footprint per cell, but never finer than 0.1 mm
+        self.cell_size = max(int(math.sqrt(max(width, 1) * max(height, 1) / count)) + 1, NM_PER_MM // 10)
+        self.cell_columns = width // self.cell_size + 1
+        self.cell_rows = height // self.cell_size + 1
+        cells = self.cells
+        for row in range(count):
+            cx0, cy0, cx1, cy1 = self._cell_range(self.left[row], self.top[row], self.right[row], self.bottom[row])
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    cell = cells.get((cx, cy))
+                    if cell is None:
+                        cells[(cx, cy)] = [row]
+                    else:
+                        cell.append(row)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def _cell_range(self, left, top, right, bottom):
+        """
+        Cell columns and rows covering an area, clipped to the grid (empty ranges outside it).
+        """
+        size = self.cell_size
+        return (max((int(left) - self.origin_x) // size, 0), max((int(top) - self.origin_y) // size, 0),
+                min((int(right) - self.origin_x) // size, self.cell_columns - 1),
+                min((int(bottom) - self.origin_y) // size, self.cell_rows - 1))
+
+    def cell_count(self, left, top, right, bottom):
+        """
+        Number of grid cells an area spans, i.e. the cost of looking it up.
+        """
+        if not self.left:
+            return 0
+        cx0, cy0, cx1, cy1 = self._cell_range(left, top, right, bottom)
+        return max(cx1 - cx0 + 1, 0) * max(cy1 - cy0 + 1, 0)
+
+    def rows_touching(self, left, top, right, bottom):
+        """
+        Returns the rows whose bounding box overlaps an area (all in nm).
+        """
+        if not self.cells:
+            return set()
+        cx0, cy0, cx1, cy1 = self._cell_range(left, top, right, bottom)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            candidates = (row for cell in self.cells.values() for row in cell) # Area larger than the board
+        else:
+            candidates = (row for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)
+                          for row in self.cells.get((cx, cy), ()))
+        rows = set()
+        for row in candidates:
+            if row not in rows and self.left[row] <= right and self.right[row] >= left \
+                    and self.top[row] <= bottom and self.bottom[row] >= top:
+                rows.add(row)
+        return rows
+
+    def rows_in_rect(self, left, top, right, bottom):
+        """
+        Returns the rows whose position (anchor) lies inside a rectangle.
+        """
+        pos_x, pos_y = self.pos_x, self.pos_y
+        return {row for row in self.rows_touching(left, top, right, bottom)
+                if left <= pos_x[row] <= right and top <= pos_y[row] <= bottom}
+
+    def rows_in_polygons(self, polygons):
+        """
+        Returns the rows whose position lies inside any of the closed outlines.
+        """
+        pos_x, pos_y = self.pos_x, self.pos_y
+        rows = set()
+        for points in polygons:
+            xs = [p[0] for p in points]
+            ys = [p[1] for p in points]
+            for row in self.rows_touching(min(xs), min(ys), max(xs), max(ys)):
+                if row not in rows and point_in_polygon(pos_x[row], pos_y[row], points):
+                    rows.add(row)
+        return rows
+
+    def rows_near_segments(self, segments, distance):
+        """
+        Returns the rows whose bounding box comes within 'distance' (nm) of any segment.
+        Only the cells in the band around each segment are visited, column by column.
+        """
+        rows = set()
+        if not self.cells:
+            return rows
+        size = self.cell_size
+        left, top, right, bottom = self.left, self.top, self.right, self.bottom
+        for x1, y1, x2, y2 in segments:
+            if x1 > x2:
+                x1, y1, x2, y2 = x2, y2, x1, y1
+            cx0, _cy0, cx1, _cy1 = self._cell_range(x1 - distance, 0, x2 + distance, 0)
+            for cx in range(cx0, cx1 + 1):
+                # The part of the segment within 'distance' of this column, widened by 'distance'
+                column_left = self.origin_x + cx * size - distance
+                column_right = column_left + size + 2 * distance
+                if x1 == x2:
+                    band_top, band_bottom = min(y1, y2), max(y1, y2)
+                else:
+                    slope = (y2 - y1) / (x2 - x1)
+                    ya = y1 + slope * (max(column_left, x1) - x1)
+                    yb = y1 + slope * (min(column_right, x2) - x1)
+                    band_top, band_bottom = min(ya, yb), max(ya, yb)
+                _cx0, cy0, _cx1, cy1 = self._cell_range(0, band_top - distance, 0, band_bottom + distance)
+                for cy in range(cy0, cy1 + 1):
+                    cell = self.cells.get((cx, cy))
+                    if cell is None:
+                        continue
+                    for row in cell:
+                        if row not in rows and box_segment_distance(left[row], top[row], right[row], bottom[row],
+                                                                    x1, y1, x2, y2) <= distance:
+                            rows.add(row)
+        return rows
+
+
+def box_near_segments(left, top, right, bottom, segments, distance):
+    """
+    True if a bounding box comes within 'distance' of any segment (the per-footprint test
+    behind rows_near_segments).
+    """
+    return any(box_segment_distance(left, top, right, bottom, *segment) <= distance for segment in segments)
@@ -0,0 +1,177 @@
+# sqlite_export.py
+"""
+SQLITE EXPORT
+
+Writes the pinout of a set of footprints to a SQLite database instead of the per-component
+blocks of the CSV export, so downstream tools can query it directly:
+
+    -- all pins on a net
+    SELECT reference, pad_name FROM pin_details WHERE net_name = '/CAN_H';
+    -- all connectors of a type
+    SELECT reference, value FROM components WHERE connector_type = 'harness';
+
+Tables:
+    components  one row per footprint (numeric position in mm and rotation in degrees)
+    pins        one row per pad; net_id is NULL for pads without a net
+    nets        one row per distinct net name
+    fields      every field of every footprint (name, value), for custom properties
+    pin_details view joining pins with their component and net
+
+Indexes cover the reference, the net name and the connector type (plus the pin -> net and
+field lookups). Everything is inserted with executemany() in a single transaction, and the
+indexes are created after the rows are in, which is much faster than updating them per row.
+Uses only the standard library sqlite3 module; this module does not import wx or pcbnew.
+"""
+
+import os
+import sqlite3
+
+from . import instrumentation
+from . import output_writer
+from . import pin_export
+from .board_snapshot import CONNECTOR_TYPE_FIELD
+
+SCHEMA = """
+CREATE TABLE components (
+    id INTEGER PRIMARY KEY,
+    reference TEXT NOT NULL,
+    value TEXT,
+    footprint TEXT,
+    description TEXT,
+    layer TEXT,
+    x_mm REAL,
+    y_mm REAL,
+    rotation_deg REAL,
+    connector_type TEXT
+);
+CREATE TABLE nets (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE pins (
+    id INTEGER PRIMARY KEY,
+    component_id INTEGER NOT NULL REFERENCES components(id),
+    pad_name TEXT NOT NULL,
+    net_id INTEGER REFERENCES nets(id)
+);
+CREATE TABLE fields (
+    component_id INTEGER NOT NULL REFERENCES components(id),
+    name TEXT NOT NULL,
+    value TEXT
+);
+CREATE VIEW pin_details AS
+    SELECT c.reference AS reference, p.pad_name AS pad_name, n.name AS net_name,
+           c.connector_type AS connector_type, c.value AS value
+    FROM pins p
+    JOIN components c ON c.id = p.component_id
+    LEFT JOIN nets n ON n.id = p.net_id;
+"""
+
+INDEXES = """
+CREATE INDEX idx_components_reference ON components(reference);
+CREATE INDEX idx_components_connector_type ON components(connector_type);
+CREATE UNIQUE INDEX idx_nets_name ON nets(name);
+CREATE INDEX idx_pins_component ON pins(component_id);
+CREATE INDEX idx_pins_net ON pins(net_id);
+CREATE INDEX idx_fields_name_value ON fields(name, value);
+"""
+
+
+def write_sqlite(path, snapshot, rows, ignore_unconnected_pins=False, ignore_free_pins=False,
+                 type_field=CONNECTOR_TYPE_FIELD, progress_callback=None, pin_net_filter=""):
+    """
+    Writes the given footprint rows (normally after unique_reference_rows) to a new SQLite
+    database at 'path'. The database is built in a temporary file and only then replaces an
+    existing file, so a failed export leaves the previous one intact.
+
+    Args:
+        ignore_unconnected_pins / ignore_free_pins: The CSV pin filters; filtered pads get no 'pins' row.
+        type_field: Field stored as 'connector_type' (normally 'connector-type').
+        progress_callback: Optional callable(done, total), called once per footprint in both the
+                           component and the pin pass, and before the fields and the indexes
+                           are written (it raises to cancel, see export_worker.ExportCancelled).
+        pin_net_filter: If set, only pins on nets matching this Net Name filter get a 'pins' row.
+
+    Returns:
+        (number of components, number of pins, number of nets) written.
+    """
+    tracer = instrumentation.active_tracer()
+    strings = snapshot.strings
+    net_ids = {} # net name -> id, assigned while the pins are inserted
+    counts = {"pins": 0}
+    total = 2 * len(rows) + 2 # Component pass, pin pass, fields, indexes
+    selected_pads = pin_export.pins_on_matching_nets(snapshot, pin_net_filter) if pin_net_filter else None
+
+    def report(done):
+        if progress_callback is not None:
+            progress_callback(done, total)
+
+    def component_records():
+        for component_id, row in enumerate(rows, 1):
+            report(component_id - 1)
+            if type_field == CONNECTOR_TYPE_FIELD:
+                connector_type = snapshot.connector_type(row)
+            else:
+                connector_type = snapshot.field(row, type_field)
+            description = strings[snapshot.fp_description[row]]
+            yield (component_id, snapshot.reference(row), snapshot.value(row), strings[snapshot.fp_fpid[row]],
+                   description if description and description != "No description" else None,
+                   strings[snapshot.fp_layer[row]], snapshot.fp_pos_x[row] / 1000000.0,
+                   snapshot.fp_pos_y[row] / 1000000.0, snapshot.fp_rotation[row], connector_type)
+
+    def pin_records():
+        for component_id, row in enumerate(rows, 1):
+            report(len(rows) + component_id - 1)
+            pads = snapshot.pads(row) if selected_pads is None else selected_pads.get(row, ())
+            for pad_idx in pads:
+                is_connected = snapshot.has_net(pad_idx)
+                net_name = snapshot.net_name_of(pad_idx) if is_connected else ""
+                if ignore_unconnected_pins and net_name.lower() == "unconnected":
+                    continue
+                if ignore_free_pins and not is_connected:
+                    continue
+                net_id = None
+                if is_connected:
+                    net_id = net_ids.get(net_name)
+                    if net_id is None:
+                        net_id = net_ids[net_name] = len(net_ids) + 1
+                counts["pins"] += 1
+                yield (component_id, snapshot.pad_name_of(pad_idx), net_id)
+            if tracer.enabled:
+                tracer.count(instrumentation.FOOTPRINTS)
+                tracer.count(instrumentation.PADS_SCANNED, len(pads))
+
+    def field_records():
+        for component_id, row in enumerate(rows, 1):
+            for name, text in snapshot.fields(row):
+                yield (component_id, name, text)
+
+    temp_path = output_writer.temporary_path(path)
+    connection = sqlite3.connect(temp_path)
+    try:
+        # A fresh file that is deleted on failure: no rollback journal needed
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.executescript(SCHEMA)
+        with connection: # One transaction, committed at the end of the block
+            connection.executemany("INSERT INTO components VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", component_records())
+            connection.executemany("INSERT INTO pins (component_id, pad_name, net_id) VALUES (?, ?, ?)", pin_records())
+            connection.executemany("INSERT INTO nets VALUES (?, ?)", ((i, name) for name, i in net_ids.items()))
+            report(2 * len(rows))
+            connection.executemany("INSERT INTO fields VALUES (?, ?, ?)", field_records())
+            report(2 * len(rows) + 1)
+            for statement in INDEXES.strip().split(";"):
+                if statement.strip():
+                    connection.execute(statement)
+        connection.close()
+        output_writer.move_into_place(temp_path, path)
+    except BaseException:
+        connection.close()
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    if tracer.enabled:
+        tracer.count(instrumentation.BYTES_WRITTEN, os.path.getsize(path))
+    return len(rows), counts["pins"], len(net_ids)
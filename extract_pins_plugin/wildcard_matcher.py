@@ -0,0 +1,133 @@
+# wildcard_matcher.py
+"""
+WILDCARD MATCHER
+
+Compiles a list of wildcard patterns (only '*' is special, matching is case-insensitive
+and on the whole string) into a single matcher object:
+
+  - pure literals ("GND", "harness")    -> one set lookup
+  - pure prefixes ("J*", "CAN_*")       -> one bisect over the sorted prefixes
+  - everything else ("*_N", "PWR_*V*")  -> one combined, precompiled alternation regex
+
+Results are memoized per distinct input string, so matching tens of thousands of pad
+nets that share a few hundred net names only evaluates each name once.
+"""
+
+import re
+from bisect import bisect_right
+from functools import lru_cache
+
+from . import instrumentation
+
+
+def wildcard_to_regex(pattern):
+    """
+    Converts a wildcard pattern (e.g., 'J*') into a regex pattern.
+    Escapes special regex characters and replaces '*' with '.*'.
+    """
+    # Escape all special regex characters first
+    escaped_pattern = re.escape(pattern)
+    # Then replace the escaped '*' with '.*'
+    return escaped_pattern.replace(r'\*', '.*')
+
+
+def split_wildcard_list(text):
+    """
+    Splits a comma-separated filter string into its stripped, non-empty patterns.
+    """
+    return [p.strip() for p in text.split(',') if p.strip()]
+
+
+class WildcardMatcher:
+    """
+    A precompiled set of wildcard patterns. A string matches if it matches any of the patterns.
+    Call the matcher (or use matches()) with the string to test.
+    """
+
+    def __init__(self, patterns):
+        """
+        Args:
+            patterns: An iterable of wildcard pattern strings. Empty patterns are ignored.
+        """
+        self.patterns = tuple(p for p in patterns if p)
+        self.literals = set()
+        prefixes = set()
+        regex_parts = []
+
+        for pattern in self.patterns:
+            pattern = re.sub(r'\*+', '*', pattern.lower()) # '**' means the same as '*'
+            star_count = pattern.count('*')
+            if star_count == 0:
+                self.literals.add(pattern)
+            elif star_count == 1 and pattern.endswith('*'):
+                prefixes.add(pattern[:-1])
+            else:
+                regex_parts.append(wildcard_to_regex(pattern))
+
+        # Drop prefixes that are covered by a shorter prefix ('CAN*' makes 'CAN_H*' redundant).
+        # With no prefix being a prefix of another, the only candidate for a string is the
+        # greatest prefix that sorts <= the string, which bisect finds directly.
+        self.prefixes = []
+        for prefix in sorted(prefixes):
+            if not self.prefixes or not prefix.startswith(self.prefixes[-1]):
+                self.prefixes.append(prefix)
+
+        self.regex = re.compile("|".join(f"(?:{part})" for part in regex_parts), re.DOTALL) if regex_parts else None
+
+        self._cache = {}
+        self.evaluations = 0 # Number of uncached evaluations, handy to check the memoization
+
+    def __bool__(self):
+        """
+        A matcher without any pattern is falsy; callers treat it as 'no filter'.
+        """
+        return bool(self.patterns)
+
+    def __repr__(self):
+        return f"WildcardMatcher({', '.join(self.patterns)})"
+
+    def _evaluate(self, text):
+        self.evaluations += 1
+        text_lower = text.lower()
+        if text_lower in self.literals:
+            return True
+        if self.prefixes:
+            idx = bisect_right(self.prefixes, text_lower) - 1
+            if idx >= 0 and text_lower.startswith(self.prefixes[idx]):
+                return True
+        if self.regex is not None:
+            instrumentation.active_tracer().count(instrumentation.REGEX_EVALUATIONS)
+            if self.regex.fullmatch(text_lower):
+                return True
+        return False
+
+    def matches(self, text):
+        result = self._cache.get(text)
+        if result is None:
+            result = self._evaluate(text)
+            self._cache[text] = result
+        return result
+
+    __call__ = matches
+
+    def filter(self, strings):
+        """
+        Returns a set of the given strings that match.
+        """
+        return {s for s in strings if self.matches(s)}
+
+
+@lru_cache(maxsize=64)
+def compile_wildcards(text, comma_separated=True):
+    """
+    Returns a (cached) WildcardMatcher for a filter string, so pressing the same export
+    button twice with the same filter reuses the compiled matcher and its memo table.
+
+    Args:
+        text: The raw filter text.
+        comma_separated: If True the text is a comma-separated pattern list,
+                         otherwise the whole (stripped) text is a single pattern.
+    """
+    if comma_separated:
+        return WildcardMatcher(split_wildcard_list(text))
+    return WildcardMatcher([text.strip()])